@@ -1,11 +1,104 @@
 import os
-from flask import Flask, request, render_template
-from src.pipeline.predict_pipeline import CustomData, PredictPipeline
+import time
+import numpy as np
+from flask import Flask, Response, request, render_template, jsonify, g
+from src.logger import logging
+from src.pipeline import instrumentation
+from src.pipeline.instrumentation import stage
+from src.pipeline.predict_pipeline import CustomData, BatchData, PredictPipeline
 
 applictaion = Flask(__name__)
 
 app = applictaion
 
+# The pipeline only holds a reference to the process-wide model registry, so one instance serves every request.
+# IRIS_MODEL_ENGINE=numpy serves the exported weights with the TensorFlow-free NumPy engine, and
+# IRIS_MODEL_ENGINE=fused the exported weights with the scaler folded in (no pandas/ColumnTransformer per request).
+# IRIS_MODEL_ENGINE=bundle memory-maps the same weights from the versioned bundle, falling back to the pickles.
+# IRIS_MODEL_PRECISION=float16 or int8 serves the quantized exports of the numpy and fused engines.
+predict_pipeline = PredictPipeline(engine = os.environ.get('IRIS_MODEL_ENGINE', 'keras'), precision = os.environ.get('IRIS_MODEL_PRECISION', 'float32'))
+
+# Opt-in cache of predictions keyed on the rounded feature vector and the artifact version (IRIS_PREDICTION_CACHE=1)
+if os.environ.get('IRIS_PREDICTION_CACHE', '0') == '1':
+    from src.pipeline.prediction_cache import PredictionCache, PredictionCacheConfig
+
+    predict_pipeline.cache = PredictionCache(PredictionCacheConfig(
+        max_entries = int(os.environ.get('IRIS_CACHE_SIZE', 10000)),
+        ttl_seconds = float(os.environ.get('IRIS_CACHE_TTL', 3600)),
+        precision   = int(os.environ.get('IRIS_CACHE_PRECISION', 1))
+    ))
+
+# Opt-in table of predictions precomputed over the 0.1 cm feature grid (IRIS_LOOKUP_TABLE=1, built by
+# src/components/lookup_table_compiler.py with the same engine); off-grid rows and other model versions use the model
+if os.environ.get('IRIS_LOOKUP_TABLE', '0') == '1':
+    from src.pipeline.lookup_table import LookupTable
+
+    predict_pipeline.lookup_table = LookupTable.load(os.environ.get('IRIS_LOOKUP_TABLE_PATH', os.path.join('artifacts', 'lookup_table')))
+
+# Opt-in dynamic batching of concurrent form submissions (IRIS_MICRO_BATCHING=1)
+micro_batcher = None
+
+if os.environ.get('IRIS_MICRO_BATCHING', '0') == '1':
+    from src.pipeline.micro_batcher import MicroBatcher, MicroBatcherConfig
+
+    micro_batcher = MicroBatcher(predict_pipeline, MicroBatcherConfig(
+        max_batch_size = int(os.environ.get('IRIS_MAX_BATCH_SIZE', 64)),
+        max_wait_ms    = float(os.environ.get('IRIS_MAX_WAIT_MS', 2.0))
+    ))
+
+# Stage timings, request counters and the registry/cache/batcher statistics are exposed at /metrics (IRIS_METRICS=0 turns the timers off)
+REQUEST_SECONDS = instrumentation.histogram("iris_http_request_seconds", "Duration of HTTP requests", ("endpoint",))
+REQUESTS_TOTAL  = instrumentation.counter("iris_http_requests_total", "Number of HTTP requests", ("endpoint", "status"))
+
+instrumentation.register_stats("iris_model_registry", predict_pipeline.registry.get_stats)
+
+if predict_pipeline.cache is not None:
+    instrumentation.register_stats("iris_prediction_cache", predict_pipeline.cache.get_stats)
+
+if micro_batcher is not None:
+    instrumentation.register_stats("iris_micro_batcher", micro_batcher.get_stats)
+
+# With IRIS_PROFILING=1, a request with ?profile=1 is sampled and its hottest call stacks are logged
+PROFILING = os.environ.get('IRIS_PROFILING', '0') == '1'
+
+@app.before_request
+def start_request_timer():
+    if instrumentation.ENABLED:
+        g.request_start = time.perf_counter()
+
+    if PROFILING and request.args.get('profile') == '1':
+        g.profiler = instrumentation.SamplingProfiler().start()
+
+@app.after_request
+def record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    if 'request_start' in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, (endpoint,))
+        REQUESTS_TOTAL.inc((endpoint, str(response.status_code)))
+
+    if 'profiler' in g:
+        g.profiler.stop()
+
+        logging.info(f"Profile of {request.method} {request.path} ({sum(g.profiler.samples.values())} samples):\n{g.profiler.report()}")
+
+        response.headers['X-Profile-Samples'] = str(sum(g.profiler.samples.values()))
+
+    return response
+
+def warm_up():
+    """
+    Eagerly loads the model artifacts and runs one prediction. Call it when a worker boots (it runs at import
+    time when IRIS_WARM_UP=1) so the first request does not pay for unpickling the model and importing its framework.
+
+    Returns:
+        float: The number of seconds the warm-up took.
+    """
+    return predict_pipeline.warm_up()
+
+if os.environ.get('IRIS_WARM_UP', '0') == '1':
+    warm_up()
+
 # Route for a home page
 @app.route('/')
 def index():
@@ -29,9 +122,10 @@ def predict_data():
     - For a POST request:
         - Extracts form data submitted by the user, including sepal and petal dimensions.
         - Creates an instance of the CustomData class, which encapsulates the input data and
-          converts it into a DataFrame for processing.
-        - Initiates the PredictPipeline class to load the model and preprocessor and to make 
-          predictions based on the input data.
+          converts it into a single-row feature array for processing.
+        - Uses the shared PredictPipeline instance, whose model and preprocessor are loaded once 
+          per process, to make predictions based on the input data. When micro-batching is enabled,
+          the row is queued and scored together with concurrent requests instead.
         - Passes the prediction result back to the 'home.html' template, displaying it to the user.
 
     Returns:
@@ -41,21 +135,67 @@ def predict_data():
         return render_template('home.html')
     
     else:
-        data = CustomData(
-            sepal_length = float(request.form.get('sepal_length')),
-            sepal_width  = float(request.form.get('sepal_width')),
-            petal_length = float(request.form.get('petal_length')),
-            petal_width  = float(request.form.get('petal_width'))
-        )
+        with stage("parse_form"):
+            data = CustomData(
+                sepal_length = float(request.form.get('sepal_length')),
+                sepal_width  = float(request.form.get('sepal_width')),
+                petal_length = float(request.form.get('petal_length')),
+                petal_width  = float(request.form.get('petal_width'))
+            )
+
+        with stage("build_features"):
+            features = data.get_data_as_array()
 
-        pred_df = data.get_data_as_dataframe()
+        logging.debug("Prediction features: %s", features)
 
-        print(pred_df)
+        if micro_batcher is not None:
+            results, _ = micro_batcher.predict(features)
 
-        predict_data = PredictPipeline()
-        results      = predict_data.predict(pred_df)
+        else:
+            results = predict_pipeline.predict(features)
 
         return render_template('home.html', results = results[0])
 
+@app.route('/predict/batch', methods = ['POST'])
+def predict_batch():
+    """
+    Handles JSON requests to the '/predict/batch' route, scoring many flowers in one call.
+    The body is either a list of records or {"columns": {...}} with one array per feature (see BatchData).
+    All rows are validated into a single float32 matrix, transformed once and scored with one batched model call.
+
+    Returns:
+        Response: JSON with the predicted class ids and class probabilities, or a 400 error for invalid input.
+    """
+    payload = request.get_json(silent = True)
+
+    if payload is None:
+        return jsonify(error = "Request body must be JSON"), 400
+
+    try:
+        with stage("build_features"):
+            features = BatchData(payload).get_data_as_array()
+
+    except ValueError as e:
+        return jsonify(error = str(e)), 400
+
+    class_ids, probabilities = predict_pipeline.predict_batch(features)
+
+    return jsonify(
+        n_rows        = len(class_ids),
+        class_ids     = class_ids.tolist(),
+        probabilities = np.asarray(probabilities, dtype = np.float64).round(6).tolist()
+    )
+
+@app.route('/metrics')
+def metrics():
+    """
+    Exposes the request and per-stage latency histograms, request counters, and the model registry,
+    prediction cache and micro-batcher statistics in the Prometheus text format.
+
+    Returns:
+        Response: The metrics as text/plain.
+    """
+    return Response(instrumentation.render_metrics(), mimetype = 'text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug = True, host = '0.0.0.0', port = int(os.environ.get('PORT', 5000)))
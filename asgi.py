@@ -0,0 +1,353 @@
+"""
+Asynchronous (ASGI) serving mode, for any ASGI server:
+
+    uvicorn asgi:app --workers 4
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+It serves the same pages and `/predictdata` form as the Flask app, the `/predict/batch` JSON API, a single-row
+`/predict` JSON API and `/metrics`. The event loop only parses requests and renders responses; model calls run on
+a bounded thread pool. At most `max_in_flight` predictions may be running or queued per process: beyond that
+requests are answered 429 straight away instead of queueing, and a prediction that does not finish within its
+timeout is answered 503. Its slot is only released when the model call actually returns, so a slow model keeps
+shedding load rather than piling up work.
+
+The model pipeline, prediction cache, micro-batcher and metrics are the ones configured in `app.py`, with the same
+environment variables, plus:
+    IRIS_ASGI_EXECUTOR_WORKERS    Threads running model calls (default 4).
+    IRIS_ASGI_MAX_IN_FLIGHT       Predictions running or queued before requests get 429 (default 64).
+    IRIS_ASGI_REQUEST_TIMEOUT     Seconds a prediction may take before the request gets 503 (default 2). A request
+                                  may ask for less with an `X-Request-Timeout` header.
+"""
+import os
+import json
+import time
+import asyncio
+from urllib.parse import parse_qs
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from src.logger import logging
+from src.pipeline import instrumentation
+from src.pipeline.instrumentation import stage
+from src.pipeline.predict_pipeline import CustomData, BatchData, FEATURE_ALIASES
+from app import predict_pipeline, micro_batcher, REQUEST_SECONDS, REQUESTS_TOTAL
+
+@dataclass
+class AsgiServingConfig:
+    """
+    Concurrency limits of the ASGI serving mode.
+
+    Attributes:
+        executor_workers (int): Threads running model calls.
+        max_in_flight (int): Predictions running or waiting for a thread before new requests are rejected with 429.
+        request_timeout (float): Seconds a prediction may take before the request is answered 503; also the longest
+                                 timeout a request may ask for.
+        max_body_bytes (int): Largest request body accepted; larger ones are answered 413.
+    """
+    executor_workers: int = 4
+    max_in_flight: int = 64
+    request_timeout: float = 2.0
+    max_body_bytes: int = 1 << 20
+
+class Overloaded(Exception):
+    """
+    Raised when a prediction is rejected because `max_in_flight` predictions are already admitted.
+    """
+
+class InferenceGate:
+    """
+    Admission control in front of the model: runs blocking calls on a bounded thread pool, rejects calls beyond
+    `max_in_flight` and stops waiting for them after a timeout. The counters are only touched on the event loop.
+
+    Attributes:
+        config (AsgiServingConfig): Limits of the gate.
+        executor (ThreadPoolExecutor): Threads running the model calls.
+        in_flight (int): Calls admitted and not finished, including those that timed out.
+    """
+    def __init__(self, config):
+        self.config    = config
+        self.executor  = ThreadPoolExecutor(max_workers = config.executor_workers, thread_name_prefix = "iris-inference")
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected  = 0
+        self.timed_out = 0
+
+    def _release(self, _):
+        self.in_flight -= 1
+        self.completed += 1
+
+    async def run(self, function, *args, timeout = None):
+        """
+        Runs `function(*args)` on the thread pool.
+
+        Args:
+            function (callable): The blocking call.
+            timeout (float, optional): Seconds to wait for it; `request_timeout` by default.
+
+        Returns:
+            object: What the call returned.
+
+        Raises:
+            Overloaded: If `max_in_flight` calls are already admitted.
+            asyncio.TimeoutError: If the call did not finish in time. It keeps its slot until it does.
+        """
+        if self.in_flight >= self.config.max_in_flight:
+            self.rejected += 1
+            raise Overloaded()
+
+        self.in_flight += 1
+
+        future = asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        future.add_done_callback(self._release)
+
+        try:
+            # shield: giving up on the request must not cancel the bookkeeping of the call still running
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.config.request_timeout)
+
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+
+    def get_stats(self):
+        """
+        Returns the admission counters, exposed at /metrics.
+        """
+        return {
+            "in_flight"     : self.in_flight,
+            "max_in_flight" : self.config.max_in_flight,
+            "completed"     : self.completed,
+            "rejected"      : self.rejected,
+            "timed_out"     : self.timed_out
+        }
+
+class HttpError(Exception):
+    """
+    Ends a request early with an HTTP error status and a JSON message.
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+config = AsgiServingConfig(
+    executor_workers = int(os.environ.get('IRIS_ASGI_EXECUTOR_WORKERS', 4)),
+    max_in_flight    = int(os.environ.get('IRIS_ASGI_MAX_IN_FLIGHT', 64)),
+    request_timeout  = float(os.environ.get('IRIS_ASGI_REQUEST_TIMEOUT', 2.0))
+)
+
+gate = InferenceGate(config)
+
+instrumentation.register_stats("iris_asgi", gate.get_stats)
+
+ROUTES = {'index': '/', 'predict_data': '/predictdata'}
+
+templates = Environment(loader = FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')), autoescape = select_autoescape())
+templates.globals['url_for'] = lambda endpoint, **_: ROUTES[endpoint]
+
+async def read_body(receive):
+    body = bytearray()
+
+    while True:
+        message = await receive()
+        body   += message.get('body', b'')
+
+        if len(body) > config.max_body_bytes:
+            raise HttpError(413, f"Request body is larger than {config.max_body_bytes} bytes")
+
+        if not message.get('more_body', False):
+            return bytes(body)
+
+def request_timeout(headers):
+    """
+    The timeout asked for with an `X-Request-Timeout` header, capped at `request_timeout`.
+    """
+    value = headers.get(b'x-request-timeout')
+
+    if value is None:
+        return config.request_timeout
+
+    try:
+        timeout = float(value)
+
+    except ValueError:
+        raise HttpError(400, "X-Request-Timeout must be a number of seconds")
+
+    if not timeout > 0:
+        raise HttpError(400, "X-Request-Timeout must be positive")
+
+    return min(timeout, config.request_timeout)
+
+def json_payload(body):
+    try:
+        return json.loads(body)
+
+    except ValueError:
+        raise HttpError(400, "Request body must be JSON")
+
+def predict_rows(features):
+    if micro_batcher is not None:
+        results, _ = micro_batcher.predict(features)
+
+        return results
+
+    return predict_pipeline.predict(features)
+
+async def predict_data(method, headers, body):
+    """
+    Same behaviour as the Flask '/predictdata' route: GET renders the form, POST renders the predicted class.
+    """
+    if method == 'GET':
+        return 200, 'text/html; charset=utf-8', templates.get_template('home.html').render()
+
+    with stage("parse_form"):
+        try:
+            form = parse_qs(body.decode())
+
+        except UnicodeDecodeError:
+            raise HttpError(400, "The form must be UTF-8 encoded")
+
+        try:
+            data = CustomData(**{name: float(form[name][0]) for name in FEATURE_ALIASES})
+
+        except (KeyError, ValueError):
+            raise HttpError(400, f"The form must hold numeric {', '.join(FEATURE_ALIASES)} fields")
+
+    with stage("build_features"):
+        features = data.get_data_as_array()
+
+    logging.debug("Prediction features: %s", features)
+
+    results = await gate.run(predict_rows, features, timeout = request_timeout(headers))
+
+    return 200, 'text/html; charset=utf-8', templates.get_template('home.html').render(results = results[0])
+
+async def predict_batch(method, headers, body):
+    """
+    Same behaviour as the Flask '/predict/batch' route.
+    """
+    try:
+        with stage("build_features"):
+            features = BatchData(json_payload(body)).get_data_as_array()
+
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+    class_ids, probabilities = await gate.run(predict_pipeline.predict_batch, features, timeout = request_timeout(headers))
+
+    return 200, 'application/json', json.dumps({
+        "n_rows"        : len(class_ids),
+        "class_ids"     : class_ids.tolist(),
+        "probabilities" : np.asarray(probabilities, dtype = np.float64).round(6).tolist()
+    })
+
+async def predict_one(method, headers, body):
+    """
+    JSON API for one flower: {"sepal_length": 5.1, ...} -> {"class_id": 0, "probabilities": [...]}.
+    """
+    payload = json_payload(body)
+
+    if not isinstance(payload, dict):
+        raise HttpError(400, "Expected one record as a JSON object")
+
+    try:
+        with stage("build_features"):
+            features = BatchData([payload], max_rows = 1).get_data_as_array()
+
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+    class_ids, probabilities = await gate.run(predict_pipeline.predict_batch, features, timeout = request_timeout(headers))
+
+    return 200, 'application/json', json.dumps({
+        "class_id"      : int(class_ids[0]),
+        "probabilities" : np.asarray(probabilities[0], dtype = np.float64).round(6).tolist()
+    })
+
+async def index(method, headers, body):
+    return 200, 'text/html; charset=utf-8', templates.get_template('index.html').render()
+
+async def metrics(method, headers, body):
+    return 200, 'text/plain; version=0.0.4', instrumentation.render_metrics()
+
+# Path -> (allowed methods, handler)
+HANDLERS = {
+    '/'              : (('GET',), index),
+    '/predictdata'   : (('GET', 'POST'), predict_data),
+    '/predict'       : (('POST',), predict_one),
+    '/predict/batch' : (('POST',), predict_batch),
+    '/metrics'       : (('GET',), metrics)
+}
+
+async def send_response(send, status, content_type, body, headers = ()):
+    if isinstance(body, str):
+        body = body.encode()
+
+    await send({
+        'type'    : 'http.response.start',
+        'status'  : status,
+        'headers' : [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode()), *headers]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+
+        elif message['type'] == 'lifespan.shutdown':
+            gate.executor.shutdown(wait = False, cancel_futures = True)
+
+            await send({'type': 'lifespan.shutdown.complete'})
+
+            return
+
+async def app(scope, receive, send):
+    """
+    The ASGI application.
+    """
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    if scope['type'] != 'http':
+        return
+
+    start    = time.perf_counter()
+    route    = HANDLERS.get(scope['path'])
+    endpoint = scope['path'] if route is not None else 'unmatched'
+    headers  = dict(scope.get('headers', ()))
+    extra    = ()
+
+    try:
+        if route is None:
+            raise HttpError(404, "Not found")
+
+        methods, handler = route
+
+        if scope['method'] not in methods:
+            raise HttpError(405, f"Method {scope['method']} not allowed")
+
+        status, content_type, body = await handler(scope['method'], headers, await read_body(receive))
+
+    except HttpError as e:
+        status, content_type, body = e.status, 'application/json', json.dumps({"error": str(e)})
+
+    except Overloaded:
+        status, content_type, body = 429, 'application/json', json.dumps({"error": "Too many predictions in flight"})
+        extra = ((b'retry-after', b'1'),)
+
+    except asyncio.TimeoutError:
+        status, content_type, body = 503, 'application/json', json.dumps({"error": "Prediction timed out"})
+        extra = ((b'retry-after', b'1'),)
+
+    except Exception:
+        logging.error(f"Error serving {scope['method']} {scope['path']}", exc_info = True)
+
+        status, content_type, body = 500, 'application/json', json.dumps({"error": "Internal server error"})
+
+    await send_response(send, status, content_type, body, extra)
+
+    if instrumentation.ENABLED:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, (endpoint,))
+        REQUESTS_TOTAL.inc((endpoint, str(status)))
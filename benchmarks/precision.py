@@ -0,0 +1,97 @@
+"""
+Compares the precision modes of the NumPy engines: memory held by the weights, size of the exported file,
+single-row and batch latency through `PredictPipeline`, and accuracy on the test set.
+
+The float16 and int8 models are the ones written by `ModelExporter.initiate_quantized_export`
+(run `python -m src.components.model_exporter` after training).
+
+Usage:
+    python benchmarks/precision.py [--engines numpy fused] [--precisions float32 float16 int8] [--repeats 2000] [--storage-format csv] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from src.utils import read_table, TABLE_FORMATS
+from src.pipeline.numpy_model import NumpyModel, quantized_model_path
+from src.components.model_exporter import ModelExporterConfig
+from src.pipeline.model_registry import ModelRegistryConfig, _artifact_paths
+from src.pipeline.predict_pipeline import PredictPipeline
+
+def latency_us(function, repeats):
+    """
+    Median latency of a call in microseconds.
+    """
+    function()
+
+    timings = np.empty(repeats)
+
+    for i in range(repeats):
+        start      = time.perf_counter()
+        function()
+        timings[i] = time.perf_counter() - start
+
+    return float(np.median(timings) * 1e6)
+
+def measure(engine, precision, X_test, y_test, repeats):
+    """
+    Benchmarks one engine in one precision.
+
+    Returns:
+        dict: Weight bytes, file bytes, single-row and 1024-row latency, and test accuracy.
+    """
+    registry_config = ModelRegistryConfig(engine = engine, precision = precision)
+    model_path      = _artifact_paths(registry_config)[0]
+    pipeline        = PredictPipeline(engine = engine, precision = precision)
+    batch           = np.ascontiguousarray(np.resize(X_test, (1024, X_test.shape[1])))
+    class_ids, _    = pipeline.predict_batch(X_test)
+
+    return {
+        "weight_bytes"   : NumpyModel.load(model_path).nbytes,
+        "file_bytes"     : os.path.getsize(model_path),
+        "single_row_us"  : latency_us(lambda: pipeline.predict(X_test[:1]), repeats),
+        "batch_1024_us"  : latency_us(lambda: pipeline.predict_batch(batch), max(1, repeats // 10)),
+        "accuracy"       : float(np.mean(class_ids == y_test))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description = "Memory, latency and accuracy of the float32, float16 and int8 models")
+    parser.add_argument("--engines", nargs = "+", default = ["numpy", "fused"], choices = ["numpy", "fused"])
+    parser.add_argument("--precisions", nargs = "+", default = ["float32", "float16", "int8"])
+    parser.add_argument("--repeats", type = int, default = 2000, help = "timed single-row predictions; a tenth as many batches")
+    parser.add_argument("--storage-format", default = "csv", choices = TABLE_FORMATS, help = "format of the ingested test split to evaluate on")
+    parser.add_argument("--json", help = "optional path of a JSON file to write the results to")
+    args = parser.parse_args()
+
+    X_test, y_test, _ = read_table(ModelExporterConfig(storage_format = args.storage_format).quantization_data_paths()[1])
+    results           = {}
+
+    print(f"{'engine':<8}{'precision':<11}{'weights B':>10}{'file B':>8}{'1 row us':>10}{'1024 rows us':>14}{'accuracy':>10}")
+
+    for engine in args.engines:
+        for precision in args.precisions:
+            base_path = ModelRegistryConfig.numpy_model_file_path if engine == "numpy" else ModelRegistryConfig.fused_model_file_path
+
+            if not os.path.exists(quantized_model_path(base_path, precision)):
+                print(f"{engine:<8}{precision:<11} not exported")
+                continue
+
+            result = results.setdefault(engine, {})[precision] = measure(engine, precision, X_test, y_test, args.repeats)
+
+            print(f"{engine:<8}{precision:<11}{result['weight_bytes']:>10}{result['file_bytes']:>8}{result['single_row_us']:>10.1f}"
+                  f"{result['batch_1024_us']:>14.1f}{result['accuracy']:>10.4f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent = 2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Replays a request log through `PredictPipeline` one request at a time, with and without the prediction
+cache, and reports latency percentiles and the cache hit rate.
+
+The request log is a CSV file with the four feature columns (e.g. `artifacts/test.csv`); by default a log is
+synthesized by drawing rows of `artifacts/data.csv` with a skewed (Zipf-like) popularity, which mimics the
+heavy repetition of 0.1 cm resolution measurements.
+
+Usage:
+    python benchmarks/prediction_cache.py [--log requests.csv] [--requests 5000] [--engine keras] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from src.pipeline.model_registry import ModelRegistryConfig, ModelRegistry, ENGINES
+from src.pipeline.prediction_cache import PredictionCache, PredictionCacheConfig
+from src.pipeline.predict_pipeline import PredictPipeline, FEATURE_COLUMNS
+
+def synthesize_log(n_requests, seed = 0):
+    rows    = pd.read_csv(os.path.join("artifacts", "data.csv"))[FEATURE_COLUMNS].to_numpy(dtype = np.float32)
+    rng     = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(rows) + 1)
+
+    return rows[rng.choice(len(rows), size = n_requests, p = weights / weights.sum())]
+
+def replay(pipeline, requests):
+    latencies = np.empty(len(requests))
+
+    for i, row in enumerate(requests):
+        start = time.perf_counter()
+        pipeline.predict(row[None, :])
+        latencies[i] = time.perf_counter() - start
+
+    return {
+        "p50_ms"     : float(np.percentile(latencies, 50) * 1000),
+        "p95_ms"     : float(np.percentile(latencies, 95) * 1000),
+        "p99_ms"     : float(np.percentile(latencies, 99) * 1000),
+        "mean_ms"    : float(latencies.mean() * 1000),
+        "total_s"    : float(latencies.sum())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description = "Latency of the prediction cache on a replayed request log")
+    parser.add_argument("--log", help = "CSV file of requests with the feature columns")
+    parser.add_argument("--requests", type = int, default = 5000, help = "number of synthesized requests when no log is given")
+    parser.add_argument("--engine", default = "keras", choices = ENGINES)
+    parser.add_argument("--precision", type = int, default = 1)
+    parser.add_argument("--json", help = "optional path of a JSON file to write the results to")
+    args = parser.parse_args()
+
+    if args.log:
+        requests = pd.read_csv(args.log)[FEATURE_COLUMNS].to_numpy(dtype = np.float32)
+
+    else:
+        requests = synthesize_log(args.requests)
+
+    registry = ModelRegistry(ModelRegistryConfig(engine = args.engine))
+    cache    = PredictionCache(PredictionCacheConfig(precision = args.precision))
+
+    uncached = PredictPipeline(registry = registry)
+    cached   = PredictPipeline(registry = registry, cache = cache)
+
+    uncached.warm_up()
+
+    results = {
+        "engine"   : args.engine,
+        "requests" : len(requests),
+        "uncached" : replay(uncached, requests),
+        "cached"   : replay(cached, requests),
+        "cache"    : cache.get_stats()
+    }
+
+    for name in ("uncached", "cached"):
+        r = results[name]
+        print(f"{name:<9} p50 {r['p50_ms']:8.3f} ms   p95 {r['p95_ms']:8.3f} ms   p99 {r['p99_ms']:8.3f} ms   total {r['total_s']:7.2f} s")
+
+    print(f"hit rate {results['cache']['hit_rate']:.1%} over {len(requests)} requests, "
+          f"speed-up {results['uncached']['total_s'] / results['cached']['total_s']:.1f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent = 2)
+
+if __name__ == "__main__":
+    main()
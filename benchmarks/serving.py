@@ -0,0 +1,251 @@
+"""
+Latency and throughput benchmark of the serving path, runnable offline.
+
+For every model engine it measures:
+    - cold load: artifact loading and first prediction in a fresh interpreter (see startup_time.py),
+    - warm load: reloading the artifacts in a process where everything is already imported,
+    - single-row prediction latency (p50/p95/p99) and rows/sec,
+    - batched prediction for several batch sizes,
+    - concurrent single-row prediction from several worker threads,
+    - end-to-end Flask requests to /predictdata and /predict/batch through the test client.
+
+Results are written as JSON together with the git commit, so runs can be compared across commits:
+
+    python benchmarks/serving.py --json results/HEAD.json
+    python benchmarks/serving.py --json results/new.json --compare results/HEAD.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import threading
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from benchmarks.startup_time import measure as measure_cold_start
+from src.pipeline.model_registry import ModelRegistry, ModelRegistryConfig, ENGINES
+from src.pipeline.predict_pipeline import PredictPipeline, FEATURE_COLUMNS
+
+def summarize(latencies, rows_per_call = 1):
+    """
+    Latency percentiles in milliseconds and throughput in rows/sec of a list of call durations in seconds.
+    """
+    latencies = np.asarray(latencies)
+
+    return {
+        "calls"        : int(len(latencies)),
+        "p50_ms"       : float(np.percentile(latencies, 50) * 1000),
+        "p95_ms"       : float(np.percentile(latencies, 95) * 1000),
+        "p99_ms"       : float(np.percentile(latencies, 99) * 1000),
+        "mean_ms"      : float(latencies.mean() * 1000),
+        "rows_per_sec" : float(rows_per_call * len(latencies) / latencies.sum())
+    }
+
+def timed_calls(function, arguments):
+    latencies = []
+
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        latencies.append(time.perf_counter() - start)
+
+    return latencies
+
+def bench_warm_load(engine, repeats):
+    latencies = []
+
+    for _ in range(repeats):
+        registry = ModelRegistry(ModelRegistryConfig(engine = engine))
+
+        start = time.perf_counter()
+        registry.get()
+        latencies.append(time.perf_counter() - start)
+
+    return summarize(latencies)
+
+def bench_single_row(pipeline, rows, iterations):
+    return summarize(timed_calls(pipeline.predict_batch, [rows[i % len(rows)][None, :] for i in range(iterations)]))
+
+def bench_batched(pipeline, rows, batch_sizes, iterations):
+    results = {}
+
+    for batch_size in batch_sizes:
+        batch = rows[np.arange(batch_size) % len(rows)]
+
+        results[str(batch_size)] = summarize(timed_calls(lambda b: pipeline.predict_batch(b, batch_size = batch_size), [batch] * iterations), batch_size)
+
+    return results
+
+def bench_concurrency(pipeline, rows, worker_counts, iterations):
+    """
+    Every worker thread sends `iterations` single-row predictions; reports the latency seen by the callers
+    and the aggregate throughput.
+    """
+    results = {}
+
+    for workers in worker_counts:
+        latencies = [[] for _ in range(workers)]
+
+        def run(k):
+            latencies[k] = timed_calls(pipeline.predict_batch, [rows[(k + i) % len(rows)][None, :] for i in range(iterations)])
+
+        threads = [threading.Thread(target = run, args = (k,)) for k in range(workers)]
+        start   = time.perf_counter()
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        wall    = time.perf_counter() - start
+        summary = summarize([latency for worker in latencies for latency in worker])
+
+        summary["rows_per_sec"] = workers * iterations / wall
+        results[str(workers)]   = summary
+
+    return results
+
+def bench_flask(engine, rows, iterations, batch_size):
+    import app as app_module
+
+    app_module.predict_pipeline = PredictPipeline(engine = engine)
+    client = app_module.app.test_client()
+
+    forms = [dict(zip(["sepal_length", "sepal_width", "petal_length", "petal_width"], rows[i % len(rows)].tolist())) for i in range(iterations)]
+    batch = rows[np.arange(batch_size) % len(rows)].tolist()
+
+    def post_form(form):
+        assert client.post("/predictdata", data = form).status_code == 200
+
+    def post_batch(payload):
+        assert client.post("/predict/batch", json = payload).status_code == 200
+
+    post_form(forms[0])
+
+    return {
+        "predictdata"   : summarize(timed_calls(post_form, forms)),
+        "predict_batch" : summarize(timed_calls(post_batch, [batch] * max(1, iterations // 10)), batch_size)
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd = ROOT, capture_output = True, text = True, check = True).stdout.strip()
+
+    except Exception:
+        return None
+
+def compare(results, baseline, threshold):
+    """
+    Prints the relative change of every p50 latency and throughput against a baseline run.
+
+    Returns:
+        list: The metrics that regressed by more than `threshold` (a fraction).
+    """
+    regressions = []
+
+    def walk(current, previous, path):
+        for key, value in current.items():
+            if key not in previous:
+                continue
+
+            if isinstance(value, dict):
+                walk(value, previous[key], path + [key])
+
+            elif key in ("p50_ms", "rows_per_sec") and previous[key]:
+                change = (value - previous[key]) / previous[key]
+                worse  = change > threshold if key == "p50_ms" else change < -threshold
+                name   = "/".join(path + [key])
+
+                print(f"  {name:<60} {previous[key]:12.3f} -> {value:12.3f}  {change:+7.1%}{'  REGRESSION' if worse else ''}")
+
+                if worse:
+                    regressions.append(name)
+
+    walk(results["engines"], baseline.get("engines", {}), [])
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description = "Latency/throughput benchmark of the serving path")
+    parser.add_argument("--engines", nargs = "+", default = list(ENGINES), choices = ENGINES)
+    parser.add_argument("--iterations", type = int, default = 200, help = "calls per single-row measurement")
+    parser.add_argument("--batch-sizes", nargs = "+", type = int, default = [1, 16, 256, 4096])
+    parser.add_argument("--workers", nargs = "+", type = int, default = [1, 2, 4, 8])
+    parser.add_argument("--quick", action = "store_true", help = "fewer iterations and no cold-start subprocesses")
+    parser.add_argument("--json", help = "path of the JSON file to write the results to")
+    parser.add_argument("--compare", help = "JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type = float, default = 0.10, help = "relative change reported as a regression")
+    args = parser.parse_args()
+
+    iterations = 30 if args.quick else args.iterations
+    rows       = pd.read_csv(os.path.join("artifacts", "test.csv"))[FEATURE_COLUMNS].to_numpy(dtype = np.float32)
+
+    results = {
+        "commit"    : git_commit(),
+        "timestamp" : datetime.now(timezone.utc).isoformat(),
+        "machine"   : {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(), "cpus": os.cpu_count()},
+        "settings"  : {"iterations": iterations, "batch_sizes": args.batch_sizes, "workers": args.workers},
+        "engines"   : {}
+    }
+
+    for engine in args.engines:
+        print(f"[{engine}]")
+
+        pipeline = PredictPipeline(registry = ModelRegistry(ModelRegistryConfig(engine = engine)))
+        pipeline.warm_up()
+
+        engine_results = {}
+
+        if not args.quick:
+            cold = measure_cold_start(engine)
+            engine_results["cold_load"] = {"load_ms": cold["load artifacts"] * 1000, "first_prediction_ms": cold["first prediction"] * 1000}
+
+        engine_results["warm_load"]   = bench_warm_load(engine, 3 if args.quick else 10)
+        engine_results["single_row"]  = bench_single_row(pipeline, rows, iterations)
+        engine_results["batched"]     = bench_batched(pipeline, rows, args.batch_sizes, max(3, iterations // 10))
+        engine_results["concurrency"] = bench_concurrency(pipeline, rows, args.workers, max(5, iterations // 4))
+        engine_results["flask"]       = bench_flask(engine, rows, iterations, max(args.batch_sizes))
+
+        single = engine_results["single_row"]
+        print(f"  single row   p50 {single['p50_ms']:9.3f} ms  p99 {single['p99_ms']:9.3f} ms  {single['rows_per_sec']:12.0f} rows/sec")
+
+        for batch_size, batched in engine_results["batched"].items():
+            print(f"  batch {batch_size:>6} p50 {batched['p50_ms']:9.3f} ms  {batched['rows_per_sec']:12.0f} rows/sec")
+
+        for workers, concurrent in engine_results["concurrency"].items():
+            print(f"  {workers:>2} workers   p50 {concurrent['p50_ms']:9.3f} ms  {concurrent['rows_per_sec']:12.0f} rows/sec")
+
+        flask = engine_results["flask"]
+        print(f"  flask form   p50 {flask['predictdata']['p50_ms']:9.3f} ms   batch p50 {flask['predict_batch']['p50_ms']:9.3f} ms")
+
+        results["engines"][engine] = engine_results
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok = True)
+
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent = 2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        print(f"\nComparison against {baseline.get('commit')}:")
+
+        regressions = compare(results, baseline, args.threshold)
+
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
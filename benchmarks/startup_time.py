@@ -0,0 +1,95 @@
+"""
+Measures the cold start of the serving path: import time of each module on the way to `app.py`,
+artifact loading, and time-to-first-prediction, for every model engine.
+
+Every engine is measured in a fresh interpreter, so nothing is warm from a previous run.
+
+Usage:
+    python benchmarks/startup_time.py [--engines keras numpy fused bundle] [--repeat 3] [--json results.json]
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter; prints one JSON object with the duration of each stage in seconds.
+STAGES_SCRIPT = r"""
+import json, os, sys, time
+
+timings = {}
+start   = time.perf_counter()
+
+def stage(name, t0):
+    timings[name] = time.perf_counter() - t0
+    return time.perf_counter()
+
+t = time.perf_counter()
+import numpy
+t = stage("import numpy", t)
+import src.pipeline.predict_pipeline
+t = stage("import predict_pipeline", t)
+import app
+t = stage("import app", t)
+artifacts = app.predict_pipeline.registry.get()
+t = stage("load artifacts", t)
+features = numpy.array([[5.1, 3.5, 1.4, 0.2]], dtype = numpy.float32)
+app.predict_pipeline.predict(features)
+t = stage("first prediction", t)
+app.predict_pipeline.predict(features)
+t = stage("second prediction", t)
+
+timings["time to first prediction"] = timings["import numpy"] + timings["import predict_pipeline"] + timings["import app"] + timings["load artifacts"] + timings["first prediction"]
+timings["modules loaded"]           = sorted(m for m in ("pandas", "sklearn", "tensorflow", "keras") if m in sys.modules)
+
+print(json.dumps(timings))
+"""
+
+def measure(engine):
+    """
+    Runs the stage script for one engine in a fresh interpreter.
+
+    Args:
+        engine (str): The model engine to serve.
+
+    Returns:
+        dict: Duration of each stage in seconds and the heavy modules that ended up imported.
+    """
+    env = dict(os.environ, IRIS_MODEL_ENGINE = engine, IRIS_WARM_UP = "0", PYTHONPATH = ROOT, TF_CPP_MIN_LOG_LEVEL = "3")
+
+    output = subprocess.run([sys.executable, "-c", STAGES_SCRIPT], cwd = ROOT, env = env, capture_output = True, text = True, check = True)
+
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description = "Cold-start benchmark of the serving path")
+    parser.add_argument("--engines", nargs = "+", default = ["keras", "numpy", "fused", "bundle"])
+    parser.add_argument("--repeat", type = int, default = 3, help = "fresh interpreters per engine; the median is reported")
+    parser.add_argument("--json", help = "optional path of a JSON file to write the results to")
+    args = parser.parse_args()
+
+    results = {}
+
+    for engine in args.engines:
+        runs    = [measure(engine) for _ in range(args.repeat)]
+        summary = {}
+
+        for name, value in runs[0].items():
+            summary[name] = sorted(run[name] for run in runs)[len(runs) // 2] if isinstance(value, float) else value
+
+        results[engine] = summary
+
+        print(f"\n[{engine}] modules loaded: {', '.join(summary['modules loaded']) or 'none'}")
+
+        for name, value in summary.items():
+            if isinstance(value, float):
+                print(f"  {name:<26} {value * 1000:10.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent = 2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Production serving configuration:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master process and the workers are forked from it. With the NumPy engines
+("numpy", "fused" and "bundle") the model is also loaded and warmed up in the master, so every worker shares the
+same weight pages copy-on-write instead of holding its own copy; the "bundle" weights are memory-mapped, so
+they are even shared with any other process mapping the same files. TensorFlow's thread pools do not survive fork(),
+so with the "keras" engine each worker loads the model itself right after it is forked.
+
+Environment variables:
+    PORT                     Port to bind (default 5000).
+    WEB_CONCURRENCY          Number of worker processes (default: number of CPUs).
+    IRIS_THREADS             Request threads per worker (default 1).
+    IRIS_INTRA_OP_THREADS    Threads each worker may use inside TF/BLAS kernels (default 1).
+    IRIS_MODEL_ENGINE        "keras", "numpy", "fused" or "bundle" (default "keras").
+    IRIS_MODEL_PRECISION     "float32", "float16" or "int8" weights for the numpy and fused engines (default "float32").
+"""
+import gc
+import os
+import multiprocessing
+
+bind    = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("IRIS_THREADS", 1))
+
+preload_app = True
+timeout     = int(os.environ.get("IRIS_WORKER_TIMEOUT", 30))
+
+# Pin intra-op parallelism before numpy/TensorFlow are imported, so N workers do not each start
+# one thread per core and oversubscribe the machine.
+intra_op_threads = os.environ.get("IRIS_INTRA_OP_THREADS", "1")
+
+for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+    os.environ.setdefault(variable, intra_op_threads)
+
+os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+
+engine = os.environ.get("IRIS_MODEL_ENGINE", "keras")
+
+# Warm the NumPy engines up while the master imports the app (see app.warm_up)
+if engine != "keras":
+    os.environ.setdefault("IRIS_WARM_UP", "1")
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the garbage collector's generations, so collections in
+    # the workers do not write to (and un-share) the pages holding the preloaded model.
+    gc.freeze()
+
+def post_fork(server, worker):
+    if engine == "keras":
+        import app
+
+        app.warm_up()
@@ -6,10 +6,7 @@ from sklearn.datasets import load_iris
 from dataclasses import dataclass
 from src.exception import CustomException
 from src.logger import logging
-from src.components.data_transformation import DataTransformation
-from src.components.data_transformation import DataTransformationConfig
-from src.components.model_trainer import ModelTrainerConfig
-from src.components.model_trainer import ModelTrainer
+from src.utils import save_object, save_table, table_path, TableWriter
 
 @dataclass
 class DataIngestionConfig:
@@ -22,10 +19,88 @@ class DataIngestionConfig:
         train_data_path (str): File path for the training data CSV.
         test_data_path (str): File path for the test data CSV.
         raw_data_path (str): File path for the raw data CSV.
+        increment_data_path (str): File path for the training rows added by the last incremental ingestion.
+        storage_format (str): Format of the saved datasets: "csv", "npy" (a memory-mappable float32 table
+                              with a schema, see `save_table`) or "parquet".
+        test_size (float): Fraction of the rows put in the test set.
+        chunk_size (int): Number of rows read and written at a time by the streaming ingestion.
     """
     train_data_path: str = os.path.join('artifacts', 'train.csv')
     test_data_path: str = os.path.join('artifacts', 'test.csv')
     raw_data_path: str = os.path.join('artifacts', 'data.csv')
+    increment_data_path: str = os.path.join('artifacts', 'train_increment.csv')
+    storage_format: str = 'csv'
+    test_size: float = 0.2
+    chunk_size: int = 100000
+
+    def split_paths(self):
+        """
+        Returns the raw, training and test dataset paths in the configured storage format.
+        """
+        return tuple(table_path(path, self.storage_format) for path in (self.raw_data_path, self.train_data_path, self.test_data_path))
+
+# Resolution of the hash-based split: a row goes to the test set when its hash modulo this is below test_size times it
+SPLIT_BUCKETS = 1000000
+
+def split_mask(chunk, test_size):
+    """
+    Deterministic train/test assignment of rows from a hash of their content: the same row lands in the same
+    split in every run and whatever chunk it is read in, so duplicated rows cannot leak across the split.
+
+    Args:
+        chunk (pd.DataFrame): The rows.
+        test_size (float): Expected fraction of test rows.
+
+    Returns:
+        np.ndarray: True for the test rows.
+    """
+    hashes = pd.util.hash_pandas_object(chunk, index = False).to_numpy()
+
+    return hashes % SPLIT_BUCKETS < int(test_size * SPLIT_BUCKETS)
+
+class _ChunkWriter:
+    """
+    Appends chunks of rows to a dataset in one of the storage formats.
+    """
+    def __init__(self, path, storage_format, columns):
+        self.path           = path
+        self.storage_format = storage_format
+        self.columns        = columns
+        self.rows           = 0
+        self._writer        = None
+
+        if storage_format == 'npy':
+            self._writer = TableWriter(path, columns[:-1], columns[-1])
+
+    def write(self, chunk):
+        if self.storage_format == 'csv':
+            chunk.to_csv(self.path, mode = 'w' if self.rows == 0 else 'a', index = False, header = self.rows == 0)
+
+        elif self.storage_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index = False)
+
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+
+            self._writer.write_table(table)
+
+        else:
+            self._writer.write(chunk[self.columns[:-1]].to_numpy(), chunk[self.columns[-1]].to_numpy())
+
+        self.rows += len(chunk)
+
+    def close(self):
+        if self.rows == 0 and self.storage_format == 'csv':
+            pd.DataFrame(columns = self.columns).to_csv(self.path, index = False)
+
+        elif self.rows == 0 and self.storage_format == 'parquet':
+            pd.DataFrame(columns = self.columns).astype({column: 'float32' for column in self.columns[:-1]}).to_parquet(self.path, index = False)
+
+        elif self._writer is not None:
+            self._writer.close()
 
 class DataIngestion:
     """
@@ -34,10 +109,30 @@ class DataIngestion:
 
     Methods:
         initiate_data_ingestion: Loads a dataset (Iris dataset in this case), splits it 
-                                 into train and test sets, and saves them to CSV files.
+                                 into train and test sets, and saves them in the configured storage format.
+        initiate_streaming_ingestion: Streams a dataset of any size from a `DataSource`, splitting, 
+                                      saving and computing the scaler statistics chunk by chunk.
+        initiate_incremental_ingestion: Splits newly labeled rows and appends them to the 
+                                        existing raw, train and test CSV files.
     """
-    def __init__(self):
-        self.ingestion_config = DataIngestionConfig()
+    def __init__(self, ingestion_config = None):
+        self.ingestion_config = ingestion_config or DataIngestionConfig()
+
+    def _save_split(self, df, path):
+        """
+        Saves a dataset in the configured storage format, with float32 features in the binary formats.
+        """
+        storage_format = self.ingestion_config.storage_format
+        feature_names  = [column for column in df.columns if column != 'target']
+
+        if storage_format == 'csv':
+            df.to_csv(path, index = False, header = True)
+
+        elif storage_format == 'parquet':
+            df.astype({column: 'float32' for column in feature_names}).to_parquet(path, index = False)
+
+        else:
+            save_table(path, df[feature_names].to_numpy(dtype = 'float32'), df['target'].to_numpy(), feature_names)
 
     def initiate_data_ingestion(self):
         """
@@ -59,34 +154,171 @@ class DataIngestion:
             
             logging.info("Read dataset as a dataframe")
 
-            os.makedirs(os.path.dirname(self.ingestion_config.train_data_path), exist_ok = True)
+            raw_data_path, train_data_path, test_data_path = self.ingestion_config.split_paths()
+
+            os.makedirs(os.path.dirname(train_data_path), exist_ok = True)
 
-            df.to_csv(self.ingestion_config.raw_data_path, index = False, header = True)
+            self._save_split(df, raw_data_path)
 
             logging.info("Train test split initiated")
 
-            train_set, test_set = train_test_split(df, test_size = 0.2, random_state = 42, shuffle = True)
+            train_set, test_set = train_test_split(df, test_size = self.ingestion_config.test_size, random_state = 42, shuffle = True)
 
-            train_set.to_csv(self.ingestion_config.train_data_path, index = False, header = True)
-            test_set.to_csv(self.ingestion_config.test_data_path, index = False, header = True)
+            self._save_split(train_set, train_data_path)
+            self._save_split(test_set, test_data_path)
 
-            logging.info("Ingestion of data is completed")
+            logging.info(f"Ingestion of data is completed ({self.ingestion_config.storage_format})")
 
             return (
-                self.ingestion_config.train_data_path, 
-                self.ingestion_config.test_data_path
+                train_data_path, 
+                test_data_path
             )
 
         except Exception as e:
             logging.error("Error in data ingestion", exc_info = True)
             raise e
+
+    def initiate_streaming_ingestion(self, source = "iris"):
+        """
+        Ingests a dataset too large for memory in a single pass. Every chunk read from the source is split with
+        `split_mask`, appended to the raw, training and test datasets, and its training rows update the scaler
+        statistics with `partial_fit`. Memory use depends on `chunk_size`, not on the size of the dataset.
+
+        The fitted preprocessor is saved where `DataTransformation` saves it, so the data does not need to be
+        read again to fit the scaler.
+
+        Args:
+            source (str or DataSource): "iris", the path of a CSV or Parquet file, or a `DataSource`.
+
+        Returns:
+            tuple: Paths to the saved training and test datasets and to the fitted preprocessor.
+        """
+        logging.info(f"Entered the streaming data ingestion of {source}")
+
+        try:
+            from src.components.data_sources import get_source
+            from src.components.data_transformation import DataTransformation, DataTransformationConfig
+
+            config  = self.ingestion_config
+            source  = get_source(source)
+            columns = source.columns
+            paths   = config.split_paths()
+
+            os.makedirs(os.path.dirname(paths[1]), exist_ok = True)
+
+            writers      = [_ChunkWriter(path, config.storage_format, columns) for path in paths]
+            preprocessor = DataTransformation().get_data_transformer_obg()
+            fitted       = False
+
+            for chunk in source.iter_chunks(config.chunk_size):
+                test_rows = split_mask(chunk, config.test_size)
+                train_set = chunk[~test_rows]
+
+                for writer, rows in zip(writers, (chunk, train_set, chunk[test_rows])):
+                    writer.write(rows)
+
+                if len(train_set) and not fitted:
+                    preprocessor.fit(train_set[columns[:-1]])
+                    fitted = True
+
+                elif len(train_set):
+                    preprocessor.named_transformers_['scaler'].partial_fit(train_set[columns[:-1]])
+
+            for writer in writers:
+                writer.close()
+
+            if not fitted:
+                raise ValueError(f"No training rows were read from {source.__class__.__name__}")
+
+            save_object(
+                file_path = DataTransformationConfig.preprocessor_obj_file_path,
+                obj = preprocessor
+            )
+
+            logging.info(f"Streamed {writers[0].rows} rows: {writers[1].rows} training and {writers[2].rows} test rows ({config.storage_format})")
+
+            return (
+                paths[1],
+                paths[2],
+                DataTransformationConfig.preprocessor_obj_file_path
+            )
+
+        except Exception as e:
+            logging.error("Error in streaming data ingestion", exc_info = True)
+            raise e
+
+    def initiate_incremental_ingestion(self, new_data_path):
+        """
+        Appends newly labeled rows to the existing datasets instead of rebuilding them.
+        The new rows are split with the same ratio and seed as the full dataset, appended to the raw, 
+        training and test CSV files, and the new training rows are also saved on their own so the 
+        scaler statistics can be updated from them alone.
+
+        Args:
+            new_data_path (str): CSV file with the feature columns and a 'target' column.
+
+        Returns:
+            tuple: Paths to the training and test datasets and to the new training rows.
+        """
+        logging.info(f"Entered incremental data ingestion of {new_data_path}")
+
+        try:
+            from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+
+            if self.ingestion_config.storage_format != 'csv':
+                raise ValueError("Incremental ingestion appends to CSV datasets; use storage_format='csv'")
+
+            columns = FEATURE_COLUMNS + ['target']
+            new_df  = pd.read_csv(new_data_path)
+
+            missing = [column for column in columns if column not in new_df.columns]
+
+            if missing:
+                raise ValueError(f"{new_data_path} is missing the columns {missing}")
+
+            new_df = new_df[columns]
+
+            if len(new_df) >= 5:
+                train_set, test_set = train_test_split(new_df, test_size = self.ingestion_config.test_size, random_state = 42, shuffle = True)
+
+            else:
+                train_set, test_set = new_df, new_df.iloc[:0]
+
+            for df, path in ((new_df, self.ingestion_config.raw_data_path),
+                             (train_set, self.ingestion_config.train_data_path),
+                             (test_set, self.ingestion_config.test_data_path)):
+                df.to_csv(path, mode = 'a', index = False, header = not os.path.exists(path))
+
+            train_set.to_csv(self.ingestion_config.increment_data_path, index = False, header = True)
+
+            logging.info(f"Appended {len(train_set)} training and {len(test_set)} test rows")
+
+            return (
+                self.ingestion_config.train_data_path, 
+                self.ingestion_config.test_data_path,
+                self.ingestion_config.increment_data_path
+            )
+
+        except Exception as e:
+            logging.error("Error in incremental data ingestion", exc_info = True)
+            raise e
         
 if __name__ == "__main__":
+    from src.components.data_transformation import DataTransformation
+    from src.components.model_trainer import ModelTrainer
+
     obj = DataIngestion()
-    train_data, test_data = obj.initiate_data_ingestion()
 
     data_transformation = DataTransformation()
-    train_arr, test_arr, _ = data_transformation.initiate_data_transformation(train_data, test_data)
+
+    if len(sys.argv) > 1:
+        # The scaler was fitted during the streaming pass; the datasets are transformed chunk by chunk with it
+        train_data, test_data, _ = obj.initiate_streaming_ingestion(sys.argv[1])
+        train_arr, test_arr, _   = data_transformation.initiate_streaming_transformation(train_data, test_data, obj.ingestion_config.chunk_size)
+
+    else:
+        train_data, test_data  = obj.initiate_data_ingestion()
+        train_arr, test_arr, _ = data_transformation.initiate_data_transformation(train_data, test_data)
 
     model_trainer = ModelTrainer()
     print(model_trainer.initiate_model_trainer(train_arr, test_arr))
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+
+class DataSource(ABC):
+    """
+    Interface of the datasets `DataIngestion` can stream from. A source yields DataFrames of at most
+    `chunk_size` rows holding the feature columns and the 'target' column, so it is never read whole.
+
+    Attributes:
+        columns (list): The feature columns followed by 'target'.
+    """
+    def __init__(self):
+        from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+
+        self.columns = FEATURE_COLUMNS + ['target']
+
+    @abstractmethod
+    def iter_chunks(self, chunk_size):
+        """
+        Yields the rows of the source in order.
+
+        Args:
+            chunk_size (int): Maximum number of rows per chunk.
+
+        Yields:
+            pd.DataFrame: The next rows, with float32 features.
+        """
+
+    def _typed(self, chunk):
+        return chunk[self.columns].astype({column: np.float32 for column in self.columns[:-1]})
+
+class IrisSource(DataSource):
+    """
+    The scikit-learn copy of the Iris dataset, which the project was built on.
+    """
+    def iter_chunks(self, chunk_size):
+        from sklearn.datasets import load_iris
+
+        iris = load_iris()
+        df   = pd.DataFrame(iris['data'], columns = self.columns[:-1]).assign(target = iris['target'])
+
+        for start in range(0, len(df), chunk_size):
+            yield self._typed(df.iloc[start:start + chunk_size])
+
+class CsvSource(DataSource):
+    """
+    A CSV file with a header row, parsed chunk by chunk.
+
+    Attributes:
+        path (str): Path of the file.
+    """
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def iter_chunks(self, chunk_size):
+        header  = pd.read_csv(self.path, nrows = 0).columns
+        missing = [column for column in self.columns if column not in header]
+
+        if missing:
+            raise ValueError(f"{self.path} is missing the columns {missing}")
+
+        reader = pd.read_csv(
+            self.path,
+            usecols   = self.columns,
+            dtype     = {column: np.float32 for column in self.columns[:-1]},
+            chunksize = chunk_size
+        )
+
+        for chunk in reader:
+            yield self._typed(chunk)
+
+class ParquetSource(DataSource):
+    """
+    A Parquet file, read one record batch at a time with `pyarrow`.
+
+    Attributes:
+        path (str): Path of the file.
+    """
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def iter_chunks(self, chunk_size):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(self.path)
+        missing      = [column for column in self.columns if column not in parquet_file.schema_arrow.names]
+
+        if missing:
+            raise ValueError(f"{self.path} is missing the columns {missing}")
+
+        for batch in parquet_file.iter_batches(batch_size = chunk_size, columns = self.columns):
+            yield self._typed(batch.to_pandas())
+
+def get_source(spec):
+    """
+    Returns the source for a specification: "iris", or the path of a CSV or Parquet file.
+
+    Args:
+        spec (str or DataSource): The specification; sources are returned unchanged.
+
+    Returns:
+        DataSource: The source.
+    """
+    if isinstance(spec, DataSource):
+        return spec
+
+    if spec == "iris":
+        return IrisSource()
+
+    if not os.path.exists(spec):
+        raise FileNotFoundError(f"No data source at {spec}")
+
+    return ParquetSource(spec) if spec.endswith(".parquet") else CsvSource(spec)
@@ -2,13 +2,9 @@ import sys
 import os
 from dataclasses import dataclass
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import save_object
+from src.utils import save_object, load_object, read_table
 
 @dataclass
 class DataTransformationConfig:
@@ -18,8 +14,65 @@ class DataTransformationConfig:
     
     Attributes:
         preprocessor_obj_file_path (str): Path where the preprocessor object will be saved after transformation setup.
+        train_array_path (str): Path where the transformed training array (float32 features and labels) is saved.
+        test_array_path (str): Path where the transformed testing array is saved.
     """
     preprocessor_obj_file_path = os.path.join("artifacts", "preprocessor.pkl")
+    train_array_path           = os.path.join("artifacts", "train_arr.npy")
+    test_array_path            = os.path.join("artifacts", "test_arr.npy")
+
+def _with_labels(X_scaled, y):
+    """
+    Builds the float32 array handed to the model trainer, features followed by the label column, in one allocation.
+    """
+    arr = np.empty((len(X_scaled), X_scaled.shape[1] + 1), dtype = np.float32)
+
+    arr[:, :-1] = X_scaled
+    arr[:, -1]  = y
+
+    return arr
+
+def _iter_chunks(file_path, chunk_size):
+    """
+    Yields the features, labels and feature names of a dataset in any of `TABLE_FORMATS`, `chunk_size` rows at a time.
+    """
+    if os.path.isdir(file_path):
+        X, y, feature_names = read_table(file_path)
+
+        for start in range(0, len(y), chunk_size):
+            yield X[start:start + chunk_size], y[start:start + chunk_size], feature_names
+
+        return
+
+    from src.components.data_sources import get_source
+
+    source        = get_source(file_path)
+    feature_names = source.columns[:-1]
+
+    for chunk in source.iter_chunks(chunk_size):
+        yield chunk[feature_names].to_numpy(dtype = np.float32), chunk[source.columns[-1]].to_numpy(), feature_names
+
+def _save_array_chunks(file_path, chunks, width):
+    """
+    Writes float32 matrices of `width` columns to one `.npy` file as they come. The header is written for zero rows
+    and rewritten in place with the final row count, as its length does not depend on it.
+    """
+    header = lambda rows: {"descr": np.dtype(np.float32).str, "fortran_order": False, "shape": (rows, width)}
+    rows   = 0
+
+    with open(file_path + ".tmp", "wb") as f:
+        np.lib.format.write_array_header_1_0(f, header(0))
+
+        for chunk in chunks:
+            f.write(np.ascontiguousarray(chunk, dtype = np.float32).tobytes())
+            rows += len(chunk)
+
+        f.seek(0)
+        np.lib.format.write_array_header_1_0(f, header(rows))
+
+    os.replace(file_path + ".tmp", file_path)
+
+    return rows
 
 class DataTransformation:
     """
@@ -42,6 +95,9 @@ class DataTransformation:
             ColumnTransformer: Configured preprocessor for data transformation.
         """
         try:
+            from sklearn.preprocessing import StandardScaler
+            from sklearn.compose import ColumnTransformer
+
             num_cols = ['sepal length (cm)', 'sepal width (cm)', 'petal length (cm)', 'petal width (cm)']
 
             preprocessor = ColumnTransformer([
@@ -56,12 +112,24 @@ class DataTransformation:
             logging.error("Error in data transformation", exc_info = True)
             raise e
         
+    def _save_arrays(self, train_arr, test_arr):
+        """
+        Saves the transformed arrays as `.npy` files, which later stages can memory-map with `np.load(path, mmap_mode = "r")`.
+        """
+        os.makedirs(os.path.dirname(self.data_transformation_config.train_array_path), exist_ok = True)
+
+        np.save(self.data_transformation_config.train_array_path, train_arr)
+        np.save(self.data_transformation_config.test_array_path, test_arr)
+
     def initiate_data_transformation(self, train_path, test_path):
         """
         Initiates data transformation on training and testing datasets.
         This method reads the datasets, applies the preprocessor object to scale numerical columns, 
         and saves the preprocessor for future use. It then returns the transformed training and testing data arrays.
 
+        The datasets can be CSV or Parquet files or table directories written by `save_table`, which are
+        memory-mapped instead of parsed. The transformed float32 arrays are also saved as `.npy` files.
+
         Args:
             train_path (str): Path to the training dataset file.
             test_path (str): Path to the testing dataset file.
@@ -70,8 +138,10 @@ class DataTransformation:
             tuple: Transformed training and testing data arrays along with the path to the saved preprocessor object.
         """
         try:
-            train_df = pd.read_csv(train_path)
-            test_df  = pd.read_csv(test_path)
+            import pandas as pd
+
+            X_train, y_train, feature_names = read_table(train_path)
+            X_test, y_test, _               = read_table(test_path)
 
             logging.info("Reading train and test data is completed")
 
@@ -79,20 +149,15 @@ class DataTransformation:
 
             preprocessing_obj = self.get_data_transformer_obg()
 
-            target_col = 'target'
-
-            X_train = train_df.drop(columns = [target_col], axis = 1)
-            y_train = train_df[target_col]
-            X_test  = test_df.drop(columns = [target_col], axis = 1)
-            y_test  = test_df[target_col]
-
             logging.info("Applying preprocessing object on train and test datasets")
 
-            X_train_scaled = preprocessing_obj.fit_transform(X_train)
-            X_test_scaled  = preprocessing_obj.transform(X_test)
+            X_train_scaled = preprocessing_obj.fit_transform(pd.DataFrame(X_train, columns = feature_names, copy = False))
+            X_test_scaled  = preprocessing_obj.transform(pd.DataFrame(X_test, columns = feature_names, copy = False))
+
+            train_arr_scaled = _with_labels(X_train_scaled, y_train)
+            test_arr_scaled  = _with_labels(X_test_scaled, y_test)
 
-            train_arr_scaled = np.c_[X_train_scaled, np.array(y_train)]
-            test_arr_scaled  = np.c_[X_test_scaled, np.array(y_test)]
+            self._save_arrays(train_arr_scaled, test_arr_scaled)
 
             logging.info("Saved preprocessing object")
 
@@ -108,3 +173,92 @@ class DataTransformation:
 
         except Exception as e:
             raise CustomException(e, sys)
+
+    def initiate_streaming_transformation(self, train_path, test_path, chunk_size = 100000):
+        """
+        Transforms datasets written by `DataIngestion.initiate_streaming_ingestion` chunk by chunk with the
+        preprocessor it fitted in the same pass, instead of loading them whole and refitting the scaler.
+        The transformed arrays are written to the `.npy` files as the chunks are transformed.
+
+        Args:
+            train_path (str): Path to the training dataset.
+            test_path (str): Path to the testing dataset.
+            chunk_size (int): Number of rows transformed at a time.
+
+        Returns:
+            tuple: The saved training and testing arrays, memory-mapped, along with the path to the preprocessor object.
+        """
+        try:
+            import pandas as pd
+
+            config            = self.data_transformation_config
+            preprocessing_obj = load_object(config.preprocessor_obj_file_path)
+            width             = len(preprocessing_obj.feature_names_in_) + 1
+
+            os.makedirs(os.path.dirname(config.train_array_path), exist_ok = True)
+
+            for path, array_path in ((train_path, config.train_array_path), (test_path, config.test_array_path)):
+                chunks = (_with_labels(preprocessing_obj.transform(pd.DataFrame(X, columns = feature_names, copy = False)), y)
+                          for X, y, feature_names in _iter_chunks(path, chunk_size))
+                rows   = _save_array_chunks(array_path, chunks, width)
+
+                logging.info(f"Transformed {rows} rows of {path} into {array_path}")
+
+            return (
+                np.load(config.train_array_path, mmap_mode = "r"),
+                np.load(config.test_array_path, mmap_mode = "r"),
+                config.preprocessor_obj_file_path
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_incremental_transformation(self, train_path, test_path, increment_path, update_scaler = True):
+        """
+        Updates the saved preprocessor with newly appended training rows instead of refitting it.
+        The StandardScaler statistics are updated with `partial_fit` over the new rows only, which gives the
+        same mean and variance as a fit over all training rows, then the training and testing datasets are transformed.
+
+        Args:
+            train_path (str): Path to the training dataset file.
+            test_path (str): Path to the testing dataset file.
+            increment_path (str): Path to the file with the training rows added since the preprocessor was fitted.
+            update_scaler (bool): Whether to update and save the scaler; False only transforms with the saved one.
+
+        Returns:
+            tuple: Transformed training and testing data arrays along with the path to the saved preprocessor object.
+        """
+        try:
+            import pandas as pd
+
+            preprocessing_obj = load_object(self.data_transformation_config.preprocessor_obj_file_path)
+            scaler            = preprocessing_obj.named_transformers_['scaler']
+
+            if update_scaler:
+                X_increment, _, feature_names = read_table(increment_path)
+
+                if len(X_increment):
+                    scaler.partial_fit(pd.DataFrame(X_increment, columns = feature_names, copy = False)[list(scaler.feature_names_in_)])
+
+                logging.info(f"Updated scaler statistics with {len(X_increment)} new rows, {int(np.max(scaler.n_samples_seen_))} rows seen in total")
+
+                save_object(
+                    file_path = self.data_transformation_config.preprocessor_obj_file_path,
+                    obj = preprocessing_obj
+                )
+
+            X_train, y_train, feature_names = read_table(train_path)
+            X_test, y_test, _               = read_table(test_path)
+
+            train_arr_scaled = _with_labels(preprocessing_obj.transform(pd.DataFrame(X_train, columns = feature_names, copy = False)), y_train)
+            test_arr_scaled  = _with_labels(preprocessing_obj.transform(pd.DataFrame(X_test, columns = feature_names, copy = False)), y_test)
+
+            self._save_arrays(train_arr_scaled, test_arr_scaled)
+
+            return (
+                train_arr_scaled, test_arr_scaled,
+                self.data_transformation_config.preprocessor_obj_file_path
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+from dataclasses import dataclass
+import numpy as np
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import inputs_hash, load_object
+from src.components.data_ingestion import DataIngestion, DataIngestionConfig
+from src.components.data_transformation import DataTransformation, DataTransformationConfig
+from src.components.model_trainer import ModelTrainer, TrainingConfig
+
+@dataclass
+class IncrementalTrainingConfig:
+    """
+    Settings of incremental retraining.
+
+    Attributes:
+        state_file_path (str): File recording the content hashes each stage last ran on, the scaler the model was trained with
+                               and a scaler update in progress.
+        warm_start_epochs (int): Maximum number of epochs to fine-tune the previous model for.
+        warm_start_learning_rate (float): Learning rate of the fine-tuning, lower than for training from scratch.
+        patience (int): Early-stopping patience of the fine-tuning.
+    """
+    state_file_path: str = os.path.join("artifacts", "incremental_state.json")
+    warm_start_epochs: int = 20
+    warm_start_learning_rate: float = 1e-4
+    patience: int = 5
+
+def _scaler_stats(preprocessor):
+    scaler = preprocessor.named_transformers_['scaler']
+
+    return {"mean": scaler.mean_.tolist(), "scale": scaler.scale_.tolist()}
+
+def _rows_seen(preprocessor):
+    return int(np.max(preprocessor.named_transformers_['scaler'].n_samples_seen_))
+
+class IncrementalTrainer:
+    """
+    Retrains the model from newly labeled rows without rebuilding everything:
+        - ingestion appends the new rows to the existing datasets,
+        - transformation updates the scaler statistics with `partial_fit` over the new rows only,
+        - training fine-tunes the previous model for a few epochs, adjusted to the updated scaler.
+
+    Every stage records a content hash of its inputs in a state file and is skipped when they have not
+    changed, so running twice on the same file neither appends the rows twice nor retrains.
+
+    Attributes:
+        incremental_training_config (IncrementalTrainingConfig): State file and fine-tuning settings.
+    """
+    def __init__(self, incremental_training_config = None):
+        self.incremental_training_config = incremental_training_config or IncrementalTrainingConfig()
+
+    def _load_state(self):
+        path = self.incremental_training_config.state_file_path
+
+        if not os.path.exists(path):
+            return {"ingested": [], "stages": {}}
+
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        path = self.incremental_training_config.state_file_path
+        tmp  = path + ".tmp"
+
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent = 2)
+
+        os.replace(tmp, path)
+
+    def initiate_incremental_training(self, new_data_path):
+        """
+        Runs the stages whose inputs changed since the last run.
+
+        Args:
+            new_data_path (str): CSV file of newly labeled rows with the feature columns and a 'target' column.
+
+        Returns:
+            dict: Whether each stage ran or was skipped, and the test accuracy when the model was retrained.
+        """
+        try:
+            config  = self.incremental_training_config
+            state   = self._load_state()
+            summary = {}
+
+            ingestion_config  = DataIngestionConfig()
+            preprocessor_path = DataTransformationConfig.preprocessor_obj_file_path
+
+            # Ingestion: a file is appended once, however often the retraining is run on it
+            new_data_hash = inputs_hash([new_data_path])
+
+            if new_data_hash in state["ingested"]:
+                summary["ingestion"] = "skipped"
+
+            else:
+                DataIngestion().initiate_incremental_ingestion(new_data_path)
+
+                state["ingested"].append(new_data_hash)
+                summary["ingestion"] = "ran"
+
+                self._save_state(state)
+
+            # Transformation: update the scaler once per new set of training rows
+            split_paths         = [ingestion_config.train_data_path, ingestion_config.test_data_path]
+            transformation_hash = inputs_hash(split_paths + [ingestion_config.increment_data_path])
+            update_scaler       = state["stages"].get("transformation") != transformation_hash
+
+            preprocessor = load_object(preprocessor_path)
+
+            if "model_scaler" not in state:
+                # The model in place was trained with the scaler as it is before this first update
+                state["model_scaler"] = _scaler_stats(preprocessor)
+
+            # The update is recorded before the scaler is saved, so a run stopped in between is not applied twice
+            rows_seen = _rows_seen(preprocessor)
+            pending   = state.get("pending_transformation")
+
+            if update_scaler and pending and pending["hash"] == transformation_hash and pending["rows_seen"] != rows_seen:
+                update_scaler = False
+
+            if update_scaler:
+                state["pending_transformation"] = {"hash": transformation_hash, "rows_seen": rows_seen}
+
+                self._save_state(state)
+
+            train_arr, test_arr, _ = DataTransformation().initiate_incremental_transformation(
+                ingestion_config.train_data_path, ingestion_config.test_data_path, ingestion_config.increment_data_path,
+                update_scaler = update_scaler
+            )
+
+            state["stages"]["transformation"] = transformation_hash
+            summary["transformation"]         = "ran" if update_scaler else "skipped"
+
+            state.pop("pending_transformation", None)
+
+            self._save_state(state)
+
+            # Training: fine-tune only when the data or the scaler changed since the model was trained
+            training_hash = inputs_hash(split_paths + [preprocessor_path])
+
+            if state["stages"].get("training") == training_hash:
+                summary["training"] = "skipped"
+
+            else:
+                current = _scaler_stats(load_object(preprocessor_path))
+                old_mean, old_scale = np.array(state["model_scaler"]["mean"]), np.array(state["model_scaler"]["scale"])
+
+                trainer = ModelTrainer(TrainingConfig(
+                    epochs         = config.warm_start_epochs,
+                    learning_rate  = config.warm_start_learning_rate,
+                    early_stopping = True,
+                    patience       = config.patience
+                ))
+
+                summary["accuracy"] = trainer.initiate_warm_start_training(
+                    train_arr, test_arr,
+                    scale  = np.array(current["scale"]) / old_scale,
+                    offset = (np.array(current["mean"]) - old_mean) / old_scale
+                )
+
+                state["model_scaler"]       = current
+                state["stages"]["training"] = training_hash
+                summary["training"]         = "ran"
+
+                self._save_state(state)
+
+            logging.info(f"Incremental retraining finished: {summary}")
+
+            return summary
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+if __name__ == "__main__":
+    print(IncrementalTrainer().initiate_incremental_training(sys.argv[1]))
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_bundle
+from src.pipeline.lookup_table import LookupTable
+from src.pipeline.predict_pipeline import PredictPipeline, FEATURE_COLUMNS
+
+@dataclass
+class LookupTableCompilerConfig:
+    """
+    Configuration of the lookup table compiled from the trained model.
+
+    Attributes:
+        table_dir_path (str): The directory where the table bundle will be saved.
+        data_path (str): Dataset whose feature ranges define the grid, and whose rows are used to check the table.
+        resolution (float): Spacing of the grid; the measurements are taken at 0.1 cm.
+        margin (float): Extent of the grid beyond the smallest and largest value of every feature in the dataset.
+        store_probabilities (bool): Whether to store the class probabilities (as float16) next to the classes.
+        engine (str): Model engine the table is computed with; it must be the engine the table is served with.
+        chunk_size (int): Number of grid points scored per model call.
+        check_size (int): Number of random grid points scored again one by one to measure the agreement with the model.
+    """
+    table_dir_path: str = os.path.join("artifacts", "lookup_table")
+    data_path: str = os.path.join("artifacts", "data.csv")
+    resolution: float = 0.1
+    margin: float = 0.0
+    store_probabilities: bool = True
+    engine: str = "keras"
+    chunk_size: int = 65536
+    check_size: int = 1000
+
+class LookupTableCompiler:
+    """
+    Evaluates the trained preprocessor and model once over every point of the discretized feature space and saves the
+    predictions as a table `PredictPipeline` can answer from with an array lookup.
+
+    Attributes:
+        lookup_table_compiler_config (LookupTableCompilerConfig): Grid, storage and engine settings.
+    """
+    def __init__(self, lookup_table_compiler_config = None):
+        self.lookup_table_compiler_config = lookup_table_compiler_config or LookupTableCompilerConfig()
+
+    def _grid(self):
+        """
+        Returns the origin and number of points along every feature of the grid covering the dataset.
+        """
+        config = self.lookup_table_compiler_config
+        data   = pd.read_csv(config.data_path)[FEATURE_COLUMNS]
+        low    = np.round((data.min().to_numpy() - config.margin) / config.resolution) * config.resolution
+        high   = np.round((data.max().to_numpy() + config.margin) / config.resolution) * config.resolution
+        shape  = tuple(int(n) for n in np.round((high - low) / config.resolution) + 1)
+
+        return low, shape, data.to_numpy(dtype = np.float32)
+
+    def _points(self, origin, shape, flat):
+        """
+        Feature values of the grid points with the given flat indices, as the float32 values a request would carry.
+        """
+        coordinates = np.stack(np.unravel_index(flat, shape), axis = 1)
+        decimals    = max(0, -int(np.floor(np.log10(self.lookup_table_compiler_config.resolution))))
+
+        return np.round(origin + coordinates * self.lookup_table_compiler_config.resolution, decimals).astype(np.float32)
+
+    def initiate_lookup_table_compile(self):
+        """
+        Builds and saves the table, then reports its size and its agreement with the live model: on the rows of the
+        dataset and on random grid points, each scored again on its own.
+
+        Returns:
+            dict: The grid shape, the number of points, the table size in bytes, the build time, the fraction of dataset
+                  rows the table covers, and the agreement rates.
+        """
+        try:
+            config   = self.lookup_table_compiler_config
+            pipeline = PredictPipeline(engine = config.engine)
+            version  = pipeline.registry.get().version
+
+            origin, shape, data = self._grid()
+            n_points            = int(np.prod(shape))
+
+            logging.info(f"Compiling a lookup table over {n_points} grid points {shape} with the {config.engine} engine")
+
+            start         = time.perf_counter()
+            classes       = np.empty(n_points, dtype = np.uint8)
+            probabilities = None
+
+            for chunk_start in range(0, n_points, config.chunk_size):
+                chunk_stop             = min(chunk_start + config.chunk_size, n_points)
+                class_ids, chunk_proba = pipeline.predict_batch(self._points(origin, shape, np.arange(chunk_start, chunk_stop)), batch_size = config.chunk_size)
+                classes[chunk_start:chunk_stop] = class_ids
+
+                if config.store_probabilities:
+                    if probabilities is None:
+                        probabilities = np.empty((n_points, chunk_proba.shape[1]), dtype = np.float16)
+
+                    probabilities[chunk_start:chunk_stop] = chunk_proba
+
+            build_seconds = time.perf_counter() - start
+
+            arrays = {"classes": classes.reshape(shape)}
+
+            if probabilities is not None:
+                arrays["probabilities"] = probabilities.reshape(shape + (probabilities.shape[1],))
+
+            grid = {
+                "columns"       : FEATURE_COLUMNS,
+                "origin"        : origin.tolist(),
+                "resolution"    : config.resolution,
+                "shape"         : list(shape),
+                "engine"        : config.engine,
+                "model_version" : version
+            }
+
+            table = LookupTable(origin, config.resolution, arrays["classes"], arrays.get("probabilities"), version, config.engine)
+
+            # Agreement with the model scoring the same rows on its own, as it would for single-row requests
+            sample = self._points(origin, shape, np.random.default_rng(0).choice(n_points, size = min(config.check_size, n_points), replace = False))
+
+            report = {
+                "shape"         : list(shape),
+                "n_points"      : n_points,
+                "table_bytes"   : int(table.nbytes),
+                "build_seconds" : build_seconds
+            }
+
+            for name, rows in (("data", data), ("grid_sample", sample)):
+                hits, table_ids, _ = table.lookup(rows, version, with_probabilities = False)
+                model_ids          = np.array([pipeline.predict_batch(row[None, :])[0][0] for row in rows[hits]])
+
+                report[f"{name}_coverage"]  = float(hits.mean())
+                report[f"{name}_agreement"] = float(np.mean(table_ids == model_ids)) if hits.any() else None
+
+            save_bundle(config.table_dir_path, arrays, {"lookup_table": dict(grid, report = report)})
+
+            logging.info(f"Saved lookup table to {config.table_dir_path}: {report}")
+
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+if __name__ == "__main__":
+    report = LookupTableCompiler(LookupTableCompilerConfig(engine = sys.argv[1] if len(sys.argv) > 1 else "keras")).initiate_lookup_table_compile()
+
+    for key, value in report.items():
+        print(f"{key:<22} {value}")
@@ -0,0 +1,507 @@
+import os
+import sys
+import json
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.numpy_model import NumpyModel, ACTIVATIONS, quantized_model_path
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+
+@dataclass
+class ModelExporterConfig:
+    """
+    Configuration of the export of the trained Keras model to the TensorFlow-free NumPy format.
+
+    Attributes:
+        exported_model_file_path (str): The file path where the exported weights will be saved.
+        fused_model_file_path (str): The file path where the exported weights with the scaler folded in will be saved.
+        bundle_dir_path (str): The directory of the versioned, memory-mappable bundle of the fused model.
+        parity_atol (float): Maximum absolute difference allowed between Keras and NumPy probabilities.
+        precisions (tuple): Reduced precisions the NumPy models are also exported in ("float16", "int8").
+        storage_format (str): Format the datasets were ingested in, see `DataIngestionConfig.storage_format`.
+        calibration_data_path (str, optional): Dataset the int8 activation ranges are calibrated on; the training split
+                                               ingested in `storage_format` when omitted.
+        evaluation_data_path (str, optional): Dataset the accuracy gate of the quantized models is evaluated on; the test
+                                              split ingested in `storage_format` when omitted.
+        max_accuracy_drop (float): Accuracy a quantized model may lose against the float32 one and still be saved.
+        quantization_report_file_path (str): The file path where the calibration and gate results are saved.
+    """
+    exported_model_file_path: str = os.path.join("artifacts", "model.npz")
+    fused_model_file_path: str = os.path.join("artifacts", "model_fused.npz")
+    bundle_dir_path: str = os.path.join("artifacts", "model_bundle")
+    parity_atol: float = 1e-4
+    precisions: tuple = ("float16", "int8")
+    storage_format: str = "csv"
+    calibration_data_path: str = None
+    evaluation_data_path: str = None
+    max_accuracy_drop: float = 0.0
+    quantization_report_file_path: str = os.path.join("artifacts", "quantization.json")
+
+    def quantization_data_paths(self):
+        """
+        Returns the paths of the calibration and evaluation datasets.
+        """
+        from src.components.data_ingestion import DataIngestionConfig
+
+        _, train_data_path, test_data_path = DataIngestionConfig(storage_format = self.storage_format).split_paths()
+
+        return self.calibration_data_path or train_data_path, self.evaluation_data_path or test_data_path
+
+def _dense_weights(layer):
+    kernel, bias = (layer.get_weights() + [None])[:2]
+
+    if bias is None:
+        bias = np.zeros(kernel.shape[1], dtype = kernel.dtype)
+
+    return kernel.astype(np.float64), bias.astype(np.float64), layer.get_config().get("activation", "linear")
+
+def _batch_norm_affine(layer):
+    """
+    Returns the inference-time affine map (scale, shift) applied by a BatchNormalization layer.
+    """
+    weights = list(layer.get_weights())
+    gamma   = weights.pop(0) if layer.scale else None
+    beta    = weights.pop(0) if layer.center else None
+    mean, variance = weights
+
+    scale = 1.0 / np.sqrt(variance.astype(np.float64) + layer.epsilon)
+
+    if gamma is not None:
+        scale = scale * gamma
+
+    shift = -mean * scale
+
+    if beta is not None:
+        shift = shift + beta
+
+    return scale, shift
+
+def fold_keras_model(model):
+    """
+    Converts a Sequential Keras model made of Dense, BatchNormalization and Dropout layers into a `NumpyModel`.
+
+    Dropout is the identity at inference time and is dropped. A BatchNormalization layer is an affine map:
+    it is folded into the preceding Dense layer when that layer has a linear activation, and otherwise
+    (BatchNorm after ReLU, as in the trained architecture) into the kernel and bias of the following Dense layer.
+
+    Args:
+        model (keras.Model): The trained model.
+
+    Returns:
+        NumpyModel: The equivalent NumPy model.
+    """
+    kernels, biases, activations = [], [], []
+    pending  = None  # affine (scale, shift) waiting to be folded into the next Dense layer
+    previous = None
+
+    for layer in model.layers:
+        kind = type(layer).__name__
+
+        if kind in ("Dropout", "InputLayer"):
+            continue
+
+        if kind == "Dense":
+            kernel, bias, activation = _dense_weights(layer)
+
+            if pending is not None:
+                scale, shift = pending
+                bias         = bias + shift @ kernel
+                kernel       = scale[:, None] * kernel
+                pending      = None
+
+            kernels.append(kernel)
+            biases.append(bias)
+            activations.append(activation)
+
+        elif kind == "BatchNormalization":
+            scale, shift = _batch_norm_affine(layer)
+
+            if previous == "Dense" and activations[-1] == "linear":
+                kernels[-1] = kernels[-1] * scale
+                biases[-1]  = biases[-1] * scale + shift
+
+            elif pending is not None:
+                pending = (pending[0] * scale, pending[1] * scale + shift)
+
+            else:
+                pending = (scale, shift)
+
+        else:
+            raise ValueError(f"Layer type {kind} cannot be exported to the NumPy engine")
+
+        previous = kind
+
+    if pending is not None:
+        # Trailing BatchNormalization: keep it as a diagonal linear layer
+        scale, shift = pending
+        kernels.append(np.diag(scale))
+        biases.append(shift)
+        activations.append("linear")
+
+    return NumpyModel(kernels, biases, activations)
+
+def fold_linear_model(model):
+    """
+    Converts a `SklearnModel` wrapping a multinomial logistic regression into a single softmax dense layer.
+
+    Args:
+        model (SklearnModel): The wrapped, fitted `LogisticRegression`.
+
+    Returns:
+        NumpyModel: The equivalent NumPy model.
+    """
+    estimator = model.estimator
+
+    if len(estimator.classes_) < 3:
+        raise ValueError("Only multinomial logistic regression can be exported to the NumPy engine")
+
+    return NumpyModel([estimator.coef_.T.astype(np.float64)], [estimator.intercept_.astype(np.float64)], ["softmax"])
+
+def fold_model(model):
+    """
+    Converts a trained model into a `NumpyModel`: a Keras model with `fold_keras_model`, a wrapped logistic
+    regression with `fold_linear_model`.
+
+    Raises:
+        ValueError: If the model has no dense-layer equivalent (e.g. gradient boosting).
+    """
+    estimator = getattr(model, "estimator", None)
+
+    if estimator is None:
+        return fold_keras_model(model)
+
+    if type(estimator).__name__ == "LogisticRegression":
+        return fold_linear_model(model)
+
+    raise ValueError(f"{type(estimator).__name__} cannot be exported to the NumPy engine")
+
+def is_exportable(model):
+    """
+    Whether `fold_model` can convert the model.
+    """
+    estimator = getattr(model, "estimator", None)
+
+    return estimator is None or type(estimator).__name__ == "LogisticRegression"
+
+def _standard_scaler(preprocessor):
+    """
+    Returns the StandardScaler applied by the preprocessor, checking that it scales exactly `FEATURE_COLUMNS` in order.
+    """
+    if hasattr(preprocessor, "mean_") and hasattr(preprocessor, "scale_"):
+        return preprocessor
+
+    transformers = [t for t in getattr(preprocessor, "transformers_", []) if t[0] != "remainder" or len(t[2])]
+
+    if len(transformers) != 1 or list(transformers[0][2]) != FEATURE_COLUMNS or not hasattr(transformers[0][1], "scale_"):
+        raise ValueError("Only a single StandardScaler over the iris feature columns can be fused into the model")
+
+    return transformers[0][1]
+
+def fuse_preprocessor(numpy_model, preprocessor):
+    """
+    Folds the scaler's mean and scale into the first dense layer, so raw feature values can be fed to the model:
+    (x - mean) / scale @ W + b  ==  x @ (W / scale) + (b - (mean / scale) @ W).
+
+    Args:
+        numpy_model (NumpyModel): The exported model, taking scaled features.
+        preprocessor (ColumnTransformer | StandardScaler): The fitted preprocessor.
+
+    Returns:
+        NumpyModel: A model taking raw features.
+    """
+    scaler = _standard_scaler(preprocessor)
+
+    mean  = np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(numpy_model.n_features), dtype = np.float64)
+    scale = np.asarray(scaler.scale_ if scaler.with_std else np.ones(numpy_model.n_features), dtype = np.float64)
+
+    kernel = numpy_model.kernels[0].astype(np.float64)
+    bias   = numpy_model.biases[0].astype(np.float64)
+
+    kernels = [kernel / scale[:, None]] + numpy_model.kernels[1:]
+    biases  = [bias - (mean / scale) @ kernel] + numpy_model.biases[1:]
+
+    return NumpyModel(kernels, biases, numpy_model.activations, raw_features = True)
+
+def check_fused_parity(numpy_model, fused_model, preprocessor, X_raw, atol = 1e-4):
+    """
+    Checks that the fused model on raw features matches the unfused model on preprocessed features.
+
+    Args:
+        numpy_model (NumpyModel): The model taking scaled features.
+        fused_model (NumpyModel): The model with the scaler folded in.
+        preprocessor (object): The fitted preprocessor.
+        X_raw (pd.DataFrame): Raw features in `FEATURE_COLUMNS` order.
+        atol (float): Maximum absolute difference allowed.
+
+    Returns:
+        dict: The maximum absolute difference and the share of rows with the same predicted class.
+
+    Raises:
+        ValueError: If the outputs differ by more than `atol`.
+    """
+    expected = numpy_model.predict(preprocessor.transform(X_raw))
+    actual   = fused_model.predict(np.asarray(X_raw, dtype = np.float32))
+
+    report = {
+        "max_abs_diff"    : float(np.max(np.abs(expected - actual))),
+        "label_agreement" : float(np.mean(np.argmax(expected, axis = 1) == np.argmax(actual, axis = 1)))
+    }
+
+    if report["max_abs_diff"] > atol:
+        raise ValueError(f"Fused model differs from the unfused one by {report['max_abs_diff']:.2e} (allowed {atol:.0e})")
+
+    return report
+
+def check_parity(keras_model, numpy_model, X, atol = 1e-4):
+    """
+    Compares the outputs of the Keras model and the exported NumPy model on the same inputs.
+
+    Args:
+        keras_model (keras.Model): The reference model.
+        numpy_model (NumpyModel): The exported model.
+        X (np.ndarray): Inputs to compare on (already preprocessed).
+        atol (float): Maximum absolute difference allowed.
+
+    Returns:
+        dict: The maximum absolute difference and the share of rows with the same predicted class.
+
+    Raises:
+        ValueError: If the outputs differ by more than `atol`.
+    """
+    expected = np.asarray(keras_model.predict(X, verbose = 0))
+    actual   = numpy_model.predict(X)
+
+    report = {
+        "max_abs_diff"    : float(np.max(np.abs(expected - actual))),
+        "label_agreement" : float(np.mean(np.argmax(expected, axis = 1) == np.argmax(actual, axis = 1)))
+    }
+
+    if report["max_abs_diff"] > atol:
+        raise ValueError(f"NumPy engine differs from Keras by {report['max_abs_diff']:.2e} (allowed {atol:.0e})")
+
+    return report
+
+def quantize_model(numpy_model, precision, X_calibration):
+    """
+    Converts the dense layers of a float32 model to a reduced precision.
+
+    A float32 forward pass over the calibration rows records the range of every input feature of every layer.
+    For "int8", each input feature gets the step mapping its range onto [-127, 127]; the steps are folded into the
+    kernel rows before the kernel is quantized with one step per output unit, so the int32 accumulator only needs
+    one rescaling per output. "float16" only rounds the kernels and needs the ranges for the report.
+
+    Args:
+        numpy_model (NumpyModel): The float32 model.
+        precision (str): "float16" or "int8".
+        X_calibration (np.ndarray): Inputs of the model (raw or scaled, as it expects them) covering the served range.
+
+    Returns:
+        tuple: The quantized model and the calibration report (input range and kernel rounding error of every layer).
+    """
+    if numpy_model.precision != "float32":
+        raise ValueError("Only float32 models can be quantized")
+
+    h      = np.asarray(X_calibration, dtype = np.float32)
+    layers = []
+    scales = {"input_scales": [], "kernel_scales": []}
+    report = []
+
+    for kernel, bias, activation in zip(numpy_model.kernels, numpy_model.biases, numpy_model.activations):
+        bound = np.maximum(np.abs(h).max(axis = 0), 1e-8)
+
+        if precision == "int8":
+            input_scale  = bound / 127
+            folded       = kernel * input_scale[:, None]
+            kernel_scale = np.maximum(np.abs(folded).max(axis = 0), 1e-12) / 127
+            quantized    = np.clip(np.rint(folded / kernel_scale), -127, 127)
+            error        = np.abs(quantized * kernel_scale / input_scale[:, None] - kernel).max()
+
+            layers.append(quantized)
+            scales["input_scales"].append(input_scale)
+            scales["kernel_scales"].append(kernel_scale)
+
+        elif precision == "float16":
+            quantized = kernel.astype(np.float16)
+            error     = np.abs(quantized.astype(np.float32) - kernel).max()
+
+            layers.append(quantized)
+
+        else:
+            raise ValueError(f"Cannot quantize to '{precision}', expected float16 or int8")
+
+        report.append({"input_max": bound.tolist(), "max_kernel_error": float(error)})
+
+        h = ACTIVATIONS[activation](h @ kernel + bias)
+
+    quantized_model = NumpyModel(layers, numpy_model.biases, numpy_model.activations, raw_features = numpy_model.raw_features,
+                                 precision = precision, **(scales if precision == "int8" else {}))
+
+    return quantized_model, report
+
+class ModelExporter:
+    """
+    Exports the trained Keras model (or wrapped logistic regression) to a compact `.npz` file served by the TensorFlow-free NumPy engine and,
+    when the preprocessor is given, a second file with the scaler folded into the first layer together with
+    a versioned, memory-mappable bundle of that fused model.
+
+    Attributes:
+        model_exporter_config (ModelExporterConfig): Paths and tolerance of the export.
+    """
+    def __init__(self, model_exporter_config = None):
+        self.model_exporter_config = model_exporter_config or ModelExporterConfig()
+
+    def initiate_model_export(self, model, X_check = None, preprocessor = None):
+        """
+        Folds the model into dense layers, checks it against Keras and saves it. With a preprocessor,
+        the fused model is checked against the unfused one on the same rows and saved as well.
+
+        Args:
+            model (keras.Model | SklearnModel): The trained model.
+            X_check (np.ndarray, optional): Preprocessed inputs used for the parity checks.
+            preprocessor (object, optional): The fitted preprocessor to fuse into the model.
+
+        Returns:
+            str: The path to the exported model.
+        """
+        try:
+            numpy_model = fold_model(model)
+
+            if X_check is not None:
+                report = check_parity(model, numpy_model, X_check, atol = self.model_exporter_config.parity_atol)
+
+                logging.info(f"NumPy engine parity check passed: {report}")
+
+            os.makedirs(os.path.dirname(self.model_exporter_config.exported_model_file_path), exist_ok = True)
+
+            numpy_model.save(self.model_exporter_config.exported_model_file_path)
+
+            logging.info("Exported model to the NumPy engine format")
+
+            if preprocessor is not None:
+                fused_model = fuse_preprocessor(numpy_model, preprocessor)
+
+                if X_check is not None:
+                    X_raw  = _standard_scaler(preprocessor).inverse_transform(X_check)
+                    report = check_fused_parity(numpy_model, fused_model, preprocessor, pd.DataFrame(X_raw, columns = FEATURE_COLUMNS),
+                                                atol = self.model_exporter_config.parity_atol)
+
+                    logging.info(f"Fused model parity check passed: {report}")
+
+                fused_model.save(self.model_exporter_config.fused_model_file_path)
+
+                logging.info("Exported model with the scaler fused into the first layer")
+
+                scaler   = _standard_scaler(preprocessor)
+                manifest = fused_model.save_bundle(self.model_exporter_config.bundle_dir_path, metadata = {
+                    "schema"       : {"features": FEATURE_COLUMNS, "dtype": "float32", "n_classes": int(fused_model.kernels[-1].shape[1])},
+                    "preprocessor" : {"type": "standard_scaler", "fused": True, "mean": scaler.mean_.tolist(), "scale": scaler.scale_.tolist()}
+                })
+
+                logging.info(f"Saved model bundle {manifest['content_hash'][:12]}")
+
+                if self.model_exporter_config.precisions:
+                    self.initiate_quantized_export(preprocessor)
+
+            return self.model_exporter_config.exported_model_file_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_quantized_export(self, preprocessor):
+        """
+        Exports reduced-precision versions of the NumPy and fused models, each calibrated on the calibration dataset
+        and gated on the evaluation dataset: a version is only saved when its accuracy (scored as `score_model` does)
+        is within `max_accuracy_drop` of the float32 model. Versions failing the gate, or left from a previous model,
+        are removed so they are never served.
+
+        Args:
+            preprocessor (object): The fitted preprocessor producing the inputs of the unfused model.
+
+        Returns:
+            dict: For every model and precision, the gate result, accuracies, agreement with float32, size and calibration report.
+        """
+        try:
+            from src.utils import read_table, score_model
+
+            config  = self.model_exporter_config
+            targets = {"numpy": config.exported_model_file_path, "fused": config.fused_model_file_path}
+            results = {}
+
+            calibration_data_path, evaluation_data_path = config.quantization_data_paths()
+
+            if not (os.path.exists(calibration_data_path) and os.path.exists(evaluation_data_path)):
+                logging.warning(f"No calibration or evaluation data at {calibration_data_path} and {evaluation_data_path}, skipping the {config.precisions} exports")
+
+                for path in targets.values():
+                    for precision in config.precisions:
+                        if os.path.exists(quantized_model_path(path, precision)):
+                            os.remove(quantized_model_path(path, precision))
+
+                return results
+
+            X_calibration, _, feature_names = read_table(calibration_data_path)
+            X_evaluation, y_evaluation, _   = read_table(evaluation_data_path)
+
+            for name, path in targets.items():
+                if not os.path.exists(path):
+                    continue
+
+                model = NumpyModel.load(path)
+
+                if model.raw_features:
+                    inputs = {"calibration": X_calibration, "evaluation": X_evaluation}
+
+                else:
+                    inputs = {key: preprocessor.transform(pd.DataFrame(X, columns = feature_names)).astype(np.float32)
+                              for key, X in (("calibration", X_calibration), ("evaluation", X_evaluation))}
+
+                baseline      = score_model(model, inputs["evaluation"], y_evaluation)
+                reference     = model.predict(inputs["evaluation"])
+                results[name] = {"float32": {"accuracy": float(baseline), "nbytes": model.nbytes}}
+
+                for precision in config.precisions:
+                    quantized, calibration = quantize_model(model, precision, inputs["calibration"])
+                    probabilities          = quantized.predict(inputs["evaluation"])
+                    accuracy               = score_model(quantized, inputs["evaluation"], y_evaluation)
+                    passed                 = accuracy >= baseline - config.max_accuracy_drop - 1e-12
+                    output_path            = quantized_model_path(path, precision)
+
+                    results[name][precision] = {
+                        "passed"       : bool(passed),
+                        "accuracy"     : float(accuracy),
+                        "agreement"    : float(np.mean(np.argmax(probabilities, axis = 1) == np.argmax(reference, axis = 1))),
+                        "max_abs_diff" : float(np.max(np.abs(probabilities - reference))),
+                        "nbytes"       : quantized.nbytes,
+                        "calibration"  : calibration
+                    }
+
+                    if passed:
+                        quantized.save(output_path)
+
+                        logging.info(f"Exported the {precision} {name} model: accuracy {accuracy:.4f} (float32 {baseline:.4f})")
+
+                    else:
+                        if os.path.exists(output_path):
+                            os.remove(output_path)
+
+                        logging.warning(f"The {precision} {name} model failed the accuracy gate: {accuracy:.4f} against {baseline:.4f} in float32")
+
+            with open(config.quantization_report_file_path, "w") as f:
+                json.dump(results, f, indent = 2)
+
+            return results
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+if __name__ == "__main__":
+    from src.utils import load_object
+    from src.components.data_transformation import DataTransformationConfig
+    from src.components.model_trainer import ModelTrainerConfig
+    model        = load_object(ModelTrainerConfig.trainde_model_file_path)
+    preprocessor = load_object(DataTransformationConfig.preprocessor_obj_file_path)
+    test_df      = pd.read_csv(os.path.join("artifacts", "test.csv"))
+
+    print(ModelExporter().initiate_model_export(model, X_check = preprocessor.transform(test_df.drop(columns = ["target"])), preprocessor = preprocessor))
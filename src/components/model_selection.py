@@ -0,0 +1,396 @@
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_object, load_object, score_model
+from src.components.model_trainer import ModelTrainerConfig
+from src.components.model_exporter import ModelExporter, ModelExporterConfig
+from src.components.data_transformation import DataTransformationConfig
+from src.pipeline.numpy_model import quantized_model_path
+
+# Every candidate is a name, a kind ("keras", "logistic_regression" or "gradient_boosting") and its parameters:
+# TrainingConfig fields for Keras, constructor arguments for the scikit-learn estimators.
+DEFAULT_CANDIDATES = [
+    {"name": "keras",                   "kind": "keras",               "params": {}},
+    {"name": "keras_cosine",            "kind": "keras",               "params": {"batch_size": 32, "epochs": 300, "lr_schedule": "cosine", "learning_rate": 0.003}},
+    {"name": "keras_plateau",           "kind": "keras",               "params": {"lr_schedule": "plateau", "learning_rate": 0.003}},
+    {"name": "logistic_regression",     "kind": "logistic_regression", "params": {"C": 1.0}},
+    {"name": "logistic_regression_c10", "kind": "logistic_regression", "params": {"C": 10.0}},
+    {"name": "gradient_boosting",       "kind": "gradient_boosting",   "params": {"n_estimators": 100, "max_depth": 2}}
+]
+
+@dataclass
+class ModelSelectionConfig:
+    """
+    Settings of the model selection stage.
+
+    Attributes:
+        workers (int): Number of processes training candidates in parallel.
+        threads_per_worker (int): Threads each worker may use inside TF/BLAS/OpenMP kernels, so workers do not oversubscribe cores.
+        latency_repeats (int): Number of single-row predictions timed per candidate.
+        accuracy_tolerance (float): Candidates within this accuracy of the best one are ranked on latency.
+        cv_folds (int): When set, candidates are also cross-validated with this many stratified folds over the train
+                        and test rows together, and ranked on their mean fold accuracy instead of the test accuracy.
+        cv_seeds (tuple): Seeds the cross-validation is repeated with.
+        promote (bool): Save the selected model as the served artifacts.
+        report_file_path (str): The file path where the ranking is saved.
+    """
+    workers: int = os.cpu_count() or 1
+    threads_per_worker: int = 1
+    latency_repeats: int = 200
+    accuracy_tolerance: float = 0.0
+    cv_folds: int = 0
+    cv_seeds: tuple = (42,)
+    promote: bool = True
+    report_file_path: str = os.path.join("artifacts", "model_selection.json")
+
+@contextmanager
+def _worker_thread_limits(threads_per_worker):
+    """
+    Sets the thread limits of the worker processes in the environment while they are started, and restores it afterwards.
+
+    Spawned workers inherit the environment, so their BLAS/OpenMP and TensorFlow thread pools are sized from these
+    limits. A pool initializer would be too late: unpickling it imports this module, and numpy with it.
+    """
+    limits = {variable: str(threads_per_worker) for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS")}
+    limits["TF_NUM_INTEROP_THREADS"] = "1"
+    limits["TF_CPP_MIN_LOG_LEVEL"]   = os.environ.get("TF_CPP_MIN_LOG_LEVEL", "3")
+    saved = {variable: os.environ.get(variable) for variable in limits}
+
+    os.environ.update(limits)
+
+    try:
+        yield
+
+    finally:
+        for variable, value in saved.items():
+            if value is None:
+                os.environ.pop(variable, None)
+
+            else:
+                os.environ[variable] = value
+
+def _fit_candidate(candidate, X_train, y_train):
+    """
+    Trains one candidate and returns it behind the `predict`-returns-probabilities interface of the served model.
+    """
+    kind   = candidate["kind"]
+    params = candidate.get("params", {})
+
+    if kind == "keras":
+        from src.utils import train_model
+        from src.components.model_trainer import TrainingConfig, build_model, compile_model
+
+        training_config = TrainingConfig(**params)
+        model           = build_model()
+
+        compile_model(model, training_config, len(X_train))
+        train_model(model, X_train, y_train, training_config)
+
+        return model
+
+    from src.pipeline.sklearn_model import SklearnModel
+
+    if kind == "logistic_regression":
+        from sklearn.linear_model import LogisticRegression
+
+        estimator = LogisticRegression(max_iter = 1000, **params)
+
+    elif kind == "gradient_boosting":
+        from sklearn.ensemble import GradientBoostingClassifier
+
+        estimator = GradientBoostingClassifier(**params)
+
+    else:
+        raise ValueError(f"Unknown candidate kind '{kind}'")
+
+    return SklearnModel(estimator.fit(X_train, y_train.astype(int)))
+
+def _single_row_latency(model, X, repeats):
+    """
+    Median latency in milliseconds of single-row predictions.
+    """
+    latencies = np.empty(repeats)
+
+    for i in range(repeats):
+        row   = X[i % len(X)][None, :]
+        start = time.perf_counter()
+        model.predict(row, verbose = 0)
+        latencies[i] = time.perf_counter() - start
+
+    return float(np.median(latencies) * 1000)
+
+def _evaluate_candidate(candidate, train_arr, test_arr, latency_repeats):
+    """
+    Trains a candidate in a worker process and measures its test accuracy and the single-row latency of the
+    path it would be served by: the NumPy engine when the model can be exported to it, the model itself otherwise.
+
+    Returns:
+        dict: The candidate, its scores, and the pickled model.
+    """
+    from src.components.model_exporter import fold_model, is_exportable
+
+    X_train, y_train, X_test, y_test = (train_arr[:, :-1], train_arr[:, -1], test_arr[:, :-1], test_arr[:, -1])
+    X_test = X_test.astype(np.float32)
+
+    start = time.perf_counter()
+    model = _fit_candidate(candidate, X_train, y_train)
+
+    train_seconds = time.perf_counter() - start
+    probabilities = np.asarray(model.predict(X_test, verbose = 0))
+    exportable    = is_exportable(model)
+    served_model  = fold_model(model) if exportable else model
+
+    return {
+        "name"          : candidate["name"],
+        "kind"          : candidate["kind"],
+        "params"        : candidate.get("params", {}),
+        "accuracy"      : float(np.mean(np.argmax(probabilities, axis = 1) == y_test)),
+        "train_seconds" : train_seconds,
+        "latency_ms"    : _single_row_latency(served_model, X_test, latency_repeats),
+        "served_by"     : "numpy" if exportable else "model.pkl",
+        "model"         : pickle.dumps(model)
+    }
+
+def cross_validation_splits(y, n_splits, seeds):
+    """
+    Stratified k-fold splits repeated for every seed, which also shuffles the rows before they are assigned to folds.
+
+    Returns:
+        list: (seed, fold, train_index, test_index) tuples.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    return [
+        (seed, fold, train_index, test_index)
+        for seed in seeds
+        for fold, (train_index, test_index) in enumerate(StratifiedKFold(n_splits = n_splits, shuffle = True, random_state = seed).split(np.zeros(len(y)), y))
+    ]
+
+def _evaluate_fold(candidate, X, y, seed, fold, train_index, test_index):
+    """
+    Trains a candidate on one fold in a worker process, with its weight initialization and shuffling seeded,
+    and scores it on the held-out rows.
+    """
+    params = dict(candidate.get("params", {}))
+
+    if candidate["kind"] == "keras":
+        from tensorflow import keras
+
+        keras.utils.set_random_seed(seed)
+        params.setdefault("seed", seed)
+
+    elif candidate["kind"] == "gradient_boosting":
+        params.setdefault("random_state", seed)
+
+    start = time.perf_counter()
+    model = _fit_candidate(dict(candidate, params = params), X[train_index], y[train_index])
+
+    return {
+        "seed"          : seed,
+        "fold"          : fold,
+        "accuracy"      : float(score_model(model, X[test_index], y[test_index])),
+        "train_seconds" : time.perf_counter() - start
+    }
+
+def summarize_folds(folds):
+    """
+    Aggregates the fold results of one candidate.
+
+    Returns:
+        dict: The mean and standard deviation of the fold accuracies, the mean training time, and the folds.
+    """
+    accuracies = np.array([fold["accuracy"] for fold in folds])
+
+    return {
+        "accuracy_mean"      : float(accuracies.mean()),
+        "accuracy_std"       : float(accuracies.std()),
+        "train_seconds_mean" : float(np.mean([fold["train_seconds"] for fold in folds])),
+        "folds"              : folds
+    }
+
+def cross_validate_model(X, y, candidate = None, n_splits = 5, seeds = (42,), workers = None, threads_per_worker = 1):
+    """
+    Estimates the accuracy of a model with stratified k-fold cross-validation, repeated for every seed, instead of
+    the single train/test split of `src.utils.evaluate_model`. Every fold of every seed is trained in its own worker
+    process, so with one core per fold the whole evaluation takes about as long as a single training run.
+
+    Args:
+        X (np.ndarray): The (scaled) features of all the rows to cross-validate on.
+        y (np.ndarray): Their labels.
+        candidate (dict, optional): A candidate definition as in `DEFAULT_CANDIDATES`; the Keras model with the
+                                    default `TrainingConfig` when omitted.
+        n_splits (int): Number of folds.
+        seeds (tuple): One repetition per seed, which seeds the fold assignment, the weight initialization and the shuffling.
+        workers (int, optional): Number of worker processes; one per fold, up to the number of cores, when omitted.
+        threads_per_worker (int): Threads each worker may use inside TF/BLAS/OpenMP kernels.
+
+    Returns:
+        dict: The mean and standard deviation of the fold accuracies, the mean training time, the wall-clock time,
+              and the accuracy and training time of every fold.
+    """
+    try:
+        candidate = candidate or DEFAULT_CANDIDATES[0]
+        X         = np.ascontiguousarray(X, dtype = np.float32)
+        y         = np.asarray(y)
+        splits    = cross_validation_splits(y, n_splits, seeds)
+        workers   = max(1, min(workers or os.cpu_count() or 1, len(splits)))
+        start     = time.perf_counter()
+
+        # Spawned workers start without the parent's thread pools, so the limits in their environment apply
+        with _worker_thread_limits(threads_per_worker), ProcessPoolExecutor(max_workers = workers, mp_context = multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(_evaluate_fold, candidate, X, y, *split) for split in splits]
+            folds   = [future.result() for future in futures]
+
+        return dict(summarize_folds(folds), n_splits = n_splits, seeds = list(seeds), wall_seconds = time.perf_counter() - start)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def rank_candidates(results, accuracy_tolerance = 0.0, metric = "accuracy"):
+    """
+    Orders the evaluated candidates: those within `accuracy_tolerance` of the best accuracy come first, fastest first,
+    followed by the others by decreasing accuracy.
+
+    Args:
+        results (list): Dictionaries with at least `metric` and "latency_ms".
+        accuracy_tolerance (float): Accuracy a candidate may give up against the best one to win on latency.
+        metric (str): The accuracy to rank on, "accuracy" or the cross-validated "cv_accuracy".
+
+    Returns:
+        list: The results in ranking order.
+    """
+    best = max(result[metric] for result in results)
+
+    def key(result):
+        contender = result[metric] >= best - accuracy_tolerance - 1e-12
+
+        return (not contender, result["latency_ms"] if contender else -result[metric], result["latency_ms"])
+
+    return sorted(results, key = key)
+
+class ModelSelector:
+    """
+    Trains candidate Keras configurations and scikit-learn models in parallel worker processes, ranks them on
+    test accuracy (or their cross-validated accuracy with `cv_folds`) and single-row inference latency, and promotes
+    the best one into the served artifacts.
+
+    Attributes:
+        model_selection_config (ModelSelectionConfig): Parallelism, ranking and promotion settings.
+    """
+    def __init__(self, model_selection_config = None):
+        self.model_selection_config = model_selection_config or ModelSelectionConfig()
+
+    def initiate_model_selection(self, train_arr, test_arr, candidates = None):
+        """
+        Evaluates the candidates, saves the ranking and, with `promote`, saves the winner as `model.pkl`
+        and exports it to the NumPy engine formats when it can be.
+
+        Args:
+            train_arr (np.ndarray): Numpy array containing training data and labels.
+            test_arr (np.ndarray): Numpy array containing testing data and labels.
+            candidates (list, optional): Candidate definitions; `DEFAULT_CANDIDATES` when omitted.
+
+        Returns:
+            list: The ranking, best first, without the pickled models.
+        """
+        try:
+            config     = self.model_selection_config
+            candidates = candidates or DEFAULT_CANDIDATES
+            n_fits     = len(candidates) * max(1, config.cv_folds * len(config.cv_seeds))
+            workers    = max(1, min(config.workers, n_fits))
+
+            logging.info(f"Evaluating {len(candidates)} candidate models with {workers} worker(s)")
+
+            # Spawned workers start without the parent's thread pools, so the limits in their environment apply
+            context = multiprocessing.get_context("spawn")
+
+            with _worker_thread_limits(config.threads_per_worker), ProcessPoolExecutor(max_workers = workers, mp_context = context) as executor:
+                futures    = [executor.submit(_evaluate_candidate, candidate, train_arr, test_arr, config.latency_repeats) for candidate in candidates]
+                cv_futures = []
+
+                # Every fold of every candidate is queued with the candidates, so the pool stays busy until the last one
+                if config.cv_folds:
+                    data   = np.vstack((train_arr, test_arr))
+                    X, y   = np.ascontiguousarray(data[:, :-1], dtype = np.float32), data[:, -1]
+                    splits = cross_validation_splits(y, config.cv_folds, config.cv_seeds)
+
+                    cv_futures = [[executor.submit(_evaluate_fold, candidate, X, y, *split) for split in splits] for candidate in candidates]
+
+                results = [future.result() for future in futures]
+
+                for result, fold_futures in zip(results, cv_futures):
+                    cv = summarize_folds([future.result() for future in fold_futures])
+
+                    result["cv_accuracy"]      = cv["accuracy_mean"]
+                    result["cv_accuracy_std"]  = cv["accuracy_std"]
+                    result["cv_train_seconds"] = cv["train_seconds_mean"]
+
+            ranking = rank_candidates(results, config.accuracy_tolerance, "cv_accuracy" if config.cv_folds else "accuracy")
+            summary = [{key: value for key, value in result.items() if key != "model"} for result in ranking]
+
+            for position, result in enumerate(summary, 1):
+                cv_summary = f" (cv {result['cv_accuracy']:.4f} ± {result['cv_accuracy_std']:.4f})" if config.cv_folds else ""
+
+                logging.info(f"#{position} {result['name']}: accuracy {result['accuracy']:.4f}{cv_summary}, "
+                             f"latency {result['latency_ms']:.3f} ms ({result['served_by']}), trained in {result['train_seconds']:.1f}s")
+
+            os.makedirs(os.path.dirname(config.report_file_path), exist_ok = True)
+
+            with open(config.report_file_path, "w") as f:
+                json.dump(summary, f, indent = 2)
+
+            if config.promote:
+                self._promote(ranking[0], test_arr[:, :-1])
+
+            return summary
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _promote(self, result, X_check):
+        model = pickle.loads(result["model"])
+
+        save_object(file_path = ModelTrainerConfig.trainde_model_file_path, obj = model)
+
+        logging.info(f"Promoted {result['name']} to {ModelTrainerConfig.trainde_model_file_path}")
+
+        if result["served_by"] == "numpy":
+            preprocessor = load_object(DataTransformationConfig.preprocessor_obj_file_path)
+
+            ModelExporter().initiate_model_export(model, X_check = X_check, preprocessor = preprocessor)
+
+            return
+
+        # The exported weights belong to the previous model; remove them so no engine serves a stale model
+        exporter_config = ModelExporterConfig()
+
+        for path in (exporter_config.exported_model_file_path, exporter_config.fused_model_file_path):
+            for precision in ("float32",) + tuple(exporter_config.precisions):
+                if os.path.exists(quantized_model_path(path, precision)):
+                    os.remove(quantized_model_path(path, precision))
+
+        shutil.rmtree(exporter_config.bundle_dir_path, ignore_errors = True)
+
+        logging.warning(f"{result['name']} cannot be exported to the NumPy engine; serve it with IRIS_MODEL_ENGINE=keras")
+
+if __name__ == "__main__":
+    from src.components.data_transformation import DataTransformation
+
+    train_arr, test_arr, _ = DataTransformation().initiate_data_transformation(os.path.join("artifacts", "train.csv"), os.path.join("artifacts", "test.csv"))
+
+    model_selection_config = ModelSelectionConfig(cv_folds = int(sys.argv[1]) if len(sys.argv) > 1 else 0)
+
+    for position, result in enumerate(ModelSelector(model_selection_config).initiate_model_selection(train_arr, test_arr), 1):
+        cv_summary = f"  cv {result['cv_accuracy']:.4f} ± {result['cv_accuracy_std']:.4f}" if model_selection_config.cv_folds else ""
+
+        print(f"#{position} {result['name']:<26} accuracy {result['accuracy']:.4f}{cv_summary}  latency {result['latency_ms']:.3f} ms  ({result['served_by']})")
@@ -1,11 +1,11 @@
 import os
 import sys
 from dataclasses import dataclass
-import tensorflow as tf
-from tensorflow import keras
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import save_object, evaluate_model
+from src.utils import save_object, load_object, train_model, score_model
+from src.components.model_exporter import ModelExporter, is_exportable
+from src.components.data_transformation import DataTransformationConfig
 
 @dataclass
 class ModelTrainerConfig:
@@ -17,6 +17,128 @@ class ModelTrainerConfig:
     """
     trainde_model_file_path = os.path.join("artifacts", "model.pkl")
 
+@dataclass
+class TrainingConfig:
+    """
+    Settings of the training loop.
+
+    Attributes:
+        batch_size (int): Number of examples per training step.
+        epochs (int): Maximum number of epochs.
+        early_stopping (bool): Stop when the monitored loss has not improved for `patience` epochs and restore the best weights;
+                               off by default, so all `epochs` are run as before.
+        patience (int): Epochs without improvement before stopping (the learning rate is halved after half as many with "plateau").
+        min_delta (float): Smallest decrease of the monitored loss that counts as an improvement.
+        learning_rate (float): Initial learning rate of the Adam optimizer.
+        lr_schedule (str): "constant", "cosine" (cosine decay over all epochs) or "plateau" (halved when the loss stalls).
+        validation_split (float): Fraction of the training rows held out to monitor the validation loss instead of the training loss.
+        seed (int, optional): Seed of the per-epoch shuffling.
+        verbose (int): Keras progress output; 0 keeps the logs quiet.
+    """
+    batch_size: int = 16
+    epochs: int = 500
+    early_stopping: bool = False
+    patience: int = 30
+    min_delta: float = 1e-4
+    learning_rate: float = 1e-3
+    lr_schedule: str = "constant"
+    validation_split: float = 0.0
+    seed: int = None
+    verbose: int = 0
+
+def build_optimizer(training_config, steps_per_epoch):
+    """
+    Creates the Adam optimizer with the configured learning rate, decayed along a cosine over the whole run for "cosine".
+
+    Args:
+        training_config (TrainingConfig): Learning rate, schedule and number of epochs.
+        steps_per_epoch (int): Number of batches per epoch.
+
+    Returns:
+        keras.optimizers.Optimizer: The optimizer to compile the model with.
+    """
+    from tensorflow import keras
+
+    learning_rate = training_config.learning_rate
+
+    if training_config.lr_schedule == "cosine":
+        learning_rate = keras.optimizers.schedules.CosineDecay(learning_rate, decay_steps = training_config.epochs * steps_per_epoch)
+
+    elif training_config.lr_schedule not in ("constant", "plateau"):
+        raise ValueError(f"Unknown learning-rate schedule '{training_config.lr_schedule}'")
+
+    return keras.optimizers.Adam(learning_rate = learning_rate)
+
+def build_model():
+    """
+    Builds the neural network architecture:
+        - Dense layers with ReLU activation for learning feature representations.
+        - Batch normalization and dropout layers to reduce overfitting.
+        - Regularization to prevent model overfitting.
+        - A softmax output layer for multi-class classification.
+
+    Returns:
+        keras.Sequential: The uncompiled model.
+    """
+    # TensorFlow is only imported when a model is actually trained
+    from tensorflow import keras
+
+    return keras.Sequential([
+            keras.layers.Dense(10, input_dim = 4, activation = 'relu', kernel_initializer = 'he_normal', 
+                            kernel_regularizer = keras.regularizers.l2(0.01)),
+            keras.layers.BatchNormalization(),
+            keras.layers.Dropout(0.3),
+            keras.layers.Dense(7, activation = 'relu', kernel_initializer = 'he_normal', 
+                            kernel_regularizer = keras.regularizers.l1_l2(l1 = 0.001, l2 = 0.001)),
+            keras.layers.BatchNormalization(),
+            keras.layers.Dropout(0.3),
+            keras.layers.Dense(5, activation = 'relu', kernel_initializer = 'he_normal', 
+                            kernel_regularizer = keras.regularizers.l1_l2(l1 = 0.001, l2 = 0.001)),
+            keras.layers.Dense(3, activation = 'softmax')
+        ])
+
+def compile_model(model, training_config, n_train):
+    """
+    Compiles the model with the optimizer and learning-rate schedule of `training_config`.
+
+    Args:
+        model (keras.Model): The model to compile.
+        training_config (TrainingConfig): Training settings.
+        n_train (int): Number of training rows, including the ones held out for validation.
+    """
+    n_fit           = n_train - int(n_train * training_config.validation_split)
+    steps_per_epoch = -(-n_fit // training_config.batch_size)
+
+    model.compile(optimizer = build_optimizer(training_config, steps_per_epoch),
+                  loss = 'sparse_categorical_crossentropy',
+                  metrics = ['accuracy'])
+
+def shift_input_scaling(model, scale, offset):
+    """
+    Re-expresses a trained model for inputs standardized with updated scaler statistics. When the inputs it
+    was trained on relate to the new ones by z_old = z_new * scale + offset, the first layer's kernel W and
+    bias b become diag(scale) W and b + offset W, so the model gives the same outputs before fine-tuning.
+
+    Args:
+        model (keras.Model | SklearnModel): A Keras model starting with a Dense layer, or a wrapped linear model.
+        scale (np.ndarray): Per-feature ratio of the new to the old scaler scale.
+        offset (np.ndarray): Per-feature shift of the new mean in units of the old scale.
+    """
+    estimator = getattr(model, "estimator", None)
+
+    if estimator is not None:
+        if hasattr(estimator, "coef_"):
+            estimator.intercept_ = estimator.intercept_ + estimator.coef_ @ offset
+            estimator.coef_      = estimator.coef_ * scale
+
+        return
+
+    first = next(layer for layer in model.layers if type(layer).__name__ == "Dense")
+
+    kernel, bias = first.get_weights()
+
+    first.set_weights([(scale[:, None] * kernel).astype(kernel.dtype), (bias + offset @ kernel).astype(bias.dtype)])
+
 class ModelTrainer:
     """
     Prepares the model architecture, compiles it, trains it on the provided training data, evaluates its performance, and saves the trained model.
@@ -24,20 +146,23 @@ class ModelTrainer:
     Attributes:
         model_trainer_config (ModelTrainerConfig): Configuration instance that holds file paths and settings 
                                                    for model saving.
+        training_config (TrainingConfig): Batch size, epochs, early stopping and learning-rate schedule.
+        model_exporter_config (ModelExporterConfig): Settings of the export to the NumPy engine formats.
+        training_report (dict): Timing and convergence of the last training run (see `train_model`).
     """
-    def __init__(self):
-        self.model_trainer_config = ModelTrainerConfig()
+    def __init__(self, training_config = None, model_exporter_config = None):
+        self.model_trainer_config  = ModelTrainerConfig()
+        self.training_config       = training_config or TrainingConfig()
+        self.model_exporter_config = model_exporter_config
+        self.training_report       = None
 
     def initiate_model_trainer(self, train_arr, test_arr):
         """
-        Initiates model training by constructing, compiling, training, and evaluating a neural network model.
-        The model is saved upon successful training and evaluation.
+        Initiates model training by constructing (see `build_model`), compiling, training, and evaluating a neural network model.
+        The model is saved upon successful training and evaluation, and exported to the NumPy engine format
+        (plain and with the saved scaler fused in) after checking that all give the same predictions on the test data.
 
-        The architecture includes:
-            - Dense layers with ReLU activation for learning feature representations.
-            - Batch normalization and dropout layers to reduce overfitting.
-            - Regularization to prevent model overfitting.
-            - A softmax output layer for multi-class classification.
+        The training loop follows `training_config` and its timing and convergence are kept in `training_report`.
 
         Args:
             train_arr (np.ndarray): Numpy array containing training data and labels.
@@ -51,34 +176,88 @@ class ModelTrainer:
 
             X_train, y_train, X_test, y_test = (train_arr[:, :-1], train_arr[:, -1], test_arr[:, :-1], test_arr[:, -1])
 
-            model = keras.Sequential([
-                    keras.layers.Dense(10, input_dim = 4, activation = 'relu', kernel_initializer = 'he_normal', 
-                                    kernel_regularizer = keras.regularizers.l2(0.01)),
-                    keras.layers.BatchNormalization(),
-                    keras.layers.Dropout(0.3),
-                    keras.layers.Dense(7, activation = 'relu', kernel_initializer = 'he_normal', 
-                                    kernel_regularizer = keras.regularizers.l1_l2(l1 = 0.001, l2 = 0.001)),
-                    keras.layers.BatchNormalization(),
-                    keras.layers.Dropout(0.3),
-                    keras.layers.Dense(5, activation = 'relu', kernel_initializer = 'he_normal', 
-                                    kernel_regularizer = keras.regularizers.l1_l2(l1 = 0.001, l2 = 0.001)),
-                    keras.layers.Dense(3, activation = 'softmax')
-                ])
-            
-            model.compile(optimizer = tf.optimizers.Adam(),
-                          loss = 'sparse_categorical_crossentropy',
-                          metrics = ['accuracy'])
-
-            model_accuracy = evaluate_model(X_train, y_train, X_test, y_test, model)
-
-            logging.info("Model has been trained")
-
-            save_object(
-                file_path = self.model_trainer_config.trainde_model_file_path, 
-                obj = model
-            )
+            model = build_model()
+
+            compile_model(model, self.training_config, len(X_train))
+
+            self.training_report = train_model(model, X_train, y_train, self.training_config)
+
+            model_accuracy = score_model(model, X_test, y_test)
+
+            report = self.training_report
+
+            logging.info(f"Model has been trained: {report['epochs_run']} epochs in {report['wall_seconds']:.1f}s "
+                         f"({report['samples_per_sec']:.0f} samples/sec), converged at epoch {report['epochs_to_converge']}, "
+                         f"test accuracy {model_accuracy:.4f}")
+
+            self._save_and_export(model, X_test)
 
             return model_accuracy
         
         except Exception as e:
-            raise CustomException(e, sys) 
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    def initiate_warm_start_training(self, train_arr, test_arr, scale = None, offset = None):
+        """
+        Continues training the saved model on the updated training data instead of starting from scratch,
+        for the (typically few) epochs of `training_config`. Linear scikit-learn models are refitted from their
+        previous coefficients when the estimator supports `warm_start`; other scikit-learn models, such as
+        gradient boosting, are refitted from scratch.
+
+        Args:
+            train_arr (np.ndarray): Numpy array containing training data and labels.
+            test_arr (np.ndarray): Numpy array containing testing data and labels.
+            scale (np.ndarray, optional): With `offset`, how the scaler changed since the model was trained (see `shift_input_scaling`).
+            offset (np.ndarray, optional): Shift of the scaler mean since the model was trained.
+
+        Returns:
+            model_accuracy (float): The accuracy score of the model on the test dataset.
+        """
+        try:
+            X_train, y_train, X_test, y_test = (train_arr[:, :-1], train_arr[:, -1], test_arr[:, :-1], test_arr[:, -1])
+
+            model = load_object(self.model_trainer_config.trainde_model_file_path)
+
+            if scale is not None:
+                shift_input_scaling(model, scale, offset)
+
+            estimator = getattr(model, "estimator", None)
+
+            if estimator is not None and not hasattr(estimator, "coef_"):
+                # Tree thresholds cannot be moved to the new scaler, and warm_start adds no trees at the same n_estimators
+                from sklearn.base import clone
+
+                model.estimator = clone(estimator).fit(X_train, y_train.astype(int))
+
+            elif estimator is not None:
+                if "warm_start" in estimator.get_params():
+                    estimator.set_params(warm_start = True)
+
+                estimator.fit(X_train, y_train.astype(int))
+
+            else:
+                compile_model(model, self.training_config, len(X_train))
+
+                self.training_report = train_model(model, X_train, y_train, self.training_config)
+
+            model_accuracy = score_model(model, X_test, y_test)
+
+            logging.info(f"Warm-started model has been trained, test accuracy {model_accuracy:.4f}")
+
+            self._save_and_export(model, X_test)
+
+            return model_accuracy
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _save_and_export(self, model, X_test):
+        save_object(
+            file_path = self.model_trainer_config.trainde_model_file_path, 
+            obj = model
+        )
+
+        if is_exportable(model):
+            preprocessor = load_object(DataTransformationConfig.preprocessor_obj_file_path)
+
+            ModelExporter(self.model_exporter_config).initiate_model_export(model, X_check = X_test, preprocessor = preprocessor) 
\ No newline at end of file
@@ -1,15 +1,161 @@
-import logging
+"""
+Logging setup shared by the whole project.
+
+Records go to a timestamped file in "logs/" by default. The behaviour can be tuned with environment variables:
+    IRIS_LOG_LEVEL          Minimum level of the records kept (default INFO).
+    IRIS_LOG_FORMAT         "text" (default) or "json" for one JSON object per line.
+    IRIS_LOG_ASYNC          "1" to hand records to a background thread through a queue, so the calling thread
+                            never waits for the disk (default "0").
+    IRIS_LOG_ROTATION       "none" (default, a new file per process), "size" or "time".
+    IRIS_LOG_FILE           Log file used with rotation (default logs/iris.log).
+    IRIS_LOG_MAX_BYTES      Size at which a "size" rotated file rolls over (default 10 MB).
+    IRIS_LOG_ROTATE_WHEN    Interval of "time" rotation, as in TimedRotatingFileHandler (default "midnight").
+    IRIS_LOG_BACKUP_COUNT   Number of rotated files kept (default 5).
+
+No file or directory is created until the first record is written.
+"""
 import os
-from datetime import datetime
+import copy
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
 
 log_dir = os.path.join(os.getcwd(), "logs")
-os.makedirs(log_dir, exist_ok = True)  # Only creating the "logs" directory
 
 LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 LOG_FILE_PATH = os.path.join(log_dir, LOG_FILE)
 
+LOG_FORMAT = "[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s"
+
+LOG_LEVEL    = os.environ.get("IRIS_LOG_LEVEL", "INFO").upper()
+LOG_JSON     = os.environ.get("IRIS_LOG_FORMAT", "text").lower() == "json"
+LOG_ASYNC    = os.environ.get("IRIS_LOG_ASYNC", "0") == "1"
+LOG_ROTATION = os.environ.get("IRIS_LOG_ROTATION", "none").lower()
+
+class _LazyDirectoryMixin:
+    """
+    Creates the directory of the log file when the handler opens it, which only happens for the first record
+    because the handlers are created with `delay = True`.
+    """
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok = True)
+
+        return super()._open()
+
+class LazyFileHandler(_LazyDirectoryMixin, logging.FileHandler):
+    """
+    A FileHandler that creates the "logs" directory and opens the log file when the first record is
+    written, so importing the package has no filesystem side effects.
+    """
+    def __init__(self, filename):
+        super().__init__(filename, delay = True)
+
+class LazyRotatingFileHandler(_LazyDirectoryMixin, logging.handlers.RotatingFileHandler):
+    """
+    A RotatingFileHandler that rolls the file over at `max_bytes` and keeps `backup_count` old files,
+    creating nothing until the first record is written.
+    """
+    def __init__(self, filename, max_bytes, backup_count):
+        super().__init__(filename, maxBytes = max_bytes, backupCount = backup_count, delay = True)
+
+class LazyTimedRotatingFileHandler(_LazyDirectoryMixin, logging.handlers.TimedRotatingFileHandler):
+    """
+    A TimedRotatingFileHandler that rolls the file over every `when` interval and keeps `backup_count` old files,
+    creating nothing until the first record is written.
+    """
+    def __init__(self, filename, when, backup_count):
+        super().__init__(filename, when = when, backupCount = backup_count, delay = True)
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats every record as a single-line JSON object with its time, level, logger, location and message,
+    plus the formatted traceback when the record carries exception information.
+    """
+    def format(self, record):
+        entry = {
+            "time"    : datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level"   : record.levelname,
+            "logger"  : record.name,
+            "module"  : record.module,
+            "line"    : record.lineno,
+            "process" : record.process,
+            "thread"  : record.threadName,
+            "message" : record.getMessage()
+        }
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default = str)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that only merges the message arguments on the calling thread. Formatting, including
+    rendering tracebacks, is left to the handler behind the queue listener.
+    """
+    def prepare(self, record):
+        record      = copy.copy(record)
+        record.msg  = record.getMessage()
+        record.args = None
+
+        return record
+
+def _file_handler():
+    """
+    Builds the handler writing to disk according to the IRIS_LOG_ROTATION setting.
+    """
+    backup_count = int(os.environ.get("IRIS_LOG_BACKUP_COUNT", 5))
+    file_path    = os.environ.get("IRIS_LOG_FILE", os.path.join(log_dir, "iris.log"))
+
+    if LOG_ROTATION == "size":
+        handler = LazyRotatingFileHandler(file_path, int(os.environ.get("IRIS_LOG_MAX_BYTES", 10 * 1024 * 1024)), backup_count)
+
+    elif LOG_ROTATION == "time":
+        handler = LazyTimedRotatingFileHandler(file_path, os.environ.get("IRIS_LOG_ROTATE_WHEN", "midnight"), backup_count)
+
+    else:
+        handler = LazyFileHandler(os.environ.get("IRIS_LOG_FILE", LOG_FILE_PATH))
+
+    handler.setFormatter(JsonFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT))
+
+    return handler
+
+file_handler  = _file_handler()
+queue_handler = None
+listener      = None
+
+def _start_listener():
+    """
+    Gives the queue handler a fresh queue and starts the background thread draining it into the file handler.
+    Also runs after a fork in both processes: the listener is stopped before forking, so the child (e.g. a
+    gunicorn worker) never inherits a thread in the middle of a write.
+    """
+    global listener
+
+    queue_handler.queue = queue.SimpleQueue()
+    listener            = logging.handlers.QueueListener(queue_handler.queue, file_handler, respect_handler_level = True)
+
+    listener.start()
+
+def stop_logging():
+    """
+    Writes out the records still queued and stops the background listener. Registered to run at exit.
+    """
+    if listener is not None and listener._thread is not None:
+        listener.stop()
+
+if LOG_ASYNC:
+    queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+
+    _start_listener()
+
+    atexit.register(stop_logging)
+    os.register_at_fork(before = stop_logging, after_in_parent = _start_listener, after_in_child = _start_listener)
+
 logging.basicConfig(
-    filename = LOG_FILE_PATH,
-    format = "[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level = logging.INFO 
+    handlers = [queue_handler if LOG_ASYNC else file_handler],
+    level = LOG_LEVEL
 )
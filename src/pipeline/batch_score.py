@@ -0,0 +1,269 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.model_registry import ENGINES
+from src.pipeline.predict_pipeline import PredictPipeline, FEATURE_COLUMNS
+
+@dataclass
+class BatchScoreConfig:
+    """
+    Settings of offline batch scoring.
+
+    Attributes:
+        chunk_size (int): Number of input rows read, scored and written at a time; bounds the memory use.
+        engine (str): Model engine used for scoring (one of `ENGINES`).
+        workers (int): Number of processes scoring chunks in parallel; 1 scores in the calling process.
+        start_row (int): Number of input rows to skip, e.g. to resume an interrupted run.
+        resume (bool): Continue from the progress file written next to the output by a previous run.
+    """
+    chunk_size: int = 100000
+    engine: str = "keras"
+    workers: int = 1
+    start_row: int = 0
+    resume: bool = False
+
+def _read_chunks(input_path, chunk_size, start_row):
+    """
+    Yields float32 feature matrices of at most `chunk_size` rows, starting after `start_row` rows.
+    """
+    if input_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(input_path)
+        row_groups   = list(range(parquet_file.num_row_groups))
+        skipped      = 0
+
+        # Whole row groups before the starting row are skipped without being read
+        while row_groups and skipped + parquet_file.metadata.row_group(row_groups[0]).num_rows <= start_row:
+            skipped += parquet_file.metadata.row_group(row_groups.pop(0)).num_rows
+
+        for batch in parquet_file.iter_batches(batch_size = chunk_size, columns = FEATURE_COLUMNS, row_groups = row_groups):
+            features = np.column_stack([batch.column(name).to_numpy(zero_copy_only = False) for name in FEATURE_COLUMNS]).astype(np.float32)
+
+            if skipped < start_row:
+                drop      = min(start_row - skipped, len(features))
+                features  = features[drop:]
+                skipped  += drop
+
+            if len(features):
+                yield features
+
+        return
+
+    import pandas as pd
+
+    reader = pd.read_csv(
+        input_path,
+        usecols   = FEATURE_COLUMNS,
+        dtype     = {name: np.float32 for name in FEATURE_COLUMNS},
+        chunksize = chunk_size
+    )
+    skipped = 0
+
+    # Rows before the starting row are parsed and dropped chunk by chunk, so skipping costs no extra memory
+    for chunk in reader:
+        features = chunk[FEATURE_COLUMNS].to_numpy(dtype = np.float32)
+
+        if skipped < start_row:
+            drop      = min(start_row - skipped, len(features))
+            features  = features[drop:]
+            skipped  += drop
+
+        if len(features):
+            yield features
+
+def _format_predictions(row_offset, class_ids, probabilities):
+    """
+    Formats the predictions of a chunk as CSV lines: row number, predicted class and class probabilities.
+    """
+    block  = np.column_stack([np.arange(row_offset, row_offset + len(class_ids)), class_ids, probabilities])
+    buffer = io.BytesIO()
+
+    np.savetxt(buffer, block, fmt = ["%d", "%d"] + ["%.6f"] * probabilities.shape[1], delimiter = ",")
+
+    return buffer.getvalue()
+
+_worker_pipeline = None
+
+def _init_worker(engine):
+    global _worker_pipeline
+
+    _worker_pipeline = PredictPipeline(engine = engine)
+
+def _score_chunk(row_offset, features):
+    """
+    Scores one chunk and formats its output, so worker processes also take the CSV formatting off the writer.
+    """
+    class_ids, probabilities = _worker_pipeline.predict_batch(features, batch_size = len(features))
+
+    return len(features), _format_predictions(row_offset, class_ids, probabilities)
+
+class BatchScorer:
+    """
+    Scores large CSV or Parquet files shaped like `artifacts/test.csv` chunk by chunk and appends the predictions
+    to a CSV output as they are produced, so the memory use does not depend on the size of the input. After every
+    chunk the next input row, the number of rows done and the size of the output are saved to `<output>.progress`;
+    with `resume`, a run truncates the output to the last saved size and continues from the saved input row,
+    whatever `start_row` the interrupted run was given.
+
+    Attributes:
+        batch_score_config (BatchScoreConfig): Chunking, engine, parallelism and resume settings.
+    """
+    def __init__(self, batch_score_config = None):
+        self.batch_score_config = batch_score_config or BatchScoreConfig()
+
+    @staticmethod
+    def _progress_path(output_path):
+        return output_path + ".progress"
+
+    def _starting_point(self, output_path):
+        """
+        Returns the number of input rows to skip, the output size to keep and the rows already scored by previous runs.
+        """
+        config = self.batch_score_config
+
+        if config.resume and os.path.exists(self._progress_path(output_path)):
+            with open(self._progress_path(output_path)) as f:
+                progress = json.load(f)
+
+            # Progress files written before "next_row" was recorded only know the rows done since `start_row`
+            next_row = progress.get("next_row", config.start_row + progress["rows"])
+
+            return next_row, progress["bytes"], progress["rows"]
+
+        return config.start_row, 0, 0
+
+    def _save_progress(self, output_path, progress):
+        """
+        Replaces the progress file atomically, so an interrupted write leaves the previous one intact.
+        """
+        progress_path = self._progress_path(output_path)
+
+        with open(progress_path + ".tmp", "w") as f:
+            json.dump(progress, f)
+
+        os.replace(progress_path + ".tmp", progress_path)
+
+    def initiate_batch_scoring(self, input_path, output_path):
+        """
+        Streams the input through the model and writes one output row per input row with its row number,
+        predicted class and class probabilities.
+
+        Args:
+            input_path (str): CSV or Parquet file with the feature columns.
+            output_path (str): CSV file the predictions are appended to.
+
+        Returns:
+            dict: Number of rows scored, elapsed seconds and throughput in rows/sec.
+        """
+        try:
+            config = self.batch_score_config
+
+            start_row, keep_bytes, rows_done = self._starting_point(output_path)
+
+            logging.info(f"Batch scoring {input_path} from row {start_row} with {config.workers} worker(s)")
+
+            mode = "r+b" if keep_bytes else "wb"
+
+            if keep_bytes and not os.path.exists(output_path):
+                raise FileNotFoundError(f"Cannot resume: {output_path} does not exist")
+
+            chunks  = _read_chunks(input_path, config.chunk_size, start_row)
+            started = time.perf_counter()
+            scored  = 0
+
+            with open(output_path, mode) as out:
+                out.truncate(keep_bytes)
+                out.seek(keep_bytes)
+
+                if keep_bytes == 0:
+                    out.write(b"row,class_id,prob_0,prob_1,prob_2\n")
+
+                for n_rows, lines in self._score(chunks, start_row):
+                    out.write(lines)
+                    out.flush()
+
+                    scored += n_rows
+
+                    self._save_progress(output_path, {"next_row": start_row + scored, "rows": rows_done + scored, "bytes": out.tell()})
+
+                    elapsed = time.perf_counter() - started
+
+                    logging.info(f"Scored {start_row + scored} rows, {scored / elapsed:.0f} rows/sec")
+
+            elapsed = time.perf_counter() - started
+
+            return {
+                "rows"         : scored,
+                "seconds"      : elapsed,
+                "rows_per_sec" : scored / elapsed if elapsed > 0 else 0.0
+            }
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _score(self, chunks, start_row):
+        """
+        Yields the row count and formatted output of every chunk in input order, scoring up to `workers` chunks concurrently.
+        """
+        config     = self.batch_score_config
+        row_offset = start_row
+
+        if config.workers <= 1:
+            _init_worker(config.engine)
+
+            for features in chunks:
+                yield _score_chunk(row_offset, features)
+
+                row_offset += len(features)
+
+            return
+
+        # Keep at most two chunks per worker in flight, so memory stays bounded however large the input is
+        with ProcessPoolExecutor(max_workers = config.workers, initializer = _init_worker, initargs = (config.engine,)) as executor:
+            pending = []
+
+            for features in chunks:
+                pending.append(executor.submit(_score_chunk, row_offset, features))
+
+                row_offset += len(features)
+
+                if len(pending) >= 2 * config.workers:
+                    yield pending.pop(0).result()
+
+            for future in pending:
+                yield future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description = "Score a large CSV/Parquet file in fixed-size chunks")
+    parser.add_argument("input", help = "CSV or Parquet file with the iris feature columns")
+    parser.add_argument("output", help = "CSV file to write the predictions to")
+    parser.add_argument("--chunk-size", type = int, default = BatchScoreConfig.chunk_size)
+    parser.add_argument("--engine", default = BatchScoreConfig.engine, choices = ENGINES)
+    parser.add_argument("--workers", type = int, default = BatchScoreConfig.workers)
+    parser.add_argument("--start-row", type = int, default = BatchScoreConfig.start_row, help = "number of input rows to skip")
+    parser.add_argument("--resume", action = "store_true", help = "continue an interrupted run from its progress file")
+    args = parser.parse_args()
+
+    scorer = BatchScorer(BatchScoreConfig(
+        chunk_size = args.chunk_size,
+        engine     = args.engine,
+        workers    = args.workers,
+        start_row  = args.start_row,
+        resume     = args.resume
+    ))
+
+    summary = scorer.initiate_batch_scoring(args.input, args.output)
+
+    print(f"Scored {summary['rows']} rows in {summary['seconds']:.2f}s ({summary['rows_per_sec']:.0f} rows/sec)")
+
+if __name__ == "__main__":
+    main()
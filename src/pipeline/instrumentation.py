@@ -0,0 +1,288 @@
+import os
+import sys
+import time
+import bisect
+import threading
+from collections import Counter as _Counts
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Instrumentation is on unless IRIS_METRICS=0; when off, `stage` returns a shared no-op timer.
+ENABLED = os.environ.get("IRIS_METRICS", "1") != "0"
+
+def set_enabled(enabled):
+    """
+    Turns the hot-path timing hooks on or off for the whole process.
+
+    Args:
+        enabled (bool): Whether stages and requests are timed.
+    """
+    global ENABLED
+
+    ENABLED = bool(enabled)
+
+def _format_labels(label_names, label_values, extra = ""):
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """
+    A monotonically increasing Prometheus-style counter, optionally split by labels.
+
+    Attributes:
+        name (str): Metric name.
+        help (str): Description shown in the exposition.
+        label_names (tuple): Names of the labels.
+    """
+    kind = "counter"
+
+    def __init__(self, name, help, label_names = ()):
+        self.name        = name
+        self.help        = help
+        self.label_names = tuple(label_names)
+
+        self._values = {}
+        self._lock   = threading.Lock()
+
+    def inc(self, labels = (), amount = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.label_names, labels)} {value}" for labels, value in self._values.items()]
+
+class Histogram:
+    """
+    A Prometheus-style histogram with cumulative buckets, optionally split by labels.
+
+    Attributes:
+        name (str): Metric name.
+        help (str): Description shown in the exposition.
+        label_names (tuple): Names of the labels.
+        buckets (tuple): Upper bounds of the buckets.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help, label_names = (), buckets = LATENCY_BUCKETS):
+        self.name        = name
+        self.help        = help
+        self.label_names = tuple(label_names)
+        self.buckets     = tuple(buckets)
+
+        self._series = {}
+        self._lock   = threading.Lock()
+
+    def observe(self, value, labels = ()):
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(labels)
+
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+            series[0][index] += 1
+            series[1]        += value
+            series[2]        += 1
+
+    def collect(self):
+        lines = []
+
+        with self._lock:
+            for labels, (counts, total, count) in self._series.items():
+                cumulative = 0
+
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le          = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+
+        return lines
+
+_metrics       = {}
+_collectors    = []
+_registry_lock = threading.Lock()
+
+def _get_or_create(cls, name, help, label_names, **kwargs):
+    with _registry_lock:
+        if name not in _metrics:
+            _metrics[name] = cls(name, help, label_names, **kwargs)
+
+        return _metrics[name]
+
+def counter(name, help, label_names = ()):
+    """
+    Returns the process-wide counter with this name, creating it on first use.
+    """
+    return _get_or_create(Counter, name, help, label_names)
+
+def histogram(name, help, label_names = (), buckets = LATENCY_BUCKETS):
+    """
+    Returns the process-wide histogram with this name, creating it on first use.
+    """
+    return _get_or_create(Histogram, name, help, label_names, buckets = buckets)
+
+def register_stats(prefix, stats_function):
+    """
+    Exposes the numeric values of a `get_stats()`-style dictionary as gauges named `<prefix>_<key>`.
+    Nested dictionaries (e.g. histograms keyed by bucket) are exposed with a `bucket` label.
+
+    Args:
+        prefix (str): Metric name prefix.
+        stats_function (callable): Returns the current statistics dictionary.
+    """
+    with _registry_lock:
+        _collectors.append((prefix, stats_function))
+
+def _collect_stats(prefix, stats):
+    lines = []
+
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+
+        if isinstance(value, bool) or value is None or isinstance(value, str):
+            continue
+
+        if isinstance(value, dict):
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f'{name}{{bucket="{bucket}"}} {count}' for bucket, count in sorted(value.items()))
+
+        elif isinstance(value, (int, float)):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+    return lines
+
+def render_metrics():
+    """
+    Renders every metric and registered statistics in the Prometheus text exposition format.
+
+    Returns:
+        str: The exposition text.
+    """
+    with _registry_lock:
+        metrics    = list(_metrics.values())
+        collectors = list(_collectors)
+
+    lines = []
+
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.collect())
+
+    for prefix, stats_function in collectors:
+        lines.extend(_collect_stats(prefix, stats_function()))
+
+    return "\n".join(lines) + "\n"
+
+STAGE_SECONDS = histogram("iris_stage_seconds", "Duration of each stage of the prediction path", ("stage",))
+
+class _StageTimer:
+    __slots__ = ("labels", "start")
+
+    def __init__(self, name):
+        self.labels = (name,)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, self.labels)
+
+        return False
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NOOP_TIMER = _NoopTimer()
+
+def stage(name):
+    """
+    Times a stage of the prediction path into the `iris_stage_seconds` histogram:
+
+        with stage("preprocess"):
+            ...
+
+    When instrumentation is disabled this returns a shared no-op context manager, so the hook costs one call.
+
+    Args:
+        name (str): Stage name, used as the `stage` label.
+    """
+    if not ENABLED:
+        return _NOOP_TIMER
+
+    return _StageTimer(name)
+
+class SamplingProfiler:
+    """
+    A lightweight sampling profiler for a single thread: a background thread records the target thread's
+    call stack every `interval` seconds, and `report` returns the most frequent stacks in the collapsed
+    "frame;frame;frame count" format understood by flame graph tools.
+
+    Attributes:
+        interval (float): Seconds between two samples.
+        samples (collections.Counter): Number of samples per collapsed stack.
+    """
+    def __init__(self, interval = 0.001, thread_id = None):
+        self.interval  = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples   = _Counts()
+
+        self._stop   = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target = self._run, name = "sampling-profiler", daemon = True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+        return False
+
+    def report(self, top = 20):
+        """
+        Returns the `top` most sampled stacks in collapsed format, one per line.
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common(top))
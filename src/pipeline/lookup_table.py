@@ -0,0 +1,114 @@
+import sys
+import numpy as np
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_bundle
+
+class LookupTable:
+    """
+    Predictions precomputed over a regular grid of feature values, built by `LookupTableCompiler`. A row whose values
+    all lie on the grid is answered by indexing the arrays directly; any other row is left to the model.
+
+    The arrays are memory-mapped, so every worker process shares the same pages. The table records the version of the
+    model artifacts it was computed from and is not used for any other version, so a retrained model is never answered
+    with stale predictions.
+
+    Attributes:
+        origin (np.ndarray): Feature values of the first grid point.
+        resolution (float): Spacing of the grid, in the units of the features.
+        shape (tuple): Number of grid points along every feature.
+        classes (np.ndarray): Predicted class id of every grid point, indexed by the grid coordinates.
+        probabilities (np.ndarray): Class probabilities of every grid point, or None when the table stores the classes only.
+        model_version (str): Version of the model artifacts the table was computed from.
+        engine (str): Model engine the table was computed with.
+    """
+    # A value is on the grid when it is within this fraction of a grid step of a grid point
+    GRID_TOLERANCE = 1e-3
+
+    def __init__(self, origin, resolution, classes, probabilities = None, model_version = None, engine = None):
+        self.origin        = np.asarray(origin, dtype = np.float64)
+        self.resolution    = float(resolution)
+        self.classes       = classes
+        self.probabilities = probabilities
+        self.shape         = tuple(classes.shape)
+        self.model_version = model_version
+        self.engine        = engine
+
+        # Offsets of one grid step along every feature in the flattened arrays
+        self._strides = np.array([int(np.prod(self.shape[i + 1:])) for i in range(len(self.shape))], dtype = np.int64)
+        self._warned  = False
+
+    @classmethod
+    def load(cls, dir_path):
+        """
+        Memory-maps a table saved by `LookupTableCompiler`.
+
+        Args:
+            dir_path (str): Directory of the table bundle.
+
+        Returns:
+            LookupTable: The table.
+        """
+        try:
+            manifest, arrays = load_bundle(dir_path, mmap_mode = "r")
+            grid             = manifest["lookup_table"]
+
+            return cls(
+                origin        = grid["origin"],
+                resolution    = grid["resolution"],
+                classes       = arrays["classes"],
+                probabilities = arrays.get("probabilities"),
+                model_version = grid["model_version"],
+                engine        = grid["engine"]
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @property
+    def nbytes(self):
+        return self.classes.nbytes + (self.probabilities.nbytes if self.probabilities is not None else 0)
+
+    def grid_index(self, features):
+        """
+        Maps rows of feature values to positions in the flattened table.
+
+        Args:
+            features (np.ndarray): A matrix of shape (n_rows, n_features).
+
+        Returns:
+            tuple: The flat index of every row, and a mask of the rows that lie on the grid (the index of the others is meaningless).
+        """
+        steps   = (np.asarray(features, dtype = np.float64) - self.origin) / self.resolution
+        indices = np.rint(steps)
+        on_grid = (np.abs(steps - indices) <= self.GRID_TOLERANCE).all(axis = 1) & (indices >= 0).all(axis = 1) & (indices < self.shape).all(axis = 1)
+
+        flat = np.where(on_grid[:, None], indices, 0).astype(np.int64) @ self._strides
+
+        return flat, on_grid
+
+    def lookup(self, features, model_version, with_probabilities = True):
+        """
+        Answers the rows that lie on the grid.
+
+        Args:
+            features (np.ndarray): A matrix of shape (n_rows, n_features) in the column order of the table.
+            model_version (str): Version of the model currently served; the table only answers for the version it was built from.
+            with_probabilities (bool): Whether probabilities are needed; tables without them then answer no row.
+
+        Returns:
+            tuple: A mask of the rows answered, their class ids, and their probabilities (None when not requested).
+        """
+        if model_version != self.model_version or (with_probabilities and self.probabilities is None):
+            if model_version != self.model_version and not self._warned:
+                logging.warning(f"Lookup table was built for model version {self.model_version}, serving {model_version}; falling back to the model")
+                self._warned = True
+
+            return np.zeros(len(features), dtype = bool), None, None
+
+        flat, hits    = self.grid_index(features)
+        flat          = flat[hits]
+        class_ids     = self.classes.reshape(-1)[flat].astype(np.int64)
+        probabilities = self.probabilities.reshape(-1, self.probabilities.shape[-1])[flat].astype(np.float32) if with_probabilities else None
+
+        return hits, class_ids, probabilities
@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import queue
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass
+import numpy as np
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.predict_pipeline import PredictPipeline
+
+@dataclass
+class MicroBatcherConfig:
+    """
+    Settings of the dynamic batching layer placed in front of the prediction pipeline.
+
+    Attributes:
+        max_batch_size (int): Maximum number of rows scored in one model call.
+        max_wait_ms (float): Maximum time the first queued request waits for others to join its batch.
+        max_queue_size (int): Maximum number of pending requests before `submit` starts blocking.
+    """
+    max_batch_size: int = 64
+    max_wait_ms: float = 2.0
+    max_queue_size: int = 10000
+
+def _bucket(value):
+    """
+    Returns the upper bound of the power-of-two histogram bucket holding `value` (0 has its own bucket).
+    """
+    if value <= 0:
+        return 0
+
+    bound = 1
+
+    while bound < value:
+        bound *= 2
+
+    return bound
+
+class MicroBatcher:
+    """
+    Queues prediction requests coming from many threads or asyncio tasks and scores them together.
+    A background thread flushes the queue as one batch as soon as either `max_batch_size` rows are
+    waiting or the oldest request has waited `max_wait_ms`, then fans the results back out to each caller.
+
+    Attributes:
+        batcher_config (MicroBatcherConfig): Batch size, wait time and queue settings.
+        predict_pipeline (PredictPipeline): Pipeline used to score the flushed batches.
+    """
+    def __init__(self, predict_pipeline = None, batcher_config = None):
+        self.batcher_config   = batcher_config or MicroBatcherConfig()
+        self.predict_pipeline = predict_pipeline or PredictPipeline()
+
+        self._queue       = queue.Queue(maxsize = self.batcher_config.max_queue_size)
+        self._carry       = None
+        self._lock        = threading.Lock()
+        self._worker      = None
+        self._worker_pid  = None
+        self._stats_lock  = threading.Lock()
+
+        self.stats = {
+            "requests"              : 0,
+            "batches"               : 0,
+            "rows"                  : 0,
+            "errors"                : 0,
+            "batch_size_histogram"  : Counter(),
+            "queue_depth_histogram" : Counter()
+        }
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so a batcher created before forking workers restarts its own thread.
+        if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+                return
+
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue(maxsize = self.batcher_config.max_queue_size)
+                self._carry = None
+
+            self._worker     = threading.Thread(target = self._run, name = "micro-batcher", daemon = True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def _collect(self):
+        """
+        Blocks for the first request, then gathers more until the batch is full or the wait time is over.
+        A request that would take the batch past `max_batch_size` is kept for the next one; a single request
+        larger than that is scored on its own.
+        """
+        first       = self._carry if self._carry is not None else self._queue.get()
+        self._carry = None
+        batch       = [first]
+        rows        = len(first[0])
+        deadline    = time.monotonic() + self.batcher_config.max_wait_ms / 1000.0
+
+        while rows < self.batcher_config.max_batch_size:
+            remaining = deadline - time.monotonic()
+
+            if remaining <= 0:
+                break
+
+            try:
+                item = self._queue.get(timeout = remaining)
+
+            except queue.Empty:
+                break
+
+            if rows + len(item[0]) > self.batcher_config.max_batch_size:
+                self._carry = item
+                break
+
+            batch.append(item)
+            rows += len(item[0])
+
+        return batch
+
+    @staticmethod
+    def _resolve(future, result = None, exception = None):
+        """
+        Hands a result or an exception to a caller; a future resolved or cancelled in the meantime is left alone.
+        """
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+
+            else:
+                future.set_result(result)
+
+        except InvalidStateError:
+            pass
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # Callers that were cancelled or timed out (e.g. through `asyncio.wrap_future`) are not scored
+            batch = [(features, future) for features, future in batch if future.set_running_or_notify_cancel()]
+
+            if not batch:
+                continue
+
+            rows  = sum(len(features) for features, _ in batch)
+            depth = self._queue.qsize()
+
+            with self._stats_lock:
+                self.stats["batches"] += 1
+                self.stats["rows"]    += rows
+                self.stats["batch_size_histogram"][_bucket(rows)]   += 1
+                self.stats["queue_depth_histogram"][_bucket(depth)] += 1
+
+            try:
+                matrix = np.concatenate([features for features, _ in batch]) if len(batch) > 1 else batch[0][0]
+
+                class_ids, probabilities = self.predict_pipeline.predict_batch(matrix)
+
+            except Exception as e:
+                with self._stats_lock:
+                    self.stats["errors"] += 1
+
+                logging.error("Micro-batch prediction failed", exc_info = True)
+
+                for _, future in batch:
+                    self._resolve(future, exception = e)
+
+                continue
+
+            start = 0
+
+            for features, future in batch:
+                stop = start + len(features)
+                self._resolve(future, (class_ids[start:stop], probabilities[start:stop]))
+                start = stop
+
+    def submit(self, features):
+        """
+        Queues feature rows for the next batch.
+
+        Args:
+            features (np.ndarray): One row of 4 features or a (k, 4) matrix in `FEATURE_COLUMNS` order.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the (class_ids, probabilities) of the submitted rows.
+        """
+        try:
+            features = np.asarray(features, dtype = np.float32).reshape(-1, 4)
+
+            self._ensure_worker()
+
+            future = Future()
+            self._queue.put((features, future))
+
+            with self._stats_lock:
+                self.stats["requests"] += 1
+
+            return future
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict(self, features, timeout = None):
+        """
+        Scores feature rows through the batching queue, blocking the calling thread until the result is ready.
+
+        Args:
+            features (np.ndarray): One row of 4 features or a (k, 4) matrix.
+            timeout (float, optional): Maximum number of seconds to wait for the result.
+
+        Returns:
+            tuple: The predicted class ids and class probabilities of the submitted rows.
+        """
+        return self.submit(features).result(timeout = timeout)
+
+    async def predict_async(self, features):
+        """
+        Scores feature rows through the batching queue without blocking the event loop.
+
+        Args:
+            features (np.ndarray): One row of 4 features or a (k, 4) matrix.
+
+        Returns:
+            tuple: The predicted class ids and class probabilities of the submitted rows.
+        """
+        return await asyncio.wrap_future(self.submit(features))
+
+    def get_stats(self):
+        """
+        Returns the request and batch counters, the current queue depth, and the batch-size and
+        queue-depth histograms (keyed by the upper bound of power-of-two buckets).
+
+        Returns:
+            dict: A snapshot of the batching statistics.
+        """
+        with self._stats_lock:
+            stats = {key: dict(value) if isinstance(value, Counter) else value for key, value in self.stats.items()}
+
+        stats["queue_depth"]     = self._queue.qsize()
+        stats["mean_batch_size"] = stats["rows"] / stats["batches"] if stats["batches"] else 0.0
+
+        return stats
@@ -0,0 +1,304 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+from dataclasses import dataclass, astuple
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object, BUNDLE_MANIFEST
+from src.pipeline.numpy_model import NumpyModel, PRECISIONS, quantized_model_path
+
+ENGINES = ("keras", "numpy", "fused", "bundle")
+
+@dataclass
+class ModelRegistryConfig:
+    """
+    Holds the artifact paths served by the model registry and the settings controlling
+    how often the files on disk are checked for changes.
+
+    Attributes:
+        model_file_path (str): Path to the pickled trained model.
+        numpy_model_file_path (str): Path to the model exported for the TensorFlow-free NumPy engine.
+        fused_model_file_path (str): Path to the exported model with the scaler folded into its first layer.
+        bundle_dir_path (str): Directory of the versioned, memory-mappable model bundle.
+        preprocessor_file_path (str): Path to the pickled preprocessor.
+        engine (str): Which model to serve, "keras" (the pickled model), "numpy" (the exported weights),
+                      "fused" (the exported weights taking raw features, served without the preprocessor)
+                      or "bundle" (the memory-mapped bundle, falling back to the pickles when there is none).
+        precision (str): Precision of the weights served by the "numpy" and "fused" engines, "float32", "float16" or "int8";
+                         the reduced ones are the quantized exports next to the float32 files (see `quantized_model_path`).
+        check_interval (float): Minimum number of seconds between two checks of the files on disk.
+        verify_hash (bool): Whether a changed mtime/size must also be confirmed by a content hash before reloading.
+    """
+    model_file_path: str = os.path.join("artifacts", "model.pkl")
+    numpy_model_file_path: str = os.path.join("artifacts", "model.npz")
+    fused_model_file_path: str = os.path.join("artifacts", "model_fused.npz")
+    bundle_dir_path: str = os.path.join("artifacts", "model_bundle")
+    preprocessor_file_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    engine: str = "keras"
+    precision: str = "float32"
+    check_interval: float = 1.0
+    verify_hash: bool = True
+
+@dataclass
+class LoadedArtifacts:
+    """
+    A consistent snapshot of the artifacts served by the registry.
+
+    Attributes:
+        model (object): The loaded model.
+        preprocessor (object): The loaded preprocessor, or None when the model takes raw features.
+        version (str): Identifier of the artifact files the snapshot was loaded from.
+    """
+    model: object
+    preprocessor: object
+    version: str
+
+def file_fingerprint(file_path):
+    """
+    Cheap fingerprint of a file based on its modification time and size.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        tuple: The (mtime_ns, size) pair of the file.
+    """
+    stat = os.stat(file_path)
+
+    return (stat.st_mtime_ns, stat.st_size)
+
+def file_hash(file_path):
+    """
+    Computes the SHA-256 digest of a file's content.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+class ModelRegistry:
+    """
+    Process-wide holder of the model and preprocessor. The artifacts are unpickled once and the same
+    warm instances are handed to every request. When the files on disk change, the first request to
+    notice reloads them and swaps them in atomically; if the new files cannot be loaded (for example
+    because they are still being written), the previous artifacts keep being served.
+
+    Attributes:
+        registry_config (ModelRegistryConfig): Paths and reload settings.
+        stats (dict): Counters describing loads and cache hits.
+    """
+    def __init__(self, registry_config = None):
+        self.registry_config = registry_config or ModelRegistryConfig()
+
+        self._lock         = threading.Lock()
+        self._artifacts    = None
+        self._fingerprints = None
+        self._hashes       = None
+        self._last_check   = 0.0
+
+        self.stats = {
+            "loads"              : 0,
+            "reloads"            : 0,
+            "failed_loads"       : 0,
+            "cache_hits"         : 0,
+            "cache_misses"       : 0,
+            "last_load_seconds"  : 0.0,
+            "total_load_seconds" : 0.0
+        }
+
+    def _paths(self):
+        return _artifact_paths(self.registry_config)
+
+    def _load(self, fingerprints, hashes):
+        """
+        Loads the artifacts and swaps them in. Must be called with the lock held.
+        """
+        paths = self._paths()
+
+        start = time.perf_counter()
+
+        try:
+            if paths[0].endswith(".pkl"):
+                if self.registry_config.engine == "bundle":
+                    logging.warning(f"No model bundle in {self.registry_config.bundle_dir_path}, falling back to the pickled artifacts")
+
+                model = load_object(file_path = paths[0])
+
+            else:
+                if os.path.basename(paths[0]) == BUNDLE_MANIFEST:
+                    model = NumpyModel.load_bundle(os.path.dirname(paths[0]))
+
+                else:
+                    model = NumpyModel.load(paths[0])
+
+                # A model taking raw features is served without a preprocessor, and the other way around
+                if model.raw_features != (len(paths) == 1):
+                    raise ValueError(f"{paths[0]} does not match the '{self.registry_config.engine}' engine")
+
+            preprocessor = load_object(file_path = paths[1]) if len(paths) > 1 else None
+
+        except Exception:
+            self.stats["failed_loads"] += 1
+
+            if self._artifacts is None:
+                raise
+
+            logging.error("Reloading model artifacts failed, keeping the previous version", exc_info = True)
+
+            return
+
+        elapsed = time.perf_counter() - start
+
+        version = hashlib.sha256("".join(hashes).encode()).hexdigest()[:12] if hashes else "%d-%d" % fingerprints[0]
+
+        if self._artifacts is not None:
+            self.stats["reloads"] += 1
+
+        self._artifacts    = LoadedArtifacts(model = model, preprocessor = preprocessor, version = version)
+        self._fingerprints = fingerprints
+        self._hashes       = hashes
+
+        self.stats["loads"]              += 1
+        self.stats["last_load_seconds"]   = elapsed
+        self.stats["total_load_seconds"] += elapsed
+
+        logging.info(f"Loaded model artifacts version {version} in {elapsed:.3f}s")
+
+    def _needs_reload(self, fingerprints):
+        """
+        Decides whether the artifacts changed on disk. Must be called with the lock held.
+        """
+        if fingerprints == self._fingerprints:
+            return False, self._hashes
+
+        if not self.registry_config.verify_hash:
+            return True, None
+
+        hashes = tuple(file_hash(path) for path in self._paths())
+
+        if hashes == self._hashes:
+            # Touched but not modified: remember the new stamp and keep serving.
+            self._fingerprints = fingerprints
+
+            return False, hashes
+
+        return True, hashes
+
+    def get(self):
+        """
+        Returns the current artifacts, loading them on first use and reloading them if the files changed.
+
+        Returns:
+            LoadedArtifacts: The model, preprocessor and version to use for a request.
+        """
+        try:
+            now       = time.monotonic()
+            artifacts = self._artifacts
+
+            if artifacts is not None and now - self._last_check < self.registry_config.check_interval:
+                self.stats["cache_hits"] += 1
+
+                return artifacts
+
+            with self._lock:
+                self._last_check = now
+                fingerprints     = tuple(file_fingerprint(path) for path in self._paths())
+
+                if self._artifacts is None:
+                    hashes = tuple(file_hash(path) for path in self._paths()) if self.registry_config.verify_hash else None
+
+                    self.stats["cache_misses"] += 1
+                    self._load(fingerprints, hashes)
+
+                else:
+                    reload, hashes = self._needs_reload(fingerprints)
+
+                    if reload:
+                        self.stats["cache_misses"] += 1
+                        self._load(fingerprints, hashes)
+
+                    else:
+                        self.stats["cache_hits"] += 1
+
+                return self._artifacts
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_stats(self):
+        """
+        Returns a copy of the registry counters together with the currently served version.
+
+        Returns:
+            dict: Load-time and cache-hit counters.
+        """
+        stats = dict(self.stats)
+        stats["version"] = self._artifacts.version if self._artifacts is not None else None
+
+        return stats
+
+def _artifact_paths(registry_config):
+    """
+    Returns the files served for the configured engine: the model, followed by the preprocessor unless it is fused into the model.
+    """
+    if registry_config.precision != "float32" and registry_config.engine not in ("numpy", "fused"):
+        raise ValueError(f"The '{registry_config.engine}' engine serves float32 weights only; use the numpy or fused engine for {registry_config.precision}")
+
+    if registry_config.engine == "keras":
+        return (registry_config.model_file_path, registry_config.preprocessor_file_path)
+
+    if registry_config.engine == "numpy":
+        return (quantized_model_path(registry_config.numpy_model_file_path, registry_config.precision), registry_config.preprocessor_file_path)
+
+    if registry_config.engine == "fused":
+        return (quantized_model_path(registry_config.fused_model_file_path, registry_config.precision),)
+
+    if registry_config.engine == "bundle":
+        manifest_path = os.path.join(registry_config.bundle_dir_path, BUNDLE_MANIFEST)
+
+        if os.path.exists(manifest_path):
+            return (manifest_path,)
+
+        # Legacy fallback for artifacts trained before the bundle format existed
+        return (registry_config.model_file_path, registry_config.preprocessor_file_path)
+
+    raise ValueError(f"Unknown engine '{registry_config.engine}', expected one of {ENGINES}")
+
+_registries      = {}
+_registries_lock = threading.Lock()
+
+def get_model_registry(registry_config = None):
+    """
+    Returns the process-wide registry for the given artifact paths, creating it on first use.
+
+    Args:
+        registry_config (ModelRegistryConfig, optional): Paths and reload settings. Defaults to the standard artifacts.
+
+    Returns:
+        ModelRegistry: The shared registry instance.
+    """
+    registry_config = registry_config or ModelRegistryConfig()
+    key             = astuple(registry_config)
+
+    if registry_config.engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{registry_config.engine}', expected one of {ENGINES}")
+
+    if registry_config.precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{registry_config.precision}', expected one of {PRECISIONS}")
+
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ModelRegistry(registry_config)
+
+        return _registries[key]
@@ -0,0 +1,257 @@
+import os
+import sys
+import numpy as np
+from src.exception import CustomException
+from src.utils import save_bundle, load_bundle
+
+NUMPY_MODEL_FORMAT_VERSION = 2
+
+# Precisions the dense layers can be stored and run in (see `src.components.model_exporter.quantize_model`)
+PRECISIONS = ("float32", "float16", "int8")
+
+def quantized_model_path(file_path, precision):
+    """
+    Path of the version of an exported model in the given precision, e.g. 'artifacts/model_fused_int8.npz'.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+    if precision == "float32":
+        return file_path
+
+    root, extension = os.path.splitext(file_path)
+
+    return f"{root}_{precision}{extension}"
+
+def _relu(x):
+    return np.maximum(x, 0, out = x)
+
+def _softmax(x):
+    x = x - x.max(axis = 1, keepdims = True)
+    np.exp(x, out = x)
+    x /= x.sum(axis = 1, keepdims = True)
+
+    return x
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+ACTIVATIONS = {
+    "linear"  : lambda x: x,
+    "relu"    : _relu,
+    "softmax" : _softmax,
+    "sigmoid" : _sigmoid,
+    "tanh"    : np.tanh
+}
+
+class NumpyModel:
+    """
+    Pure-NumPy forward pass of a stack of dense layers exported from the trained Keras model.
+    It exposes the same `predict` call as the Keras model, so it can be served by `PredictPipeline`
+    without importing TensorFlow.
+
+    The kernels may be stored in reduced precision:
+        - "float16": the kernels are kept in half precision and the activations stay float32,
+        - "int8": every layer input is quantized with per-feature scales calibrated ahead of time, the kernels hold
+          int8 values with one scale per output unit, and the products are accumulated in int32.
+
+    Attributes:
+        kernels (list): Weight matrices of the dense layers, each of shape (n_in, n_out).
+        biases (list): Bias vectors of the dense layers.
+        activations (list): Names of the activation applied after each dense layer.
+        raw_features (bool): Whether the feature scaling is fused into the first layer, so the model takes raw measurements.
+        precision (str): One of `PRECISIONS`.
+        input_scales (list): For "int8", the quantization step of every input feature of every layer.
+        kernel_scales (list): For "int8", the quantization step of every output unit of every layer.
+    """
+    def __init__(self, kernels, biases, activations, raw_features = False, precision = "float32", input_scales = None, kernel_scales = None):
+        if not (len(kernels) == len(biases) == len(activations)):
+            raise ValueError("kernels, biases and activations must have the same length")
+
+        unknown = set(activations) - set(ACTIVATIONS)
+
+        if unknown:
+            raise ValueError(f"Unsupported activations: {sorted(unknown)}")
+
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+        if precision == "int8" and (input_scales is None or kernel_scales is None):
+            raise ValueError("int8 models need input and kernel scales")
+
+        kernel_dtype = {"float32": np.float32, "float16": np.float16, "int8": np.int8}[precision]
+
+        self.kernels       = [np.ascontiguousarray(kernel, dtype = kernel_dtype) for kernel in kernels]
+        self.biases        = [np.ascontiguousarray(bias, dtype = np.float32) for bias in biases]
+        self.activations   = list(activations)
+        self.raw_features  = bool(raw_features)
+        self.precision     = precision
+        self.input_scales  = [np.ascontiguousarray(scale, dtype = np.float32) for scale in input_scales] if precision == "int8" else None
+        self.kernel_scales = [np.ascontiguousarray(scale, dtype = np.float32) for scale in kernel_scales] if precision == "int8" else None
+
+    @property
+    def n_features(self):
+        return self.kernels[0].shape[0]
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the weights and scales.
+        """
+        arrays = self.kernels + self.biases + (self.input_scales or []) + (self.kernel_scales or [])
+
+        return sum(array.nbytes for array in arrays)
+
+    def predict(self, X, batch_size = None, verbose = 0):
+        """
+        Runs the forward pass.
+
+        Args:
+            X (np.ndarray): Input matrix of shape (n_rows, n_features).
+            batch_size (int, optional): Accepted for compatibility with `keras.Model.predict`; the whole matrix is processed at once.
+            verbose (int, optional): Accepted for compatibility with `keras.Model.predict`; ignored.
+
+        Returns:
+            np.ndarray: The output of the last layer, i.e. class probabilities for the softmax classifier.
+        """
+        h = np.asarray(X, dtype = np.float32)
+
+        for i, (kernel, bias, activation) in enumerate(zip(self.kernels, self.biases, self.activations)):
+            if self.precision == "int8":
+                h_q = np.clip(np.rint(h / self.input_scales[i]), -127, 127).astype(np.int8)
+                h   = np.matmul(h_q, kernel, dtype = np.int32).astype(np.float32)
+                h  *= self.kernel_scales[i]
+
+            else:
+                # float16 kernels are promoted to float32 by the product, so activations keep full precision
+                h = h @ kernel
+
+            h += bias
+            h = ACTIVATIONS[activation](h)
+
+        return h
+
+    __call__ = predict
+
+    def save(self, file_path):
+        """
+        Writes the layers to a compressed `.npz` file.
+
+        Args:
+            file_path (str): Destination path.
+        """
+        try:
+            arrays = {
+                "format_version" : np.array(NUMPY_MODEL_FORMAT_VERSION),
+                "activations"    : np.array(self.activations),
+                "raw_features"   : np.array(self.raw_features),
+                "precision"      : np.array(self.precision)
+            }
+
+            for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+                arrays[f"kernel_{i}"] = kernel
+                arrays[f"bias_{i}"]   = bias
+
+                if self.precision == "int8":
+                    arrays[f"input_scale_{i}"]  = self.input_scales[i]
+                    arrays[f"kernel_scale_{i}"] = self.kernel_scales[i]
+
+            with open(file_path, "wb") as f:
+                np.savez_compressed(f, **arrays)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Reads a model written by `save`.
+
+        Args:
+            file_path (str): Path to the `.npz` file.
+
+        Returns:
+            NumpyModel: The loaded model.
+        """
+        try:
+            with np.load(file_path, allow_pickle = False) as data:
+                version = int(data["format_version"])
+
+                if version > NUMPY_MODEL_FORMAT_VERSION:
+                    raise ValueError(f"Unsupported numpy model format version {version}")
+
+                activations  = [str(a) for a in data["activations"]]
+                kernels      = [data[f"kernel_{i}"] for i in range(len(activations))]
+                biases       = [data[f"bias_{i}"] for i in range(len(activations))]
+                raw_features = bool(data["raw_features"]) if "raw_features" in data else False
+                precision    = str(data["precision"]) if "precision" in data else "float32"
+                scales       = {}
+
+                if precision == "int8":
+                    scales["input_scales"]  = [data[f"input_scale_{i}"] for i in range(len(activations))]
+                    scales["kernel_scales"] = [data[f"kernel_scale_{i}"] for i in range(len(activations))]
+
+            return cls(kernels, biases, activations, raw_features = raw_features, precision = precision, **scales)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_bundle(self, dir_path, metadata = None):
+        """
+        Writes the layers as a versioned, memory-mappable artifact bundle (see `src.utils.save_bundle`).
+
+        Args:
+            dir_path (str): Directory of the bundle.
+            metadata (dict, optional): Extra manifest entries, e.g. the feature schema.
+
+        Returns:
+            dict: The written manifest.
+        """
+        if self.precision != "float32":
+            raise ValueError("Only float32 models are saved as bundles")
+
+        arrays = {}
+
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f"kernel_{i}"] = kernel
+            arrays[f"bias_{i}"]   = bias
+
+        manifest = dict(metadata or {})
+        manifest["model"] = {"type": "dense", "activations": self.activations, "raw_features": self.raw_features}
+
+        return save_bundle(dir_path, arrays, manifest)
+
+    @classmethod
+    def load_bundle(cls, dir_path, mmap_mode = "r", verify = False):
+        """
+        Loads a model written by `save_bundle`, memory-mapping its weights by default.
+
+        Args:
+            dir_path (str): Directory of the bundle.
+            mmap_mode (str, optional): Passed to `np.load`; None reads the weights into memory.
+            verify (bool): Whether to check the weights against the hashes in the manifest.
+
+        Returns:
+            NumpyModel: The loaded model, with `manifest` holding the bundle description.
+        """
+        try:
+            manifest, arrays = load_bundle(dir_path, mmap_mode = mmap_mode, verify = verify)
+            description      = manifest["model"]
+
+            if description.get("type") != "dense":
+                raise ValueError(f"Unsupported model type {description.get('type')}")
+
+            activations = description["activations"]
+
+            model = cls(
+                [arrays[f"kernel_{i}"] for i in range(len(activations))],
+                [arrays[f"bias_{i}"] for i in range(len(activations))],
+                activations,
+                raw_features = description.get("raw_features", False)
+            )
+            model.manifest = manifest
+
+            return model
+
+        except Exception as e:
+            raise CustomException(e, sys)
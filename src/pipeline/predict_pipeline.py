@@ -1,43 +1,197 @@
 import sys
-import pandas as pd
+import time
 import numpy as np
 from src.exception import CustomException
-from src.utils import load_object
+from src.logger import logging
+from src.pipeline.model_registry import ModelRegistryConfig, get_model_registry
+from src.pipeline.instrumentation import stage
+
+FEATURE_COLUMNS = ['sepal length (cm)', 'sepal width (cm)', 'petal length (cm)', 'petal width (cm)']
+FEATURE_ALIASES = ['sepal_length', 'sepal_width', 'petal_length', 'petal_width']
 
 class PredictPipeline:
     """
     Handles the loading of the model and preprocessor, applying transformations to the input features, and predicting the output.
+    The artifacts are taken from the process-wide model registry, so they are loaded once and shared by every pipeline instance.
+
+    Attributes:
+        registry (ModelRegistry): Registry providing the warm model and preprocessor.
+        cache (PredictionCache): Optional cache of predictions for recently seen feature vectors.
+        lookup_table (LookupTable): Optional table of precomputed predictions answering rows on its grid without running the model.
+
+    Args:
+        registry (ModelRegistry, optional): Registry to use instead of the process-wide one.
+        engine (str): "keras" to serve the pickled Keras model, "numpy" to serve the exported weights without TensorFlow,
+                      "fused" to serve the exported weights with the scaler folded in, skipping the preprocessor.
+        precision (str): "float32", or "float16"/"int8" to serve the quantized weights of the "numpy" or "fused" engine.
+        cache (PredictionCache, optional): When given, rows on the grid of the cache precision that are cached for the
+                                           current artifact version do not reach the model.
+        lookup_table (LookupTable, optional): When given, rows on its grid are answered from it, as long as it was
+                                              built from the artifact version being served; the other rows reach the cache and the model.
     """
-    def __init__(self):
-        pass
+    def __init__(self, registry = None, engine = "keras", cache = None, lookup_table = None, precision = "float32"):
+        self.registry     = registry or get_model_registry(ModelRegistryConfig(engine = engine, precision = precision))
+        self.cache        = cache
+        self.lookup_table = lookup_table
+
+    @staticmethod
+    def _scale(preprocessor, features):
+        """
+        Applies the preprocessor, or passes the raw values through when the scaler is fused into the model.
+        """
+        if preprocessor is None:
+            if not isinstance(features, np.ndarray):
+                return features[FEATURE_COLUMNS].to_numpy(dtype = np.float32)
+
+            return features
+
+        # pandas is only needed next to the pickled ColumnTransformer, so it is not imported for the fused engine
+        import pandas as pd
+
+        if not isinstance(features, pd.DataFrame):
+            # One frame wrapping the whole matrix, only so the ColumnTransformer can select columns by name
+            features = pd.DataFrame(features, columns = FEATURE_COLUMNS, copy = False)
+
+        return preprocessor.transform(features)
 
     def predict(self, features):
         """
-        Loads the pre-trained model and preprocessor, scales the input features, and predicts the class labels.
+        Gets the pre-trained model and preprocessor from the registry, scales the input features, and predicts the class labels.
 
         Args:
-            features (pd.DataFrame): A DataFrame with input features for prediction.
+            features (pd.DataFrame | np.ndarray): A DataFrame with input features for prediction, or a matrix in `FEATURE_COLUMNS` order.
 
         Returns:
             np.ndarray: An array with the predicted class labels.
         """
         try:
-            model_path        = 'artifacts\model.pkl'
-            preprocessor_path = 'artifacts\preprocessor.pkl'
+            y_pred_max, _ = self._score(features, batch_size = 1024, with_probabilities = False)
 
-            model        = load_object(file_path = model_path)
-            preprocessor = load_object(file_path = preprocessor_path)
+            return y_pred_max
+        
+        except Exception as e:
+            raise CustomException(e, sys)
 
-            data_scaled = preprocessor.transform(features)
+    def warm_up(self):
+        """
+        Loads the artifacts and runs one prediction, so that unpickling the model, importing its framework and
+        building its predict function happen at worker boot rather than on the first request.
 
-            preds      = model.predict(data_scaled)
-            y_pred_max = np.argmax(preds, axis = 1)
+        Returns:
+            float: The number of seconds the warm-up took.
+        """
+        start = time.perf_counter()
+
+        self.predict_batch(np.zeros((1, len(FEATURE_COLUMNS)), dtype = np.float32))
+
+        elapsed = time.perf_counter() - start
+
+        logging.info(f"Prediction pipeline warmed up in {elapsed:.3f}s")
+
+        return elapsed
+
+    def predict_batch(self, features, batch_size = 1024):
+        """
+        Scores a whole feature matrix with a single preprocessor transform and one batched model call.
+
+        Args:
+            features (np.ndarray): A float32 matrix of shape (n_rows, 4) in `FEATURE_COLUMNS` order.
+            batch_size (int): Maximum number of rows the model processes per step.
+
+        Returns:
+            tuple: The predicted class ids and the matrix of class probabilities.
+        """
+        try:
+            return self._score(features, batch_size)
 
-            return y_pred_max
-        
         except Exception as e:
             raise CustomException(e, sys)
 
+    def _run_model(self, artifacts, features, batch_size):
+        with stage("transform"):
+            data_scaled = self._scale(artifacts.preprocessor, features)
+
+        with stage("predict"):
+            probabilities = artifacts.model.predict(data_scaled, batch_size = max(1, min(len(features), batch_size)), verbose = 0)
+            class_ids     = np.argmax(probabilities, axis = 1)
+
+        return class_ids, probabilities
+
+    def _score(self, features, batch_size, with_probabilities = True):
+        """
+        Predicts class ids and probabilities. Rows on the grid of the lookup table are answered from it, and the others
+        from the cache, the model running on the cache misses only.
+        """
+        with stage("load_artifacts"):
+            artifacts = self.registry.get()
+
+        if self.lookup_table is None:
+            return self._score_rows(artifacts, features, batch_size)
+
+        if not isinstance(features, np.ndarray):
+            features = features[FEATURE_COLUMNS].to_numpy(dtype = np.float32)
+
+        with stage("table_lookup"):
+            hits, hit_ids, hit_probabilities = self.lookup_table.lookup(features, artifacts.version, with_probabilities)
+
+        if hits.all():
+            return hit_ids, hit_probabilities
+
+        if not hits.any():
+            return self._score_rows(artifacts, features, batch_size)
+
+        miss_ids, miss_probabilities = self._score_rows(artifacts, features[~hits], batch_size)
+
+        class_ids        = np.empty(len(features), dtype = np.int64)
+        class_ids[hits]  = hit_ids
+        class_ids[~hits] = miss_ids
+
+        if not with_probabilities:
+            return class_ids, None
+
+        probabilities        = np.empty((len(features), miss_probabilities.shape[1]), dtype = np.float32)
+        probabilities[hits]  = hit_probabilities
+        probabilities[~hits] = miss_probabilities
+
+        return class_ids, probabilities
+
+    def _score_rows(self, artifacts, features, batch_size):
+        """
+        Predicts class ids and probabilities, serving the cached rows from the cache and running the model on the rest only.
+        Only rows already on the grid of the cache precision go through the cache, so a row is never answered with
+        the prediction of its rounded neighbour; the others are always scored as they are.
+        """
+        if self.cache is None:
+            return self._run_model(artifacts, features, batch_size)
+
+        if not isinstance(features, np.ndarray):
+            features = features[FEATURE_COLUMNS].to_numpy(dtype = np.float32)
+
+        with stage("cache_lookup"):
+            rows    = self.cache.quantize(features)
+            on_grid = (rows == np.asarray(features, dtype = np.float32)).all(axis = 1)
+            cached  = [None] * len(rows)
+
+            for i, entry in zip(np.flatnonzero(on_grid), self.cache.get_many(artifacts.version, rows[on_grid])):
+                cached[i] = entry
+
+            misses = [i for i, entry in enumerate(cached) if entry is None]
+
+        if misses:
+            miss_ids, miss_probabilities = self._run_model(artifacts, features[misses], batch_size)
+
+            stored = on_grid[misses]
+
+            self.cache.put_many(artifacts.version, rows[misses][stored], miss_ids[stored], miss_probabilities[stored])
+
+            for i, class_id, proba in zip(misses, miss_ids, miss_probabilities):
+                cached[i] = (class_id, proba)
+
+        class_ids     = np.array([entry[0] for entry in cached])
+        probabilities = np.stack([entry[1] for entry in cached])
+
+        return class_ids, probabilities
+
 class CustomData:
     """
     Allows the user to specify individual feature values for the iris dataset and provides a method to format these values into a DataFrame compatible with the prediction pipeline.
@@ -67,6 +221,8 @@ class CustomData:
             pd.DataFrame: A DataFrame containing feature columns for prediction.
         """
         try:
+            import pandas as pd
+
             custom_data_input_duct = {
                 "sepal length (cm)" : [self.sepal_length],
                 "sepal width (cm)"  : [self.sepal_width],
@@ -79,3 +235,132 @@ class CustomData:
         except Exception as e:
             raise CustomException(e, sys)
 
+    def get_data_as_array(self):
+        """
+        Creates a single-row float32 array with the input feature values, skipping the DataFrame construction.
+
+        Returns:
+            np.ndarray: An array of shape (1, 4) in `FEATURE_COLUMNS` order.
+        """
+        try:
+            return np.array([[self.sepal_length, self.sepal_width, self.petal_length, self.petal_width]], dtype = np.float32)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+class BatchData:
+    """
+    Validates a JSON batch of iris measurements and converts it into one contiguous float32 matrix for the prediction pipeline,
+    without building a DataFrame per row.
+
+    The payload may be:
+        - a list of records, each a dict keyed by feature name or a list of 4 values,
+        - a dict with a "records" key holding such a list,
+        - a dict with a "columns" key mapping every feature name to an equally long list of values.
+
+    Feature names may be given either as the dataset columns (e.g. "sepal length (cm)") or as the form field names (e.g. "sepal_length").
+
+    Attributes:
+        payload (object): The decoded JSON payload.
+        max_rows (int): Maximum number of rows accepted in a single batch.
+    """
+    def __init__(self, payload, max_rows : int = 100000):
+        self.payload  = payload
+        self.max_rows = max_rows
+
+    @staticmethod
+    def _column(mapping, j):
+        for key in (FEATURE_COLUMNS[j], FEATURE_ALIASES[j]):
+            if key in mapping:
+                return mapping[key]
+
+        raise ValueError(f"Missing feature '{FEATURE_ALIASES[j]}'")
+
+    def _from_records(self, records):
+        n_rows = len(records)
+
+        if n_rows and not isinstance(records[0], dict):
+            try:
+                matrix = np.asarray(records, dtype = np.float32)
+
+            # Ragged lists raise ValueError, nested objects TypeError
+            except (TypeError, ValueError):
+                raise ValueError(f"Each record must hold exactly {len(FEATURE_COLUMNS)} numeric values")
+
+            if matrix.ndim != 2 or matrix.shape[1] != len(FEATURE_COLUMNS):
+                raise ValueError(f"Each record must hold exactly {len(FEATURE_COLUMNS)} values")
+
+            return matrix
+
+        keys = []
+
+        for j in range(len(FEATURE_COLUMNS)):
+            keys.append(FEATURE_COLUMNS[j] if n_rows and FEATURE_COLUMNS[j] in records[0] else FEATURE_ALIASES[j])
+
+        try:
+            values = np.fromiter((record[key] for record in records for key in keys), dtype = np.float32, count = n_rows * len(keys))
+
+        except KeyError as e:
+            raise ValueError(f"Missing feature {e} in at least one record")
+
+        except (TypeError, AttributeError):
+            raise ValueError("Records must all be objects with numeric feature values")
+
+        return values.reshape(n_rows, len(keys))
+
+    def _from_columns(self, columns):
+        values = [self._column(columns, j) for j in range(len(FEATURE_COLUMNS))]
+
+        try:
+            arrays = [np.asarray(column, dtype = np.float32) for column in values]
+
+        except (TypeError, ValueError):
+            raise ValueError("All feature columns must be flat lists of numbers of the same length")
+
+        # Scalars become 0-d arrays, nested lists 2-d ones
+        if any(array.ndim != 1 for array in arrays) or len({len(array) for array in arrays}) != 1:
+            raise ValueError("All feature columns must be flat lists of the same length")
+
+        n_rows = len(arrays[0])
+        matrix = np.empty((n_rows, len(arrays)), dtype = np.float32)
+
+        for j, array in enumerate(arrays):
+            matrix[:, j] = array
+
+        return matrix
+
+    def get_data_as_array(self):
+        """
+        Validates the payload and builds the feature matrix.
+
+        Returns:
+            np.ndarray: A C-contiguous float32 matrix of shape (n_rows, 4) in `FEATURE_COLUMNS` order.
+
+        Raises:
+            ValueError: If the payload is malformed, empty, too large, or contains non-numeric or non-finite values.
+        """
+        payload = self.payload
+
+        if isinstance(payload, dict) and "records" in payload:
+            payload = payload["records"]
+
+        if isinstance(payload, list):
+            matrix = self._from_records(payload)
+
+        elif isinstance(payload, dict) and isinstance(payload.get("columns"), dict):
+            matrix = self._from_columns(payload["columns"])
+
+        else:
+            raise ValueError("Expected a list of records, {\"records\": [...]} or {\"columns\": {...}}")
+
+        if len(matrix) == 0:
+            raise ValueError("The batch is empty")
+
+        if len(matrix) > self.max_rows:
+            raise ValueError(f"The batch has {len(matrix)} rows, the limit is {self.max_rows}")
+
+        if not np.isfinite(matrix).all():
+            raise ValueError("All feature values must be finite numbers")
+
+        return np.ascontiguousarray(matrix)
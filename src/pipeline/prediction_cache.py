@@ -0,0 +1,141 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+
+@dataclass
+class PredictionCacheConfig:
+    """
+    Settings of the prediction result cache.
+
+    Attributes:
+        max_entries (int): Maximum number of cached feature vectors; the least recently used one is evicted first.
+        ttl_seconds (float): Seconds after which an entry expires, or None to keep entries until they are evicted.
+        precision (int): Number of decimals the features are rounded to before being used as a key.
+    """
+    max_entries: int = 10000
+    ttl_seconds: float = 3600.0
+    precision: int = 1
+
+class PredictionCache:
+    """
+    Bounded LRU/TTL cache of predictions keyed on the feature vector rounded to a fixed precision and on the
+    version of the model artifacts, so entries computed by a previous model are never served.
+
+    Attributes:
+        cache_config (PredictionCacheConfig): Size, expiry and precision settings.
+        stats (dict): Hit, miss, eviction and expiration counters.
+    """
+    def __init__(self, cache_config = None):
+        self.cache_config = cache_config or PredictionCacheConfig()
+
+        self._entries = OrderedDict()
+        self._lock    = threading.Lock()
+        self._version = None
+
+        self.stats = {
+            "hits"        : 0,
+            "misses"      : 0,
+            "evictions"   : 0,
+            "expirations" : 0
+        }
+
+    def quantize(self, features):
+        """
+        Rounds a feature matrix to the cache precision.
+
+        Args:
+            features (np.ndarray): Matrix of shape (n_rows, n_features).
+
+        Returns:
+            np.ndarray: The rounded float32 matrix, whose rows are used as keys.
+        """
+        return np.round(np.asarray(features, dtype = np.float32), self.cache_config.precision)
+
+    def get_many(self, version, rows):
+        """
+        Looks up the rounded rows of a feature matrix.
+
+        Args:
+            version (str): Version of the model artifacts the predictions must come from.
+            rows (np.ndarray): Matrix returned by `quantize`.
+
+        Returns:
+            list: The cached (class_id, probabilities) pair for every row, or None for the misses.
+        """
+        now     = time.monotonic()
+        ttl     = self.cache_config.ttl_seconds
+        results = []
+
+        with self._lock:
+            if version != self._version:
+                # The artifacts changed: nothing cached so far can be served any more.
+                self._entries.clear()
+                self._version = version
+
+            for row in rows:
+                key   = row.tobytes()
+                entry = self._entries.get(key)
+
+                if entry is not None and ttl is not None and now - entry[0] > ttl:
+                    del self._entries[key]
+                    self.stats["expirations"] += 1
+                    entry = None
+
+                if entry is None:
+                    self.stats["misses"] += 1
+                    results.append(None)
+
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    results.append(entry[1])
+
+        return results
+
+    def put_many(self, version, rows, class_ids, probabilities):
+        """
+        Stores the predictions of rounded rows, evicting the least recently used entries beyond `max_entries`.
+
+        Args:
+            version (str): Version of the model artifacts the predictions come from.
+            rows (np.ndarray): Matrix returned by `quantize`.
+            class_ids (np.ndarray): Predicted class of every row.
+            probabilities (np.ndarray): Class probabilities of every row.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            if version != self._version:
+                return
+
+            for row, class_id, proba in zip(rows, class_ids, probabilities):
+                # A row of the batch matrix is a view that would keep the whole matrix alive
+                self._entries[row.tobytes()] = (now, (class_id, proba.copy()))
+                self._entries.move_to_end(row.tobytes())
+
+            while len(self._entries) > self.cache_config.max_entries:
+                self._entries.popitem(last = False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """
+        Returns the cache counters, its size and hit rate.
+
+        Returns:
+            dict: A snapshot of the cache statistics.
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["version"] = self._version
+
+        lookups           = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+
+        return stats
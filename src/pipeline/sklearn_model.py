@@ -0,0 +1,29 @@
+import numpy as np
+
+class SklearnModel:
+    """
+    Wraps a fitted scikit-learn classifier so it exposes the same `predict` call as the Keras model:
+    `predict` returns the matrix of class probabilities, not the class labels. A wrapped estimator can
+    therefore be saved as `model.pkl` and served by `PredictPipeline` unchanged.
+
+    Attributes:
+        estimator (object): The fitted classifier, with a `predict_proba` method.
+    """
+    def __init__(self, estimator):
+        self.estimator = estimator
+
+    def predict(self, X, batch_size = None, verbose = 0):
+        """
+        Predicts the class probabilities.
+
+        Args:
+            X (np.ndarray): Input matrix of shape (n_rows, n_features).
+            batch_size (int, optional): Accepted for compatibility with `keras.Model.predict`; ignored.
+            verbose (int, optional): Accepted for compatibility with `keras.Model.predict`; ignored.
+
+        Returns:
+            np.ndarray: A float32 matrix of class probabilities.
+        """
+        return self.estimator.predict_proba(np.asarray(X, dtype = np.float64)).astype(np.float32)
+
+    __call__ = predict
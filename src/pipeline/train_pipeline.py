@@ -0,0 +1,357 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import inputs_hash
+
+@dataclass
+class Stage:
+    """
+    One step of the training DAG.
+
+    Attributes:
+        name (str): Unique name of the stage.
+        function (callable): Runs the stage; takes no arguments and writes the `outputs`.
+        inputs (list): Files the stage reads.
+        outputs (list): Files or directories the stage writes; an output the stage may leave out is recorded as absent.
+        code (list): Source files whose content defines the stage's behaviour.
+        config (dict): JSON-serializable settings that change the outputs.
+        deps (list): Names of the stages that must run first.
+    """
+    name: str
+    function: object
+    inputs: list = field(default_factory = list)
+    outputs: list = field(default_factory = list)
+    code: list = field(default_factory = list)
+    config: dict = field(default_factory = dict)
+    deps: list = field(default_factory = list)
+
+@dataclass
+class StageCacheConfig:
+    """
+    Settings of the stage cache.
+
+    Attributes:
+        cache_dir (str): Directory holding the outputs of past runs, one directory per stage and fingerprint.
+        max_workers (int): Maximum number of independent stages run at the same time.
+        keep (int): Number of cached runs kept per stage; older ones are removed.
+    """
+    cache_dir: str = os.path.join("artifacts", ".stage_cache")
+    max_workers: int = 4
+    keep: int = 3
+
+def _path_hash(path):
+    """
+    Content hash of a file, or of every file in a directory.
+    """
+    if os.path.isdir(path):
+        return inputs_hash(sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names))
+
+    return inputs_hash([path])
+
+def _copy(source, destination):
+    if os.path.isdir(destination):
+        shutil.rmtree(destination)
+
+    if os.path.isdir(source):
+        shutil.copytree(source, destination)
+
+    else:
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok = True)
+        shutil.copy2(source, destination)
+
+class StageRunner:
+    """
+    Runs a DAG of stages with a content-addressed cache. A stage's fingerprint covers its name, the content of its
+    input files and source code, and its config. On a cache hit the stage does not run: outputs already in place
+    are kept and missing or different ones are restored from the cache. Stages whose dependencies are done run
+    concurrently on a thread pool.
+
+    Attributes:
+        stages (dict): The stages by name.
+        stage_cache_config (StageCacheConfig): Cache location, parallelism and retention.
+    """
+    def __init__(self, stages, stage_cache_config = None):
+        self.stages             = {stage.name: stage for stage in stages}
+        self.stage_cache_config = stage_cache_config or StageCacheConfig()
+
+        for stage in stages:
+            unknown = set(stage.deps) - set(self.stages)
+
+            if unknown:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages {sorted(unknown)}")
+
+    @staticmethod
+    def fingerprint(stage):
+        """
+        Returns the SHA-256 fingerprint of the stage's name, the content of its inputs and code, and its config.
+
+        Raises:
+            FileNotFoundError: If an input of the stage does not exist.
+        """
+        missing = [path for path in stage.inputs if not os.path.exists(path)]
+
+        if missing:
+            raise FileNotFoundError(f"Stage {stage.name} is missing its inputs {missing}")
+
+        parts = {
+            "stage"  : stage.name,
+            "inputs" : {path: _path_hash(path) for path in stage.inputs},
+            "code"   : {path: _path_hash(path) for path in stage.code},
+            "config" : stage.config
+        }
+
+        return hashlib.sha256(json.dumps(parts, sort_keys = True, default = str).encode()).hexdigest()
+
+    def _entry_dir(self, stage, fingerprint):
+        return os.path.join(self.stage_cache_config.cache_dir, stage.name, fingerprint)
+
+    def _restore(self, stage, fingerprint):
+        """
+        Brings the outputs of a cached run into place. Returns False when the stage has no complete cache entry.
+        """
+        entry = self._entry_dir(stage, fingerprint)
+
+        if not os.path.exists(os.path.join(entry, "outputs.json")):
+            return False
+
+        with open(os.path.join(entry, "outputs.json")) as f:
+            hashes = json.load(f)
+
+        # The outputs of the stage changed since the entry was stored
+        if any(output not in hashes for output in stage.outputs):
+            return False
+
+        for index, output in enumerate(stage.outputs):
+            if hashes[output] is None:
+                # The run did not produce this output, so none may be left from another run
+                if os.path.isdir(output):
+                    shutil.rmtree(output)
+
+                elif os.path.exists(output):
+                    os.remove(output)
+
+            elif not os.path.exists(output) or _path_hash(output) != hashes[output]:
+                _copy(os.path.join(entry, str(index)), output)
+
+        return True
+
+    def _store(self, stage, fingerprint):
+        entry = self._entry_dir(stage, fingerprint)
+        tmp   = entry + ".tmp"
+
+        shutil.rmtree(tmp, ignore_errors = True)
+
+        os.makedirs(tmp)
+
+        for index, output in enumerate(stage.outputs):
+            if os.path.exists(output):
+                _copy(output, os.path.join(tmp, str(index)))
+
+        with open(os.path.join(tmp, "outputs.json"), "w") as f:
+            json.dump({output: _path_hash(output) if os.path.exists(output) else None for output in stage.outputs}, f, indent = 2)
+
+        shutil.rmtree(entry, ignore_errors = True)
+        os.replace(tmp, entry)
+
+        # Keep the most recent runs of the stage only
+        stage_dir = os.path.dirname(entry)
+        entries   = sorted((os.path.join(stage_dir, name) for name in os.listdir(stage_dir) if not name.endswith(".tmp")), key = os.path.getmtime)
+
+        for old in entries[:-self.stage_cache_config.keep]:
+            shutil.rmtree(old, ignore_errors = True)
+
+    def _run_stage(self, stage, force):
+        fingerprint = self.fingerprint(stage)
+
+        if stage.name not in force and self._restore(stage, fingerprint):
+            logging.info(f"Stage {stage.name} is up to date ({fingerprint[:12]})")
+
+            return "cached"
+
+        logging.info(f"Running stage {stage.name} ({fingerprint[:12]})")
+
+        stage.function()
+
+        self._store(stage, fingerprint)
+
+        return "ran"
+
+    def initiate_run(self, force = ()):
+        """
+        Runs every stage whose fingerprint is not cached, in dependency order.
+
+        Args:
+            force (iterable): Names of stages to run even on a cache hit.
+
+        Returns:
+            dict: "ran" or "cached" for every stage.
+        """
+        try:
+            force   = set(force)
+            status  = {}
+            pending = dict(self.stages)
+            running = {}
+
+            with ThreadPoolExecutor(max_workers = self.stage_cache_config.max_workers) as executor:
+                while pending or running:
+                    ready = [stage for stage in pending.values() if all(dep in status for dep in stage.deps)]
+
+                    for stage in ready:
+                        del pending[stage.name]
+                        running[executor.submit(self._run_stage, stage, force)] = stage.name
+
+                    if not running:
+                        raise ValueError(f"Stages {sorted(pending)} have circular dependencies")
+
+                    done, _ = wait(running, return_when = FIRST_COMPLETED)
+
+                    for future in done:
+                        status[running.pop(future)] = future.result()
+
+            return status
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+def training_stages(training_config = None, storage_format = "csv"):
+    """
+    Builds the ingestion -> transformation -> training DAG around the existing components. The transformed
+    arrays are passed to the training stage as `.npy` files, which it memory-maps instead of reading.
+
+    Args:
+        training_config (TrainingConfig, optional): Settings of the training loop; part of the training fingerprint.
+        storage_format (str): Format of the ingested datasets, see `DataIngestionConfig.storage_format`.
+
+    Returns:
+        list: The stages.
+    """
+    from importlib.metadata import version
+    from src.components.data_ingestion import DataIngestionConfig
+    from src.components.data_transformation import DataTransformationConfig
+    from src.components.model_trainer import ModelTrainerConfig, TrainingConfig
+    from src.components.model_exporter import ModelExporterConfig
+    from src.pipeline.numpy_model import quantized_model_path
+
+    training_config  = training_config or TrainingConfig()
+    ingestion_config = DataIngestionConfig(storage_format = storage_format)
+    exporter_config  = ModelExporterConfig(storage_format = storage_format)
+
+    raw_data_path, train_data_path, test_data_path = ingestion_config.split_paths()
+
+    def ingestion():
+        from src.components.data_ingestion import DataIngestion
+
+        DataIngestion(ingestion_config).initiate_data_ingestion()
+
+    def transformation():
+        from src.components.data_transformation import DataTransformation
+
+        DataTransformation().initiate_data_transformation(train_data_path, test_data_path)
+
+    def training():
+        import numpy as np
+        from src.components.model_trainer import ModelTrainer
+
+        ModelTrainer(training_config, exporter_config).initiate_model_trainer(
+            np.load(DataTransformationConfig.train_array_path, mmap_mode = "r"),
+            np.load(DataTransformationConfig.test_array_path, mmap_mode = "r")
+        )
+
+    components = os.path.join("src", "components")
+    pipeline   = os.path.join("src", "pipeline", "train_pipeline.py")
+
+    return [
+        Stage(
+            name     = "ingestion",
+            function = ingestion,
+            outputs  = [raw_data_path, train_data_path, test_data_path],
+            code     = [os.path.join(components, "data_ingestion.py"), os.path.join("src", "utils.py"), pipeline],
+            config   = {"scikit-learn": version("scikit-learn"), "storage_format": storage_format}
+        ),
+        Stage(
+            name     = "transformation",
+            function = transformation,
+            inputs   = [train_data_path, test_data_path],
+            outputs  = [DataTransformationConfig.preprocessor_obj_file_path, DataTransformationConfig.train_array_path, DataTransformationConfig.test_array_path],
+            code     = [os.path.join(components, "data_transformation.py"), os.path.join("src", "utils.py"), pipeline],
+            deps     = ["ingestion"]
+        ),
+        Stage(
+            name     = "training",
+            function = training,
+            # The quantized exports are calibrated and gated on the ingested splits
+            inputs   = [DataTransformationConfig.train_array_path, DataTransformationConfig.test_array_path, DataTransformationConfig.preprocessor_obj_file_path,
+                        *exporter_config.quantization_data_paths()],
+            outputs  = [ModelTrainerConfig.trainde_model_file_path, exporter_config.exported_model_file_path,
+                        exporter_config.fused_model_file_path, exporter_config.bundle_dir_path] +
+                       [quantized_model_path(path, precision) for path in (exporter_config.exported_model_file_path, exporter_config.fused_model_file_path)
+                        for precision in exporter_config.precisions],
+            code     = [os.path.join(components, "model_trainer.py"), os.path.join(components, "model_exporter.py"),
+                        os.path.join("src", "utils.py"), os.path.join("src", "pipeline", "numpy_model.py"),
+                        os.path.join("src", "pipeline", "sklearn_model.py"), pipeline],
+            config   = dict(asdict(training_config), precisions = list(exporter_config.precisions), tensorflow = version("tensorflow"), keras = version("keras")),
+            deps     = ["transformation"]
+        )
+    ]
+
+class TrainPipeline:
+    """
+    Runs data ingestion, transformation and model training through the stage cache, so stages whose inputs,
+    code and config are unchanged are not recomputed.
+
+    Attributes:
+        training_config (TrainingConfig): Settings of the training loop.
+        stage_cache_config (StageCacheConfig): Cache location, parallelism and retention.
+        storage_format (str): Format of the ingested datasets: "csv", "npy" or "parquet".
+    """
+    def __init__(self, training_config = None, stage_cache_config = None, storage_format = "csv"):
+        self.training_config    = training_config
+        self.stage_cache_config = stage_cache_config or StageCacheConfig()
+        self.storage_format     = storage_format
+
+    def initiate_training_pipeline(self, force = ()):
+        """
+        Runs the stages that are not up to date.
+
+        Args:
+            force (iterable): Names of stages to run even when cached.
+
+        Returns:
+            dict: "ran" or "cached" for every stage.
+        """
+        status = StageRunner(training_stages(self.training_config, self.storage_format), self.stage_cache_config).initiate_run(force)
+
+        logging.info(f"Training pipeline finished: {status}")
+
+        return status
+
+def main():
+    from src.utils import TABLE_FORMATS
+    from src.components.model_trainer import TrainingConfig
+
+    parser = argparse.ArgumentParser(description = "Run the training pipeline, reusing cached stage outputs")
+    parser.add_argument("--force", nargs = "*", default = [], choices = ["ingestion", "transformation", "training"], help = "stages to rerun even when cached")
+    parser.add_argument("--epochs", type = int, default = TrainingConfig.epochs)
+    parser.add_argument("--batch-size", type = int, default = TrainingConfig.batch_size)
+    parser.add_argument("--workers", type = int, default = StageCacheConfig.max_workers, help = "independent stages run at the same time")
+    parser.add_argument("--storage-format", default = "csv", choices = TABLE_FORMATS, help = "format of the ingested datasets")
+    args = parser.parse_args()
+
+    status = TrainPipeline(
+        TrainingConfig(epochs = args.epochs, batch_size = args.batch_size),
+        StageCacheConfig(max_workers = args.workers),
+        storage_format = args.storage_format
+    ).initiate_training_pipeline(force = args.force)
+
+    for name, result in status.items():
+        print(f"{name:<15} {result}")
+
+if __name__ == "__main__":
+    main()
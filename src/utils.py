@@ -1,11 +1,15 @@
 import os
 import sys
+import json
+import hashlib
 import numpy as np
-import pandas as pd
 import pickle 
-from sklearn.metrics import accuracy_score
+from datetime import datetime, timezone
 from src.exception import CustomException
 
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_MANIFEST       = "manifest.json"
+
 def save_object(file_path, obj):
     """
     Saves an object to a specified file path using pickle. 
@@ -25,28 +29,160 @@ def save_object(file_path, obj):
     except Exception as e:
         raise CustomException(e, sys)
     
-def evaluate_model(X_train, y_train, X_test, y_test, model):
+def make_dataset(X, y, batch_size, shuffle = False, seed = None):
     """
-    Trains the model using the training data, predicts the test data labels, and calculates the accuracy score.
+    Builds a tf.data input pipeline over in-memory arrays: the examples are cached after the first pass,
+    optionally reshuffled every epoch, batched, and prefetched so the next batch is ready while the
+    current one is being trained on.
+
+    Args:
+        X (np.ndarray): The features.
+        y (np.ndarray): The class labels.
+        batch_size (int): Number of examples per batch.
+        shuffle (bool): Whether to reshuffle the examples every epoch.
+        seed (int, optional): Seed of the shuffling.
+
+    Returns:
+        tf.data.Dataset: The batched (features, labels) dataset.
+    """
+    import tensorflow as tf
+
+    dataset = tf.data.Dataset.from_tensor_slices((np.asarray(X, dtype = np.float32), np.asarray(y, dtype = np.int32))).cache()
+
+    if shuffle:
+        dataset = dataset.shuffle(len(X), seed = seed, reshuffle_each_iteration = True)
+
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+def train_model(model, X_train, y_train, training_config):
+    """
+    Fits a compiled Keras model through a tf.data pipeline, with optional early stopping and learning-rate
+    reduction on plateau, and measures how long the training took.
 
     Args:
+        model (keras.Model): The compiled model to train.
         X_train (np.ndarray): The training data features.
         y_train (np.ndarray): The training data labels.
+        training_config (TrainingConfig): Batch size, epochs, early stopping, learning-rate schedule and validation settings.
+
+    Returns:
+        dict: Wall-clock seconds, samples/sec, epochs run, epochs to convergence (the epoch with the best monitored loss),
+              whether training stopped early, and the final loss and accuracy.
+    """
+    import time
+    from tensorflow import keras
+
+    config = training_config
+    n_val  = int(len(X_train) * config.validation_split)
+
+    if n_val:
+        X_fit, y_fit, X_val, y_val = X_train[:-n_val], y_train[:-n_val], X_train[-n_val:], y_train[-n_val:]
+        validation_data            = make_dataset(X_val, y_val, config.batch_size)
+
+    else:
+        X_fit, y_fit, validation_data = X_train, y_train, None
+
+    monitor   = "val_loss" if n_val else "loss"
+    callbacks = []
+
+    if config.early_stopping:
+        callbacks.append(keras.callbacks.EarlyStopping(monitor = monitor, patience = config.patience, min_delta = config.min_delta, restore_best_weights = True))
+
+    if config.lr_schedule == "plateau":
+        callbacks.append(keras.callbacks.ReduceLROnPlateau(monitor = monitor, factor = 0.5, patience = max(1, config.patience // 2), min_lr = config.learning_rate / 100))
+
+    start = time.perf_counter()
+
+    history = model.fit(
+        make_dataset(X_fit, y_fit, config.batch_size, shuffle = True, seed = config.seed),
+        validation_data = validation_data,
+        epochs          = config.epochs,
+        callbacks       = callbacks,
+        verbose         = config.verbose
+    )
+
+    wall_seconds = time.perf_counter() - start
+    epochs_run   = len(history.history["loss"])
+    losses       = history.history[monitor]
+
+    return {
+        "wall_seconds"       : wall_seconds,
+        "samples_per_sec"    : len(X_fit) * epochs_run / wall_seconds,
+        "epochs_run"         : epochs_run,
+        "epochs_to_converge" : int(np.argmin(losses)) + 1,
+        "stopped_early"      : epochs_run < config.epochs,
+        "final_loss"         : float(losses[-1]),
+        "final_accuracy"     : float(history.history["accuracy"][-1])
+    }
+
+def score_model(model, X_test, y_test):
+    """
+    Predicts the test data labels and calculates the accuracy score.
+
+    Args:
+        model (keras.Model): The trained model.
         X_test (np.ndarray): The test data features.
         y_test (np.ndarray): The test data labels.
-        model (keras.Model): The neural network model to train and evaluate.
 
     Returns:
         float: The accuracy score of the model on the test set.
     """
-    history = model.fit(X_train, y_train, batch_size = 16, epochs = 500)
+    from sklearn.metrics import accuracy_score
 
-    y_pred     = model.predict(X_test)
+    y_pred     = model.predict(X_test, verbose = 0)
     y_pred_max = np.argmax(y_pred, axis = 1)
 
-    accuracy = accuracy_score(y_test, y_pred_max)
+    return accuracy_score(y_test, y_pred_max)
+
+def evaluate_model(X_train, y_train, X_test, y_test, model, training_config = None):
+    """
+    Trains the model using the training data, predicts the test data labels, and calculates the accuracy score.
+
+    Args:
+        X_train (np.ndarray): The training data features.
+        y_train (np.ndarray): The training data labels.
+        X_test (np.ndarray): The test data features.
+        y_test (np.ndarray): The test data labels.
+        model (keras.Model): The compiled neural network model to train and evaluate.
+        training_config (TrainingConfig, optional): Training settings; the defaults of `TrainingConfig` when omitted.
+
+    Returns:
+        float: The accuracy score of the model on the test set.
+    """
+    if training_config is None:
+        from src.components.model_trainer import TrainingConfig
+
+        training_config = TrainingConfig()
 
-    return accuracy
+    train_model(model, X_train, y_train, training_config)
+
+    return score_model(model, X_test, y_test)
+
+def inputs_hash(file_paths):
+    """
+    Computes one SHA-256 digest over the names and contents of several files, so a stage can tell
+    whether any of its inputs changed since it last ran. Missing files hash as absent.
+
+    Args:
+        file_paths (list): Paths to the input files.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+
+    for file_path in file_paths:
+        digest.update(os.path.basename(file_path).encode())
+
+        if not os.path.exists(file_path):
+            digest.update(b"<missing>")
+            continue
+
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+
+    return digest.hexdigest()
 
 def load_object(file_path):
     """
@@ -63,4 +199,293 @@ def load_object(file_path):
              return pickle.load(f)
 
     except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+def save_bundle(dir_path, arrays, metadata):
+    """
+    Saves arrays as a versioned artifact bundle: one `.npy` file per array, which can be memory-mapped, and a
+    `manifest.json` describing them (shape, dtype, SHA-256) next to the given metadata.
+
+    Array files are named after their content hash and the manifest is replaced atomically, so processes that
+    memory-mapped the previous version keep reading consistent data while the new one is written.
+
+    Args:
+        dir_path (str): Directory of the bundle.
+        arrays (dict): Arrays to store, by name.
+        metadata (dict): JSON-serializable description stored in the manifest (schema, model type, ...).
+
+    Returns:
+        dict: The written manifest.
+    """
+    try:
+        os.makedirs(dir_path, exist_ok = True)
+
+        entries = {}
+
+        for name, array in arrays.items():
+            array     = np.ascontiguousarray(array)
+            digest    = hashlib.sha256(array.tobytes()).hexdigest()
+            file_name = f"{name}.{digest[:16]}.npy"
+            file_path = os.path.join(dir_path, file_name)
+
+            if not os.path.exists(file_path):
+                with open(file_path + ".tmp", "wb") as f:
+                    np.save(f, array, allow_pickle = False)
+
+                os.replace(file_path + ".tmp", file_path)
+
+            entries[name] = {"file": file_name, "shape": list(array.shape), "dtype": array.dtype.str, "sha256": digest}
+
+        return _write_manifest(dir_path, entries, metadata)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def _write_manifest(dir_path, entries, metadata):
+    """
+    Atomically replaces the manifest of a bundle whose array files are written, then removes the array files
+    of previous versions.
+    """
+    manifest = dict(
+        metadata,
+        format_version = BUNDLE_FORMAT_VERSION,
+        created_at     = datetime.now(timezone.utc).isoformat(),
+        arrays         = entries,
+        content_hash   = hashlib.sha256("".join(entries[name]["sha256"] for name in sorted(entries)).encode()).hexdigest()
+    )
+
+    manifest_path = os.path.join(dir_path, BUNDLE_MANIFEST)
+
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent = 2)
+
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    referenced = {entry["file"] for entry in entries.values()}
+
+    for file_name in os.listdir(dir_path):
+        if file_name.endswith(".npy") and file_name not in referenced:
+            os.remove(os.path.join(dir_path, file_name))
+
+    return manifest
+
+def load_bundle(dir_path, mmap_mode = "r", verify = False):
+    """
+    Loads an artifact bundle written by `save_bundle`. With `mmap_mode`, the arrays are memory-mapped
+    read-only: loading is close to zero-copy and the pages are shared by every process mapping the bundle.
+
+    Args:
+        dir_path (str): Directory of the bundle.
+        mmap_mode (str, optional): Passed to `np.load`; None reads the arrays into memory.
+        verify (bool): Whether to check every array against the SHA-256 recorded in the manifest.
+
+    Returns:
+        tuple: The manifest and the arrays by name.
+    """
+    try:
+        with open(os.path.join(dir_path, BUNDLE_MANIFEST)) as f:
+            manifest = json.load(f)
+
+        if manifest.get("format_version", 0) > BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format version {manifest.get('format_version')}")
+
+        arrays = {}
+
+        for name, entry in manifest["arrays"].items():
+            array = np.load(os.path.join(dir_path, entry["file"]), mmap_mode = mmap_mode, allow_pickle = False)
+
+            if list(array.shape) != entry["shape"] or array.dtype.str != entry["dtype"]:
+                raise ValueError(f"Array {name} does not match the bundle manifest")
+
+            if verify and hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest() != entry["sha256"]:
+                raise ValueError(f"Array {name} does not match its recorded hash")
+
+            arrays[name] = array
+
+        return manifest, arrays
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+TABLE_FORMATS = ("csv", "npy", "parquet")
+
+def table_path(file_path, storage_format):
+    """
+    Maps a dataset path to the path used by a storage format: the CSV file itself, a `.parquet` file next to it,
+    or, for "npy", a table directory next to it.
+
+    Args:
+        file_path (str): The CSV path of the dataset, e.g. 'artifacts/train.csv'.
+        storage_format (str): One of `TABLE_FORMATS`.
+
+    Returns:
+        str: The path of the dataset in that format.
+    """
+    if storage_format not in TABLE_FORMATS:
+        raise ValueError(f"Unknown storage format '{storage_format}', expected one of {TABLE_FORMATS}")
+
+    root, _ = os.path.splitext(file_path)
+
+    return {"csv": file_path, "npy": root + "_table", "parquet": root + ".parquet"}[storage_format]
+
+def _table_schema(feature_names, target_name, rows):
+    return {
+        "columns" : [{"name": name, "dtype": "float32"} for name in feature_names] + [{"name": target_name, "dtype": "int64"}],
+        "target"  : target_name,
+        "rows"    : rows
+    }
+
+def save_table(dir_path, features, target, feature_names, target_name = "target"):
+    """
+    Saves a labeled dataset as a bundle: a C-contiguous float32 feature matrix, an int64 label vector,
+    and the column schema in the manifest. Reading it back needs no parsing and, memory-mapped, no copy.
+
+    Args:
+        dir_path (str): Directory of the table.
+        features (np.ndarray): The feature matrix, one column per feature.
+        target (np.ndarray): The class labels.
+        feature_names (list): Names of the feature columns.
+        target_name (str): Name of the label column.
+
+    Returns:
+        dict: The written manifest.
+    """
+    try:
+        features = np.ascontiguousarray(features, dtype = np.float32)
+        target   = np.ascontiguousarray(target, dtype = np.int64)
+
+        if features.ndim != 2 or features.shape[1] != len(feature_names) or len(target) != len(features):
+            raise ValueError(f"Table of shape {features.shape} does not match its {len(feature_names)} columns and {len(target)} labels")
+
+        return save_bundle(dir_path, {"features": features, "target": target}, {"schema": _table_schema(feature_names, target_name, len(features))})
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+class TableWriter:
+    """
+    Writes a table in the format of `save_table` chunk by chunk, so memory use does not depend on the number of rows.
+    The arrays are appended to `.npy` files whose headers are rewritten with the final row count on `close`, and their
+    hashes are computed as they are written.
+
+    Attributes:
+        dir_path (str): Directory of the table.
+        feature_names (list): Names of the feature columns.
+        target_name (str): Name of the label column.
+        rows (int): Number of rows written so far.
+    """
+    def __init__(self, dir_path, feature_names, target_name = "target"):
+        self.dir_path      = dir_path
+        self.feature_names = list(feature_names)
+        self.target_name   = target_name
+        self.rows          = 0
+
+        os.makedirs(dir_path, exist_ok = True)
+
+        self._files = {}
+
+        for name, dtype, width in (("features", np.float32, len(self.feature_names)), ("target", np.int64, None)):
+            f = open(os.path.join(dir_path, f"{name}.npy.tmp"), "wb")
+
+            self._files[name] = (f, hashlib.sha256(), np.dtype(dtype), width)
+            self._write_header(name)
+
+    def _write_header(self, name):
+        f, _, dtype, width = self._files[name]
+        shape              = (self.rows, width) if width is not None else (self.rows,)
+
+        f.seek(0)
+        np.lib.format.write_array_header_1_0(f, {"descr": dtype.str, "fortran_order": False, "shape": shape})
+
+    def write(self, features, target):
+        """
+        Appends rows to the table.
+
+        Args:
+            features (np.ndarray): The feature matrix of the rows.
+            target (np.ndarray): Their class labels.
+        """
+        if len(features) != len(target):
+            raise ValueError(f"Got {len(features)} feature rows and {len(target)} labels")
+
+        for name, array in (("features", features), ("target", target)):
+            f, digest, dtype, _ = self._files[name]
+            data                = np.ascontiguousarray(array, dtype = dtype).tobytes()
+
+            f.write(data)
+            digest.update(data)
+
+        self.rows += len(features)
+
+    def close(self):
+        """
+        Completes the array files and writes the manifest.
+
+        Returns:
+            dict: The written manifest.
+        """
+        try:
+            entries = {}
+
+            for name, (f, digest, dtype, width) in self._files.items():
+                # The header has the same length for any row count, so it is rewritten in place
+                end = f.tell()
+
+                self._write_header(name)
+                f.seek(end)
+                f.close()
+
+                digest    = digest.hexdigest()
+                file_name = f"{name}.{digest[:16]}.npy"
+
+                os.replace(os.path.join(self.dir_path, f"{name}.npy.tmp"), os.path.join(self.dir_path, file_name))
+
+                shape         = [self.rows, width] if width is not None else [self.rows]
+                entries[name] = {"file": file_name, "shape": shape, "dtype": dtype.str, "sha256": digest}
+
+            return _write_manifest(self.dir_path, entries, {"schema": _table_schema(self.feature_names, self.target_name, self.rows)})
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+def read_table(file_path, target_name = "target", mmap_mode = "r"):
+    """
+    Reads a labeled dataset in any of `TABLE_FORMATS`, chosen from the path: a table directory written by
+    `save_table` is memory-mapped, a `.parquet` file is read with `pyarrow`, anything else is parsed as CSV.
+
+    Args:
+        file_path (str): Path of the dataset.
+        target_name (str): Name of the label column in CSV and Parquet files.
+        mmap_mode (str, optional): Passed to `load_bundle` for table directories.
+
+    Returns:
+        tuple: The float32 feature matrix, the labels and the feature names.
+    """
+    try:
+        if os.path.isdir(file_path):
+            manifest, arrays = load_bundle(file_path, mmap_mode = mmap_mode)
+            schema           = manifest["schema"]
+
+            return arrays["features"], arrays["target"], [column["name"] for column in schema["columns"] if column["name"] != schema["target"]]
+
+        if file_path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            table         = pq.read_table(file_path, memory_map = True)
+            feature_names = [name for name in table.column_names if name != target_name]
+            features      = np.empty((table.num_rows, len(feature_names)), dtype = np.float32)
+
+            for i, name in enumerate(feature_names):
+                features[:, i] = table.column(name).to_numpy()
+
+            return features, table.column(target_name).to_numpy(), feature_names
+
+        import pandas as pd
+
+        df            = pd.read_csv(file_path)
+        feature_names = [name for name in df.columns if name != target_name]
+
+        return df[feature_names].to_numpy(dtype = np.float32), df[target_name].to_numpy(), feature_names
+
+    except Exception as e:
+        raise CustomException(e, sys)
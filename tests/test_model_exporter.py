@@ -0,0 +1,108 @@
+"""
+Numerical parity of the NumPy engine exports with the Keras model they are folded from.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+keras = pytest.importorskip("tensorflow").keras
+
+from sklearn.datasets import load_iris
+from src.components.model_trainer import TrainingConfig, build_model, compile_model
+from src.components.data_transformation import DataTransformation
+from src.components.model_exporter import fold_keras_model, fuse_preprocessor
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+from src.utils import train_model
+
+ATOL = 1e-4
+
+@pytest.fixture(scope = "module")
+def iris():
+    """
+    The raw iris features, the fitted preprocessor and the scaled features.
+    """
+    data         = load_iris()
+    X_raw        = pd.DataFrame(data["data"], columns = FEATURE_COLUMNS)
+    preprocessor = DataTransformation().get_data_transformer_obg().fit(X_raw)
+
+    return X_raw, data["target"], preprocessor, preprocessor.transform(X_raw).astype(np.float32)
+
+@pytest.fixture(scope = "module")
+def trained_model(iris):
+    """
+    The project architecture trained for a few epochs, so the BatchNorm moving statistics are no longer the identity.
+    """
+    _, y, _, X = iris
+    config     = TrainingConfig(epochs = 5, early_stopping = False, seed = 0)
+
+    keras.utils.set_random_seed(0)
+
+    model = build_model()
+
+    compile_model(model, config, len(X))
+    train_model(model, X, y, config)
+
+    return model
+
+def _with_batch_norm_statistics(model, seed = 0):
+    """
+    Gives every BatchNormalization layer random, non-trivial scale, shift, mean and variance.
+    """
+    rng = np.random.default_rng(seed)
+
+    for layer in model.layers:
+        if type(layer).__name__ == "BatchNormalization":
+            gamma, beta, mean, variance = layer.get_weights()
+
+            layer.set_weights([
+                rng.uniform(0.5, 2.0, gamma.shape).astype(np.float32),
+                rng.normal(0.0, 0.5, beta.shape).astype(np.float32),
+                rng.normal(0.0, 0.5, mean.shape).astype(np.float32),
+                rng.uniform(0.5, 2.0, variance.shape).astype(np.float32)
+            ])
+
+    return model
+
+def test_folded_model_matches_keras(trained_model, iris):
+    _, _, _, X = iris
+
+    expected = trained_model.predict(X, verbose = 0)
+    actual   = fold_keras_model(trained_model).predict(X)
+
+    assert np.allclose(actual, expected, atol = ATOL)
+
+@pytest.mark.parametrize("layers", [
+    # BatchNorm after a ReLU Dense layer is folded into the next Dense layer, as in the project architecture
+    lambda: [keras.layers.Dense(8, activation = "relu"), keras.layers.BatchNormalization(), keras.layers.Dropout(0.3), keras.layers.Dense(3, activation = "softmax")],
+    # BatchNorm after a linear Dense layer is folded into that layer
+    lambda: [keras.layers.Dense(8), keras.layers.BatchNormalization(), keras.layers.Dense(3, activation = "softmax")],
+    # Consecutive BatchNorm layers are combined, and a BatchNorm on the inputs goes into the first Dense layer
+    lambda: [keras.layers.BatchNormalization(), keras.layers.BatchNormalization(), keras.layers.Dense(3, activation = "softmax")],
+    # A trailing BatchNorm is kept as a diagonal linear layer
+    lambda: [keras.layers.Dense(3, activation = "tanh"), keras.layers.BatchNormalization()]
+], ids = ["after_relu", "after_linear", "stacked_on_inputs", "trailing"])
+def test_batch_norm_folding_matches_keras(layers, iris):
+    _, _, _, X = iris
+
+    keras.utils.set_random_seed(0)
+
+    model = _with_batch_norm_statistics(keras.Sequential([keras.Input(shape = (X.shape[1],))] + layers()))
+
+    expected = model.predict(X, verbose = 0)
+    actual   = fold_keras_model(model).predict(X)
+
+    assert np.allclose(actual, expected, atol = ATOL)
+
+def test_fused_scaler_matches_keras_on_raw_features(trained_model, iris):
+    X_raw, _, preprocessor, X = iris
+
+    fused_model = fuse_preprocessor(fold_keras_model(trained_model), preprocessor)
+
+    expected = trained_model.predict(X, verbose = 0)
+    actual   = fused_model.predict(X_raw.to_numpy(dtype = np.float32))
+
+    assert fused_model.raw_features
+    assert np.allclose(actual, expected, atol = ATOL)